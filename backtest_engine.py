@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+Portfolio Backtest Engine
+=========================
+Event-driven daily simulation shared by the RRG strategy backtests
+(rrg_quadrant_backtest.py, rrg_strategy_backtest.py, rrg_rs_strategy_backtest.py).
+
+Open positions live in NumPy arrays with one slot per symbol, so stop and
+target checks run across every open position at once on each bar. A
+strategy supplies entry candidates, initial stop/target levels and an
+ordered list of exit rules; the engine handles fills, costs, equity and
+metrics.
+
+Bar order: exits on bar i (rules in order, first hit wins), then entries
+signalled on bar i fill at the next bar's open, then equity at bar i's close.
+"""
+
+import re
+import numpy as np
+import pandas as pd
+
+# =============================================================================
+# DEFAULTS
+# =============================================================================
+
+INITIAL_CAPITAL = 1_000_000
+POSITION_SIZE = 0.05       # fraction of capital per position
+COST_RATE = 0.004          # commission + stamp duty + slippage, per side
+ATR_PERIOD = 14
+ATR_FALLBACK_PCT = 0.03    # ATR used when it can't be calculated (3% of price)
+TRADING_DAYS = 252
+
+# =============================================================================
+# INDICATORS
+# =============================================================================
+
+def calculate_atr_panel(high, low, close, period=ATR_PERIOD):
+    """Average True Range for every column of a (date x symbol) panel"""
+    prev_close = close.shift(1)
+    tr = np.fmax(np.fmax(high - low, (high - prev_close).abs()), (low - prev_close).abs())
+    return tr.rolling(window=period).mean()
+
+# =============================================================================
+# EXIT RULES
+# =============================================================================
+# An exit rule is called as rule(bt, i, cols) for the open positions in `cols`
+# and returns (hit, price, reason): a bool mask, exit prices and a reason
+# string (or per-position reasons). Rules may also update position state
+# without exiting (e.g. a partial take profit).
+
+def stop_loss(reason="Stop Loss"):
+    """Exit at the stop when the bar trades through it (no stop set = NaN)"""
+    def rule(bt, i, cols):
+        stop = bt.stop[cols]
+        with np.errstate(invalid='ignore'):
+            hit = np.where(bt.direction[cols] > 0,
+                           bt.low[i, cols] <= stop,
+                           bt.high[i, cols] >= stop)
+        return hit, stop, reason
+    return rule
+
+def take_profit(reason="Take Profit", after_partial=False):
+    """Exit at the target; with after_partial only once the partial target was taken"""
+    def rule(bt, i, cols):
+        target = bt.target[cols]
+        with np.errstate(invalid='ignore'):
+            hit = np.where(bt.direction[cols] > 0,
+                           bt.high[i, cols] >= target,
+                           bt.low[i, cols] <= target)
+        if after_partial:
+            hit &= bt.partial_taken[cols]
+        return hit, target, reason
+    return rule
+
+def partial_take_profit(fraction=0.5):
+    """Scale out `fraction` of the position at the partial target (once per trade)"""
+    def rule(bt, i, cols):
+        level = bt.partial_target[cols]
+        with np.errstate(invalid='ignore'):
+            reached = np.where(bt.direction[cols] > 0,
+                               bt.high[i, cols] >= level,
+                               bt.low[i, cols] <= level)
+        reached &= ~bt.partial_taken[cols]
+        if reached.any():
+            bt.scale_out(cols[reached], level[reached], fraction)
+        return np.zeros(len(cols), dtype=bool), level, None
+    return rule
+
+def time_stop(max_days, reason="Time Exit"):
+    """Exit at the close after max_days bars in the trade"""
+    def rule(bt, i, cols):
+        return bt.holding_days[cols] >= max_days, bt.close[i, cols], reason
+    return rule
+
+# =============================================================================
+# STRATEGY BASE
+# =============================================================================
+
+class Strategy:
+    """
+    Rule module plugged into PortfolioBacktest. Override what the strategy needs:
+
+    prepare(bt)                     precompute signal arrays once
+    update_positions(bt, i, cols)   adjust stops/targets before exit rules
+    exit_rules                      ordered list of exit rules
+    entry_candidates(bt, i)         symbol columns to enter, in priority order
+    entry_levels(bt, i, cols, entry_price, atr)
+                                    dict of arrays: stop, partial_target, target,
+                                    direction, valid (all optional)
+    """
+    start_bar = 30
+    exit_rules = []
+
+    def prepare(self, bt):
+        pass
+
+    def update_positions(self, bt, i, cols):
+        pass
+
+    def entry_candidates(self, bt, i):
+        return np.empty(0, dtype=int)
+
+    def entry_levels(self, bt, i, cols, entry_price, atr):
+        return {}
+
+# =============================================================================
+# ENGINE
+# =============================================================================
+
+class PortfolioBacktest:
+    def __init__(self, data, symbols, strategy,
+                 initial_capital=INITIAL_CAPITAL, position_size=POSITION_SIZE,
+                 cost_rate=COST_RATE):
+        """
+        Args:
+            data: yfinance-style frame with (field, symbol) columns
+            symbols: universe to trade (columns of data)
+            strategy: Strategy instance
+        """
+        self.strategy = strategy
+        self.symbols = list(symbols)
+        self.dates = data.index
+        self.initial_capital = initial_capital
+        self.position_size = position_size
+        self.cost_rate = cost_rate
+
+        # Price panels, both as frames (for indicators) and arrays (for the loop)
+        self.frames = {field: data[field][self.symbols] for field in ['Open', 'High', 'Low', 'Close']}
+        self.open = self.frames['Open'].to_numpy(dtype=float)
+        self.high = self.frames['High'].to_numpy(dtype=float)
+        self.low = self.frames['Low'].to_numpy(dtype=float)
+        self.close = self.frames['Close'].to_numpy(dtype=float)
+        self.atr_panel = calculate_atr_panel(
+            self.frames['High'], self.frames['Low'], self.frames['Close']
+        ).to_numpy()
+
+        # Position state, one slot per symbol
+        n = len(self.symbols)
+        self.active = np.zeros(n, dtype=bool)
+        self.entry_seq = np.zeros(n, dtype=np.int64)
+        self.entry_bar = np.full(n, -1)
+        self.last_exit_bar = np.full(n, -1)
+        self.entry_price = np.full(n, np.nan)
+        self.direction = np.ones(n, dtype=np.int8)
+        self.size = np.zeros(n)
+        self.remaining = np.zeros(n)
+        self.atr = np.full(n, np.nan)
+        self.stop = np.full(n, np.nan)
+        self.partial_target = np.full(n, np.nan)
+        self.target = np.full(n, np.nan)
+        self.partial_taken = np.zeros(n, dtype=bool)
+        self.peak_gain = np.zeros(n)  # best favourable excursion in ATR
+        self.holding_days = np.zeros(n, dtype=np.int64)
+        self.pnl = np.zeros(n)
+
+        self.capital = initial_capital
+        self._next_seq = 0
+        self._trades = []
+        self._equity = []
+
+    # -------------------------------------------------------------------------
+    # Fills
+    # -------------------------------------------------------------------------
+
+    def scale_out(self, cols, price, fraction):
+        """Realize `fraction` of the remaining size at `price`"""
+        qty = self.remaining[cols] * fraction
+        realized = qty * (price - self.entry_price[cols]) * self.direction[cols]
+        realized -= qty * price * self.cost_rate
+        self.pnl[cols] += realized
+        self.remaining[cols] -= qty
+        self.partial_taken[cols] = True
+        self.capital += realized.sum()
+
+    def _close(self, bar, cols, price, reason):
+        """Close the remaining size of positions and record the trades"""
+        realized = self.remaining[cols] * (price - self.entry_price[cols]) * self.direction[cols]
+        realized -= self.remaining[cols] * price * self.cost_rate
+        self.pnl[cols] += realized
+        self.capital += realized.sum()
+
+        reasons = [reason] * len(cols) if isinstance(reason, str) else reason
+        exit_date = self.dates[bar]
+        for col, exit_price, exit_reason in zip(cols, price, reasons):
+            self._trades.append({
+                'symbol': self.symbols[col],
+                'entry_date': self.dates[self.entry_bar[col] + 1],
+                'entry_price': self.entry_price[col],
+                'exit_date': exit_date,
+                'exit_price': exit_price,
+                'direction': int(self.direction[col]),
+                'size': self.size[col],
+                'atr': self.atr[col],
+                'pnl': self.pnl[col],
+                'pnl_pct': self.pnl[col] / (self.size[col] * self.entry_price[col]) * 100,
+                'holding_days': int(self.holding_days[col]),
+                'peak_atr_gain': self.peak_gain[col],
+                'exit_reason': exit_reason
+            })
+
+        self.active[cols] = False
+        self.last_exit_bar[cols] = bar
+
+    # -------------------------------------------------------------------------
+    # Bar steps
+    # -------------------------------------------------------------------------
+
+    def _process_exits(self, i):
+        cols = np.flatnonzero(self.active)
+        if not len(cols):
+            return
+        cols = cols[np.argsort(self.entry_seq[cols])]
+        cols = cols[np.isfinite(self.close[i, cols])]  # no bar for the symbol today
+        if not len(cols):
+            return
+
+        self.holding_days[cols] += 1
+        favourable = np.where(self.direction[cols] > 0,
+                              self.high[i, cols] - self.entry_price[cols],
+                              self.entry_price[cols] - self.low[i, cols])
+        self.peak_gain[cols] = np.fmax(self.peak_gain[cols], favourable / self.atr[cols])
+
+        self.strategy.update_positions(self, i, cols)
+
+        exits = []
+        for rule in self.strategy.exit_rules:
+            hit, price, reason = rule(self, i, cols)
+            if hit.any():
+                if isinstance(reason, str):
+                    reason = [reason] * int(hit.sum())
+                else:
+                    reason = np.asarray(reason, dtype=object)[hit]
+                exits.append((cols[hit], np.asarray(price)[hit], reason))
+                cols = cols[~hit]
+                if not len(cols):
+                    break
+
+        if exits:
+            # Record in entry order, like walking the open positions one by one
+            exit_cols = np.concatenate([c for c, _, _ in exits])
+            exit_price = np.concatenate([p for _, p, _ in exits])
+            exit_reason = np.concatenate([np.asarray(r, dtype=object) for _, _, r in exits])
+            order = np.argsort(self.entry_seq[exit_cols])
+            self._close(i, exit_cols[order], exit_price[order], exit_reason[order])
+
+    def _process_entries(self, i):
+        cols = np.asarray(self.strategy.entry_candidates(self, i), dtype=int)
+        if not len(cols) or self.capital <= 0:
+            return
+        cols = cols[~self.active[cols]]
+
+        entry_price = self.open[i + 1, cols]
+        with np.errstate(invalid='ignore'):
+            fillable = np.isfinite(entry_price) & (entry_price > 0)
+        cols, entry_price = cols[fillable], entry_price[fillable]
+
+        atr = self.atr_panel[i, cols]
+        with np.errstate(invalid='ignore'):
+            atr = np.where(np.isfinite(atr) & (atr > 0), atr, entry_price * ATR_FALLBACK_PCT)
+
+        levels = self.strategy.entry_levels(self, i, cols, entry_price, atr)
+        valid = levels.get('valid')
+        if valid is not None:
+            cols, entry_price, atr = cols[valid], entry_price[valid], atr[valid]
+            levels = {k: v[valid] for k, v in levels.items() if k != 'valid'}
+        if not len(cols):
+            return
+
+        # Entries fill one after another, each sized off capital left after the
+        # previous entry's costs: capital_k = capital * (1 - size * cost)^k
+        capital_before = self.capital * (1 - self.position_size * self.cost_rate) ** np.arange(len(cols))
+        size = capital_before * self.position_size / entry_price
+        entry_cost = size * entry_price * self.cost_rate
+        self.capital = capital_before[-1] - entry_cost[-1]
+
+        n_new = len(cols)
+        self.active[cols] = True
+        self.entry_seq[cols] = self._next_seq + np.arange(n_new)
+        self._next_seq += n_new
+        self.entry_bar[cols] = i
+        self.entry_price[cols] = entry_price
+        self.direction[cols] = levels.get('direction', 1)
+        self.size[cols] = size
+        self.remaining[cols] = size
+        self.atr[cols] = atr
+        self.stop[cols] = levels.get('stop', np.nan)
+        self.partial_target[cols] = levels.get('partial_target', np.nan)
+        self.target[cols] = levels.get('target', np.nan)
+        self.partial_taken[cols] = False
+        self.peak_gain[cols] = 0
+        self.holding_days[cols] = 0
+        self.pnl[cols] = -entry_cost
+
+    def _record_equity(self, i):
+        cols = np.flatnonzero(self.active)
+        unrealized = np.nansum(
+            self.remaining[cols] * (self.close[i, cols] - self.entry_price[cols]) * self.direction[cols]
+        )
+        self._equity.append((self.dates[i], self.capital, unrealized,
+                             self.capital + unrealized, len(cols)))
+
+    def _close_remaining(self):
+        """Close whatever is still open at each symbol's last available close"""
+        cols = np.flatnonzero(self.active)
+        if not len(cols):
+            return
+        cols = cols[np.argsort(self.entry_seq[cols])]
+        last_close = self.frames['Close'].ffill().to_numpy()[-1, cols]
+        self._close(len(self.dates) - 1, cols, last_close, "End of Test")
+
+    # -------------------------------------------------------------------------
+    # Run
+    # -------------------------------------------------------------------------
+
+    def run(self):
+        """
+        Run the simulation
+
+        Returns:
+            (trades, equity_curve) DataFrames
+        """
+        self.strategy.prepare(self)
+
+        for i in range(self.strategy.start_bar, len(self.dates) - 1):
+            self._process_exits(i)
+            self._process_entries(i)
+            self._record_equity(i)
+
+        self._close_remaining()
+
+        trades = pd.DataFrame(self._trades, columns=[
+            'symbol', 'entry_date', 'entry_price', 'exit_date', 'exit_price', 'direction',
+            'size', 'atr', 'pnl', 'pnl_pct', 'holding_days', 'peak_atr_gain', 'exit_reason'
+        ])
+        equity_curve = pd.DataFrame(self._equity, columns=[
+            'date', 'capital', 'unrealized', 'equity', 'active_positions'
+        ])
+        return trades, equity_curve
+
+# =============================================================================
+# METRICS
+# =============================================================================
+
+def exit_reason_group(reason):
+    """Collapse parameterized reasons ('Trailing SL (5.2 ATR peak)' -> 'Trailing SL')"""
+    return re.sub(r'\s*\(\d[^)]*\)$', '', reason or "Unknown")
+
+def calculate_metrics(trades, equity_curve, initial_capital=INITIAL_CAPITAL):
+    """Trade and risk statistics for a backtest run"""
+    pnl = trades['pnl']
+    wins = trades[pnl > 0]
+    losses = trades[pnl < 0]
+    gross_profit = wins['pnl'].sum()
+    gross_loss = abs(losses['pnl'].sum())
+
+    metrics = {
+        'total_trades': len(trades),
+        'winning_trades': len(wins),
+        'losing_trades': len(losses),
+        'win_rate': len(wins) / len(trades) * 100 if len(trades) else 0,
+        'avg_holding_days': trades['holding_days'].mean() if len(trades) else 0,
+        'total_pnl': pnl.sum(),
+        'gross_profit': gross_profit,
+        'gross_loss': gross_loss,
+        'profit_factor': gross_profit / gross_loss if gross_loss > 0 else float('inf'),
+        'avg_win': wins['pnl'].mean() if len(wins) else 0,
+        'avg_loss': losses['pnl'].mean() if len(losses) else 0,
+        'avg_win_pct': wins['pnl_pct'].mean() if len(wins) else 0,
+        'avg_loss_pct': losses['pnl_pct'].mean() if len(losses) else 0,
+    }
+
+    if len(equity_curve) > 1:
+        equity = equity_curve['equity']
+        final_equity = equity.iloc[-1]
+        daily_returns = equity.pct_change().dropna()
+        drawdown = (equity - equity.cummax()) / equity.cummax()
+        max_dd = abs(drawdown.min()) * 100
+
+        mean_return = daily_returns.mean() * TRADING_DAYS
+        std_return = daily_returns.std() * np.sqrt(TRADING_DAYS)
+        downside = daily_returns[daily_returns < 0]
+        downside_std = downside.std() * np.sqrt(TRADING_DAYS) if len(downside) > 1 else 0
+
+        years = len(equity_curve) / TRADING_DAYS
+        cagr = ((final_equity / initial_capital) ** (1 / years) - 1) * 100 if final_equity > 0 else -100
+
+        metrics.update({
+            'final_equity': final_equity,
+            'total_return': (final_equity / initial_capital - 1) * 100,
+            'cagr': cagr,
+            'max_drawdown': max_dd,
+            'sharpe': mean_return / std_return if std_return > 0 else 0,
+            'sortino': mean_return / downside_std if downside_std > 0 else 0,
+            'calmar': cagr / max_dd if max_dd > 0 else 0,
+        })
+
+    return metrics
+
+def print_results(trades, equity_curve, initial_capital=INITIAL_CAPITAL):
+    """Print backtest results"""
+    if trades.empty:
+        print("\n❌ NO TRADES EXECUTED")
+        return
+
+    m = calculate_metrics(trades, equity_curve, initial_capital)
+
+    print("\n" + "=" * 70)
+    print("📊 BACKTEST RESULTS")
+    print("=" * 70)
+
+    print("\n📈 TRADE STATISTICS")
+    print("-" * 40)
+    print(f"Total Trades: {m['total_trades']}")
+    print(f"Winning Trades: {m['winning_trades']} ({m['win_rate']:.1f}%)")
+    print(f"Losing Trades: {m['losing_trades']}")
+    print(f"Average Holding Days: {m['avg_holding_days']:.1f}")
+
+    print("\n💰 P&L ANALYSIS")
+    print("-" * 40)
+    print(f"Total P&L: ${m['total_pnl']:,.0f}")
+    print(f"Gross Profit: ${m['gross_profit']:,.0f}")
+    print(f"Gross Loss: ${m['gross_loss']:,.0f}")
+    print(f"Profit Factor: {m['profit_factor']:.2f}")
+    print(f"Avg Win: ${m['avg_win']:,.0f} ({m['avg_win_pct']:.1f}%)")
+    print(f"Avg Loss: ${m['avg_loss']:,.0f} ({m['avg_loss_pct']:.1f}%)")
+
+    best = trades.loc[trades['pnl'].idxmax()]
+    worst = trades.loc[trades['pnl'].idxmin()]
+    print(f"\n🏆 Best Trade: {best['symbol']} +${best['pnl']:,.0f} ({best['pnl_pct']:.1f}%)")
+    print(f"💀 Worst Trade: {worst['symbol']} ${worst['pnl']:,.0f} ({worst['pnl_pct']:.1f}%)")
+
+    if 'final_equity' in m:
+        print("\n📊 RISK METRICS")
+        print("-" * 40)
+        print(f"Initial Capital: ${initial_capital:,.0f}")
+        print(f"Final Equity: ${m['final_equity']:,.0f}")
+        print(f"Total Return: {m['total_return']:.2f}%")
+        print(f"CAGR: {m['cagr']:.2f}%")
+        print(f"Max Drawdown: {m['max_drawdown']:.2f}%")
+        print(f"Sharpe Ratio: {m['sharpe']:.2f}")
+        print(f"Sortino Ratio: {m['sortino']:.2f}")
+        print(f"Calmar Ratio: {m['calmar']:.2f}")
+
+    print("\n🚪 EXIT REASONS")
+    print("-" * 40)
+    by_reason = trades.groupby(trades['exit_reason'].map(exit_reason_group))['pnl'].agg(['count', 'mean'])
+    for reason, row in by_reason.sort_values('count', ascending=False).iterrows():
+        pct = row['count'] / len(trades) * 100
+        print(f"{reason}: {row['count']:.0f} ({pct:.1f}%) avg ${row['mean']:,.0f}")
+
+def save_results(trades, equity_curve, trades_path, equity_path=None):
+    """Save trades (and optionally the equity curve) to CSV"""
+    if trades.empty:
+        return
+
+    results = pd.DataFrame({
+        'Symbol': trades['symbol'],
+        'Entry Date': trades['entry_date'],
+        'Entry Price': trades['entry_price'].round(3),
+        'Direction': np.where(trades['direction'] > 0, 'Long', 'Short'),
+        'Exit Date': trades['exit_date'],
+        'Exit Price': trades['exit_price'].round(3),
+        'ATR': trades['atr'].round(3),
+        'Size': trades['size'].round(0),
+        'P&L': trades['pnl'].round(0),
+        'P&L %': trades['pnl_pct'].round(2),
+        'Holding Days': trades['holding_days'],
+        'Peak ATR Gain': trades['peak_atr_gain'].round(2),
+        'Exit Reason': trades['exit_reason']
+    })
+    results.to_csv(trades_path, index=False)
+    print(f"\n📁 Trade results saved to: {trades_path}")
+
+    if equity_path and not equity_curve.empty:
+        equity_curve.to_csv(equity_path, index=False)
+        print(f"📁 Equity curve saved to: {equity_path}")
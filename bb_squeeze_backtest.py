@@ -4,10 +4,14 @@ BB Squeeze Backtest - Option 3: ETF Proxy + High Volume Stocks
 Metrics: Win Rate, Profit Factor, Sharpe, Sortino, Calmar, Max Drawdown
 """
 
+import os
+import itertools
+import tempfile
 import yfinance as yf
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from squeeze_indicators import bollinger_bands, relative_strength_index, true_range, rolling_mean
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -45,51 +49,83 @@ TAKE_PROFIT_1_R_MULT = 1.5  # First TP: 50% position
 TAKE_PROFIT_2_R_MULT = 2.5  # Second TP: remaining 50%
 MAX_HOLDING_DAYS = 10  # 10 days time stop
 
+# Parameters a sweep can vary (defaults are the constants above)
+DEFAULT_PARAMS = {
+    'bb_period': BB_PERIOD,
+    'bb_std': BB_STD,
+    'rsi_period': RSI_PERIOD,
+    'squeeze_threshold': SQUEEZE_THRESHOLD,
+    'stop_loss_atr_mult': STOP_LOSS_ATR_MULT,
+    'take_profit_1_r_mult': TAKE_PROFIT_1_R_MULT,
+    'take_profit_2_r_mult': TAKE_PROFIT_2_R_MULT,
+    'max_holding_days': MAX_HOLDING_DAYS,
+}
+
+# Default grid for --sweep (override with --grid params.json)
+SWEEP_GRID = {
+    'squeeze_threshold': [0.02, 0.03, 0.04, 0.05],
+    'bb_std': [1.5, 2.0, 2.5],
+    'stop_loss_atr_mult': [1.5, 2.0, 2.5],
+    'take_profit_2_r_mult': [2.0, 2.5, 3.0],
+}
+SWEEP_RESULTS_PATH = '/root/clawd/bb_squeeze_sweep_results.csv'
+
+# Committed daily results that --check compares a fresh run against
+REFERENCE_RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                      'bb_squeeze_backtest_results.csv')
+
 # =============================================================================
 # INDICATOR CALCULATIONS
 # =============================================================================
 
-def calculate_indicators(df):
+def resolve_params(params=None):
+    """Fill a partial parameter dict with DEFAULT_PARAMS"""
+    params = params or {}
+    unknown = set(params) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+    return {**DEFAULT_PARAMS, **params}
+
+def add_bollinger_columns(df, period, num_std):
+    """SMA / STD / BB_Upper / BB_Lower / BB_Width / BB_Position columns"""
+    bb = bollinger_bands(df['Close'], period, num_std)
+    df['SMA'] = bb['mid']
+    df['STD'] = bb['std']
+    df['BB_Upper'] = bb['upper']
+    df['BB_Lower'] = bb['lower']
+    df['BB_Width'] = bb['width']
+    df['BB_Position'] = bb['position']
+    return df
+
+def calculate_indicators(df, params=None):
     """Calculate BB, RSI, ATR, EMA200"""
+    p = resolve_params(params)
+    bb_period = int(p['bb_period'])
+    
     # Bollinger Bands
-    df['SMA'] = df['Close'].rolling(BB_PERIOD).mean()
-    df['STD'] = df['Close'].rolling(BB_PERIOD).std()
-    df['BB_Upper'] = df['SMA'] + (BB_STD * df['STD'])
-    df['BB_Lower'] = df['SMA'] - (BB_STD * df['STD'])
-    df['BB_Width'] = (df['BB_Upper'] - df['BB_Lower']) / df['SMA']
-    df['BB_Position'] = (df['Close'] - df['BB_Lower']) / (df['BB_Upper'] - df['BB_Lower'])
+    add_bollinger_columns(df, bb_period, p['bb_std'])
     
     # EMA 200 for trend filter
     df['EMA200'] = df['Close'].ewm(span=200, adjust=False).mean()
     df['Above_EMA200'] = df['Close'] > df['EMA200']
     
     # RSI
-    delta = df['Close'].diff()
-    gain = delta.where(delta > 0, 0).rolling(RSI_PERIOD).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(RSI_PERIOD).mean()
-    rs = gain / loss
-    df['RSI'] = 100 - (100 / (1 + rs))
+    df['RSI'] = relative_strength_index(df['Close'], int(p['rsi_period']))
     
     # ATR for stop loss
-    df['TR'] = np.maximum(
-        df['High'] - df['Low'],
-        np.maximum(
-            abs(df['High'] - df['Close'].shift(1)),
-            abs(df['Low'] - df['Close'].shift(1))
-        )
-    )
-    df['ATR'] = df['TR'].rolling(14).mean()
+    df['TR'] = true_range(df['High'], df['Low'], df['Close'])
+    df['ATR'] = rolling_mean(df['TR'], 14)
     
     # Volume MA
     df['Vol_MA'] = df['Volume'].rolling(20).mean()
     
     return df
 
-def detect_squeeze(row):
+def detect_squeeze(row, threshold=SQUEEZE_THRESHOLD):
     """Detect BB squeeze condition"""
-    return row['BB_Width'] < SQUEEZE_THRESHOLD
+    return row['BB_Width'] < threshold
 
-def get_signal(df, i, min_bars=200):
+def get_signal(df, i, min_bars=200, squeeze_threshold=SQUEEZE_THRESHOLD):
     """
     FADE THE BREAKOUT strategy
     Short breakouts above upper band, Long breakouts below lower band
@@ -102,7 +138,7 @@ def get_signal(df, i, min_bars=200):
     prev = df.iloc[i-1]
     
     # Check if previous bar was in squeeze
-    if not detect_squeeze(prev):
+    if not detect_squeeze(prev, squeeze_threshold):
         return 0
     
     # FADE UPWARD BREAKOUT: Price breaks above upper band -> SHORT
@@ -117,6 +153,26 @@ def get_signal(df, i, min_bars=200):
     
     return 0
 
+def squeeze_signals(df, squeeze_threshold=SQUEEZE_THRESHOLD):
+    """
+    get_signal() for every bar at once (squeeze on the previous bar, then a
+    close outside the previous bar's band)
+    Returns: int8 array of 1 (Long), -1 (Short), 0 (No signal)
+    """
+    width = df['BB_Width'].to_numpy()
+    upper = df['BB_Upper'].to_numpy()
+    lower = df['BB_Lower'].to_numpy()
+    close = df['Close'].to_numpy()
+    
+    signals = np.zeros(len(df), dtype=np.int8)
+    prev_squeeze = width[:-1] < squeeze_threshold
+    fade_up = prev_squeeze & (close[1:] > upper[:-1])
+    fade_down = prev_squeeze & ~fade_up & (close[1:] < lower[:-1])
+    signals[1:][fade_up] = -1
+    signals[1:][fade_down] = 1
+    signals[:30] = 0
+    return signals
+
 # =============================================================================
 # BACKTEST ENGINE
 # =============================================================================
@@ -140,30 +196,55 @@ class Trade:
         self.holding_days = 0
         self.exit_reason = None
 
-def backtest_symbol(symbol, name, start_date='2021-01-01', end_date='2025-12-31'):
-    """Backtest single symbol with partial TP (1.5R + 2R)"""
-    
-    # Download data
+def download_daily(symbol, start_date='2021-01-01', end_date='2025-12-31'):
+    """Download daily bars for a symbol, or None if there isn't enough data"""
     try:
         ticker = yf.Ticker(symbol)
         df = ticker.history(start=start_date, end=end_date, interval='1d')
         if len(df) < 100:
             print(f"  ⚠️ {symbol}: Insufficient data ({len(df)} rows)")
-            return []
+            return None
     except Exception as e:
         print(f"  ❌ {symbol}: {e}")
-        return []
+        return None
+    return df
+
+def backtest_symbol(symbol, name, start_date='2021-01-01', end_date='2025-12-31',
+                    params=None, df=None):
+    """
+    Backtest single symbol with partial TP (1.5R + 2R)
     
-    df = calculate_indicators(df)
+    Args:
+        params: overrides for DEFAULT_PARAMS (e.g. from a sweep)
+        df: daily OHLCV bars; downloaded when not given
+    """
+    p = resolve_params(params)
+    
+    if df is None:
+        df = download_daily(symbol, start_date, end_date)
+        if df is None:
+            return []
+    
+    df = calculate_indicators(df, p)
     df = df.dropna()
     
     trades = []
     position = None
     partial_pnl = 0  # Track partial profit from TP1
     
-    for i in range(BB_PERIOD + 5, len(df)):
-        curr = df.iloc[i]
-        date = df.index[i]
+    # Plain arrays instead of per-bar df.iloc rows
+    dates = df.index
+    highs = df['High'].tolist()
+    lows = df['Low'].tolist()
+    closes = df['Close'].tolist()
+    atrs = df['ATR'].tolist()
+    signals = squeeze_signals(df, p['squeeze_threshold']).tolist()
+    
+    for i in range(int(p['bb_period']) + 5, len(df)):
+        if position is None and signals[i] != 1:
+            continue  # Long only
+        
+        date = dates[i]
         
         # Check exit conditions if in position
         if position:
@@ -171,7 +252,7 @@ def backtest_symbol(symbol, name, start_date='2021-01-01', end_date='2025-12-31'
             
             # Check TP1 first (1.5R) - take 50% off
             if not position.tp1_hit:
-                if position.direction == 1 and curr['High'] >= position.take_profit_1:
+                if position.direction == 1 and highs[i] >= position.take_profit_1:
                     # Partial exit at TP1
                     partial_size = position.size // 2
                     partial_pnl = (position.take_profit_1 - position.entry_price) * position.direction * partial_size
@@ -180,7 +261,7 @@ def backtest_symbol(symbol, name, start_date='2021-01-01', end_date='2025-12-31'
                     position.tp1_hit = True
                     # Move stop to breakeven
                     position.stop_loss = position.entry_price
-                elif position.direction == -1 and curr['Low'] <= position.take_profit_1:
+                elif position.direction == -1 and lows[i] <= position.take_profit_1:
                     partial_size = position.size // 2
                     partial_pnl = (position.entry_price - position.take_profit_1) * partial_size
                     partial_pnl -= position.entry_price * partial_size * (COMMISSION + STAMP_DUTY + SLIPPAGE) * 2
@@ -189,28 +270,28 @@ def backtest_symbol(symbol, name, start_date='2021-01-01', end_date='2025-12-31'
                     position.stop_loss = position.entry_price
             
             # Stop Loss
-            if position.direction == 1 and curr['Low'] <= position.stop_loss:
+            if position.direction == 1 and lows[i] <= position.stop_loss:
                 position.exit_price = position.stop_loss
                 position.exit_date = date
                 position.exit_reason = 'Stop Loss' if not position.tp1_hit else 'TP1+BE Stop'
-            elif position.direction == -1 and curr['High'] >= position.stop_loss:
+            elif position.direction == -1 and highs[i] >= position.stop_loss:
                 position.exit_price = position.stop_loss
                 position.exit_date = date
                 position.exit_reason = 'Stop Loss' if not position.tp1_hit else 'TP1+BE Stop'
             
             # Take Profit 2 (2R) - exit remaining
-            elif position.direction == 1 and curr['High'] >= position.take_profit_2:
+            elif position.direction == 1 and highs[i] >= position.take_profit_2:
                 position.exit_price = position.take_profit_2
                 position.exit_date = date
                 position.exit_reason = 'Take Profit 2R'
-            elif position.direction == -1 and curr['Low'] <= position.take_profit_2:
+            elif position.direction == -1 and lows[i] <= position.take_profit_2:
                 position.exit_price = position.take_profit_2
                 position.exit_date = date
                 position.exit_reason = 'Take Profit 2R'
             
             # Time-based exit
-            elif position.holding_days >= MAX_HOLDING_DAYS:
-                position.exit_price = curr['Close']
+            elif position.holding_days >= p['max_holding_days']:
+                position.exit_price = closes[i]
                 position.exit_date = date
                 position.exit_reason = 'Time Exit'
             
@@ -228,21 +309,21 @@ def backtest_symbol(symbol, name, start_date='2021-01-01', end_date='2025-12-31'
         
         # Check entry signal if no position
         if position is None:
-            signal = get_signal(df, i, min_bars=50)
+            signal = signals[i]
             
             if signal == 1:  # Long only
-                entry_price = curr['Close']
-                atr = curr['ATR']
-                risk = STOP_LOSS_ATR_MULT * atr
+                entry_price = closes[i]
+                atr = atrs[i]
+                risk = p['stop_loss_atr_mult'] * atr
                 
                 if signal == 1:  # Long
                     stop_loss = entry_price - risk
-                    take_profit_1 = entry_price + (TAKE_PROFIT_1_R_MULT * risk)
-                    take_profit_2 = entry_price + (TAKE_PROFIT_2_R_MULT * risk)
+                    take_profit_1 = entry_price + (p['take_profit_1_r_mult'] * risk)
+                    take_profit_2 = entry_price + (p['take_profit_2_r_mult'] * risk)
                 else:  # Short
                     stop_loss = entry_price + risk
-                    take_profit_1 = entry_price - (TAKE_PROFIT_1_R_MULT * risk)
-                    take_profit_2 = entry_price - (TAKE_PROFIT_2_R_MULT * risk)
+                    take_profit_1 = entry_price - (p['take_profit_1_r_mult'] * risk)
+                    take_profit_2 = entry_price - (p['take_profit_2_r_mult'] * risk)
                 
                 size = int((INITIAL_CAPITAL * POSITION_SIZE) / entry_price)
                 
@@ -282,7 +363,6 @@ def calculate_metrics(trades, initial_capital=INITIAL_CAPITAL):
     
     # Basic stats
     pnls = [t.pnl for t in trades]
-    pnl_pcts = [t.pnl_pct for t in trades]
     
     winners = [p for p in pnls if p > 0]
     losers = [p for p in pnls if p < 0]
@@ -361,6 +441,24 @@ def calculate_metrics(trades, initial_capital=INITIAL_CAPITAL):
         'avg_holding_days': avg_holding,
     }
 
+TRADE_COLUMNS = ['symbol', 'entry_date', 'exit_date', 'direction', 'entry_price',
+                 'exit_price', 'pnl', 'pnl_pct', 'holding_days', 'exit_reason']
+
+def trades_to_frame(trades):
+    """Trades as the results CSV rows"""
+    return pd.DataFrame([{
+        'symbol': t.symbol,
+        'entry_date': t.entry_date,
+        'exit_date': t.exit_date,
+        'direction': 'Long' if t.direction == 1 else 'Short',
+        'entry_price': t.entry_price,
+        'exit_price': t.exit_price,
+        'pnl': t.pnl,
+        'pnl_pct': t.pnl_pct,
+        'holding_days': t.holding_days,
+        'exit_reason': t.exit_reason
+    } for t in trades], columns=TRADE_COLUMNS)
+
 def print_report(metrics, trades):
     """Print formatted backtest report"""
     
@@ -368,7 +466,7 @@ def print_report(metrics, trades):
     print("📊 BB SQUEEZE BACKTEST REPORT")
     print("=" * 70)
     
-    print(f"\n📈 TRADE STATISTICS")
+    print("\n📈 TRADE STATISTICS")
     print("-" * 40)
     print(f"Total Trades:     {metrics['total_trades']}")
     print(f"Winning Trades:   {metrics['winning_trades']}")
@@ -376,7 +474,7 @@ def print_report(metrics, trades):
     print(f"Win Rate:         {metrics['win_rate']:.1f}%")
     print(f"Avg Holding Days: {metrics['avg_holding_days']:.1f}")
     
-    print(f"\n💰 PROFIT/LOSS")
+    print("\n💰 PROFIT/LOSS")
     print("-" * 40)
     print(f"Total PnL:        HK${metrics['total_pnl']:,.0f}")
     print(f"Total Return:     {metrics['total_return_pct']:.2f}%")
@@ -385,7 +483,7 @@ def print_report(metrics, trades):
     print(f"Profit Factor:    {metrics['profit_factor']:.2f}")
     print(f"Expectancy:       HK${metrics['expectancy']:,.0f}")
     
-    print(f"\n📉 RISK METRICS")
+    print("\n📉 RISK METRICS")
     print("-" * 40)
     print(f"Max Drawdown:     {metrics['max_drawdown']:.2f}%")
     print(f"Sharpe Ratio:     {metrics['sharpe_ratio']:.2f}")
@@ -400,7 +498,7 @@ def print_report(metrics, trades):
         reason = t.exit_reason
         exit_reasons[reason] = exit_reasons.get(reason, 0) + 1
     
-    print(f"\n🚪 EXIT REASONS")
+    print("\n🚪 EXIT REASONS")
     print("-" * 40)
     for reason, count in sorted(exit_reasons.items(), key=lambda x: -x[1]):
         print(f"{reason:20} {count:4} ({count/len(trades)*100:.1f}%)")
@@ -412,50 +510,41 @@ def print_report(metrics, trades):
 def calculate_indicators_hourly(df):
     """Calculate BB, RSI, ATR with EMA50 for hourly"""
     # Bollinger Bands
-    df['SMA'] = df['Close'].rolling(BB_PERIOD).mean()
-    df['STD'] = df['Close'].rolling(BB_PERIOD).std()
-    df['BB_Upper'] = df['SMA'] + (BB_STD * df['STD'])
-    df['BB_Lower'] = df['SMA'] - (BB_STD * df['STD'])
-    df['BB_Width'] = (df['BB_Upper'] - df['BB_Lower']) / df['SMA']
-    df['BB_Position'] = (df['Close'] - df['BB_Lower']) / (df['BB_Upper'] - df['BB_Lower'])
+    add_bollinger_columns(df, BB_PERIOD, BB_STD)
     
     # EMA50 for hourly trend filter (50 hours ≈ 7 trading days)
     df['EMA200'] = df['Close'].ewm(span=50, adjust=False).mean()
     df['Above_EMA200'] = df['Close'] > df['EMA200']
     
     # RSI
-    delta = df['Close'].diff()
-    gain = delta.where(delta > 0, 0).rolling(RSI_PERIOD).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(RSI_PERIOD).mean()
-    rs = gain / loss
-    df['RSI'] = 100 - (100 / (1 + rs))
+    df['RSI'] = relative_strength_index(df['Close'], RSI_PERIOD)
     
     # ATR
-    df['TR'] = np.maximum(
-        df['High'] - df['Low'],
-        np.maximum(
-            abs(df['High'] - df['Close'].shift(1)),
-            abs(df['Low'] - df['Close'].shift(1))
-        )
-    )
-    df['ATR'] = df['TR'].rolling(14).mean()
+    df['TR'] = true_range(df['High'], df['Low'], df['Close'])
+    df['ATR'] = rolling_mean(df['TR'], 14)
     
     # Volume MA
     df['Vol_MA'] = df['Volume'].rolling(20).mean()
     
     return df
 
-def backtest_symbol_hourly(symbol, name, start_date='2024-01-01', end_date='2025-12-31'):
-    """Backtest single symbol on 1H timeframe with EMA50"""
+def backtest_symbol_hourly(symbol, name, start_date='2024-01-01', end_date='2025-12-31', df=None):
+    """
+    Backtest single symbol on 1H timeframe with EMA50
     
-    # Download hourly data (yfinance limits to ~2 years)
-    try:
-        ticker = yf.Ticker(symbol)
-        df = ticker.history(start=start_date, end=end_date, interval='1h')
-        if len(df) < 100:
+    Args:
+        df: hourly OHLCV bars; downloaded when not given
+    """
+    
+    if df is None:
+        # Download hourly data (yfinance limits to ~2 years)
+        try:
+            ticker = yf.Ticker(symbol)
+            df = ticker.history(start=start_date, end=end_date, interval='1h')
+            if len(df) < 100:
+                return []
+        except Exception as e:
             return []
-    except Exception as e:
-        return []
     
     df = calculate_indicators_hourly(df)
     df = df.dropna()
@@ -467,16 +556,26 @@ def backtest_symbol_hourly(symbol, name, start_date='2024-01-01', end_date='2025
     # Adjust max holding for hourly (in hours, ~5 trading days = 35 hours)
     max_holding_hours = 35
     
+    # Plain arrays instead of per-bar df.iloc rows
+    dates = df.index
+    highs = df['High'].tolist()
+    lows = df['Low'].tolist()
+    closes = df['Close'].tolist()
+    atrs = df['ATR'].tolist()
+    signals = squeeze_signals(df).tolist()
+    
     for i in range(50 + 5, len(df)):
-        curr = df.iloc[i]
-        date = df.index[i]
+        if position is None and signals[i] == 0:
+            continue
+        
+        date = dates[i]
         
         if position:
             position.holding_days += 1
             
             # Check TP1 first (1.5R)
             if not position.tp1_hit:
-                if position.direction == 1 and curr['High'] >= position.take_profit_1:
+                if position.direction == 1 and highs[i] >= position.take_profit_1:
                     partial_size = position.size // 2
                     partial_pnl = (position.take_profit_1 - position.entry_price) * position.direction * partial_size
                     partial_pnl -= position.entry_price * partial_size * (COMMISSION + STAMP_DUTY + SLIPPAGE) * 2
@@ -485,20 +584,20 @@ def backtest_symbol_hourly(symbol, name, start_date='2024-01-01', end_date='2025
                     position.stop_loss = position.entry_price
             
             # Stop Loss
-            if position.direction == 1 and curr['Low'] <= position.stop_loss:
+            if position.direction == 1 and lows[i] <= position.stop_loss:
                 position.exit_price = position.stop_loss
                 position.exit_date = date
                 position.exit_reason = 'Stop Loss' if not position.tp1_hit else 'TP1+BE Stop'
             
             # Take Profit 2
-            elif position.direction == 1 and curr['High'] >= position.take_profit_2:
+            elif position.direction == 1 and highs[i] >= position.take_profit_2:
                 position.exit_price = position.take_profit_2
                 position.exit_date = date
                 position.exit_reason = 'Take Profit 2R'
             
             # Time exit
             elif position.holding_days >= max_holding_hours:
-                position.exit_price = curr['Close']
+                position.exit_price = closes[i]
                 position.exit_date = date
                 position.exit_reason = 'Time Exit'
             
@@ -512,22 +611,22 @@ def backtest_symbol_hourly(symbol, name, start_date='2024-01-01', end_date='2025
                 partial_pnl = 0
         
         if position is None:
-            signal = get_signal(df, i, min_bars=30)
+            signal = signals[i]
             
             if signal != 0:
-                entry_price = curr['Close']
-                atr = curr['ATR']
+                entry_price = closes[i]
+                atr = atrs[i]
                 
                 # FADE BREAKOUT: SL at breakout day high/low +/- 2 ATR
                 if signal == 1:  # Long (fading downward breakout)
                     # Stop below the low of breakout day
-                    stop_loss = curr['Low'] - (STOP_LOSS_ATR_MULT * atr)
+                    stop_loss = lows[i] - (STOP_LOSS_ATR_MULT * atr)
                     risk = entry_price - stop_loss
                     take_profit_1 = entry_price + (TAKE_PROFIT_1_R_MULT * risk)
                     take_profit_2 = entry_price + (TAKE_PROFIT_2_R_MULT * risk)
                 else:  # Short (fading upward breakout)
                     # Stop above the high of breakout day
-                    stop_loss = curr['High'] + (STOP_LOSS_ATR_MULT * atr)
+                    stop_loss = highs[i] + (STOP_LOSS_ATR_MULT * atr)
                     risk = stop_loss - entry_price
                     take_profit_1 = entry_price - (TAKE_PROFIT_1_R_MULT * risk)
                     take_profit_2 = entry_price - (TAKE_PROFIT_2_R_MULT * risk)
@@ -557,6 +656,133 @@ def backtest_symbol_hourly(symbol, name, start_date='2024-01-01', end_date='2025
     
     return trades
 
+# =============================================================================
+# PARAMETER SWEEP
+# =============================================================================
+
+BAR_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+def expand_grid(grid):
+    """All parameter combinations of a {param: [values]} grid"""
+    resolve_params({k: None for k in grid})  # reject unknown names early
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+def pack_bars(bars, directory):
+    """
+    Write bars for all symbols into one (symbol, bar, field) array on disk so
+    worker processes can memory-map it instead of each receiving a copy
+    
+    Returns:
+        (symbols, lengths, tz) needed to rebuild each symbol's frame
+    """
+    symbols = list(bars)
+    lengths = [len(bars[s]) for s in symbols]
+    max_len = max(lengths)
+    tz = str(bars[symbols[0]].index.tz) if bars[symbols[0]].index.tz is not None else None
+    
+    values = np.full((len(symbols), max_len, len(BAR_FIELDS)), np.nan)
+    dates = np.zeros((len(symbols), max_len), dtype=np.int64)
+    for k, symbol in enumerate(symbols):
+        df = bars[symbol]
+        values[k, :len(df)] = df[BAR_FIELDS].to_numpy(dtype=float)
+        dates[k, :len(df)] = df.index.as_unit('ns').asi8  # pandas 3 / yfinance indexes may be in 'us'
+    
+    np.save(os.path.join(directory, 'bars.npy'), values)
+    np.save(os.path.join(directory, 'dates.npy'), dates)
+    return symbols, lengths, tz
+
+# Per-process state for sweep workers (set by _init_sweep_worker)
+_sweep_bars = {}
+
+def _init_sweep_worker(directory, symbols, lengths, tz):
+    warnings.filterwarnings('ignore')
+    _sweep_bars['values'] = np.load(os.path.join(directory, 'bars.npy'), mmap_mode='r')
+    _sweep_bars['dates'] = np.load(os.path.join(directory, 'dates.npy'), mmap_mode='r')
+    _sweep_bars['symbols'] = symbols
+    _sweep_bars['lengths'] = lengths
+    _sweep_bars['tz'] = tz
+
+def _sweep_job(job):
+    """Backtest one (symbol, parameter set) pair from the shared bars"""
+    k, combo, params = job
+    n = _sweep_bars['lengths'][k]
+    index = pd.to_datetime(np.asarray(_sweep_bars['dates'][k, :n]), unit='ns', utc=_sweep_bars['tz'] is not None)
+    if _sweep_bars['tz'] is not None:
+        index = index.tz_convert(_sweep_bars['tz'])
+    df = pd.DataFrame(np.array(_sweep_bars['values'][k, :n]), index=index, columns=BAR_FIELDS)
+    
+    symbol = _sweep_bars['symbols'][k]
+    return combo, k, backtest_symbol(symbol, symbol, params=params, df=df)
+
+def run_sweep(grid=SWEEP_GRID, universe=None, start_date='2021-01-01', end_date='2025-12-31',
+              workers=None, output_path=SWEEP_RESULTS_PATH):
+    """
+    Grid-search strategy parameters over the universe
+    
+    Bars are downloaded once and shared with a process pool through a
+    memory-mapped array; every (symbol, parameter set) pair is one job.
+    
+    Returns:
+        DataFrame with one row per parameter set, ranked by Sharpe then profit factor
+    """
+    universe = TEST_UNIVERSE if universe is None else universe
+    combos = expand_grid(grid)
+    
+    print("=" * 70)
+    print("🔧 BB SQUEEZE PARAMETER SWEEP")
+    print("=" * 70)
+    print(f"Universe: {len(universe)} stocks, {len(combos)} parameter sets")
+    for key, values in grid.items():
+        print(f"  {key}: {values}")
+    
+    print("\n📥 Downloading bars...")
+    bars = {}
+    for symbol in universe:
+        df = download_daily(symbol, start_date, end_date)
+        if df is not None:
+            bars[symbol] = df
+    if not bars:
+        print("❌ No data downloaded")
+        return None
+    
+    results = [dict() for _ in combos]
+    with tempfile.TemporaryDirectory(prefix='bb_sweep_') as directory:
+        symbols, lengths, tz = pack_bars(bars, directory)
+        del bars
+        
+        jobs = [(k, c, params) for c, params in enumerate(combos) for k in range(len(symbols))]
+        workers = workers or os.cpu_count()
+        print(f"\n⚙️  Running {len(jobs)} jobs on {workers} workers...")
+        
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_sweep_worker,
+                                 initargs=(directory, symbols, lengths, tz)) as executor:
+            chunksize = max(1, len(jobs) // (workers * 8))
+            for c, k, trades in executor.map(_sweep_job, jobs, chunksize=chunksize):
+                results[c][k] = trades
+    
+    rows = []
+    for c, params in enumerate(combos):
+        # Same trade order as a single run: symbol by symbol
+        trades = [t for k in sorted(results[c]) for t in results[c][k]]
+        metrics = calculate_metrics(trades) or {'total_trades': 0}
+        rows.append({**resolve_params(params), **metrics})
+    
+    table = pd.DataFrame(rows).sort_values(
+        ['sharpe_ratio', 'profit_factor'], ascending=False, na_position='last'
+    ).reset_index(drop=True)
+    table.insert(0, 'rank', range(1, len(table) + 1))
+    
+    print("\n🏆 TOP 10 PARAMETER SETS")
+    print("-" * 70)
+    columns = ['rank'] + list(grid) + ['total_trades', 'win_rate', 'profit_factor', 'sharpe_ratio', 'max_drawdown']
+    print(table[columns].head(10).to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+    
+    table.to_csv(output_path, index=False)
+    print(f"\n📁 Sweep results saved to: {output_path}")
+    
+    return table
+
 def main():
     print("=" * 70)
     print("🔍 BB SQUEEZE BACKTEST - HK STOCKS (DAILY ONLY)")
@@ -585,23 +811,33 @@ def main():
         metrics = calculate_metrics(all_trades)
         print_report(metrics, all_trades)
         
-        results_df = pd.DataFrame([{
-            'symbol': t.symbol,
-            'entry_date': t.entry_date,
-            'exit_date': t.exit_date,
-            'direction': 'Long' if t.direction == 1 else 'Short',
-            'entry_price': t.entry_price,
-            'exit_price': t.exit_price,
-            'pnl': t.pnl,
-            'pnl_pct': t.pnl_pct,
-            'holding_days': t.holding_days,
-            'exit_reason': t.exit_reason
-        } for t in all_trades])
-        
+        results_df = trades_to_frame(all_trades)
         results_df.to_csv('/root/clawd/bb_squeeze_backtest_results.csv', index=False)
-        print(f"\n📁 Results saved to: /root/clawd/bb_squeeze_backtest_results.csv")
+        print("\n📁 Results saved to: /root/clawd/bb_squeeze_backtest_results.csv")
     
     return all_trades, metrics if all_trades else None
 
 if __name__ == "__main__":
-    trades, metrics = main()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='BB Squeeze backtest')
+    parser.add_argument('--sweep', action='store_true', help='Grid-search parameters instead of a single run')
+    parser.add_argument('--grid', help='JSON file of {param: [values]} for --sweep (default: SWEEP_GRID)')
+    parser.add_argument('--workers', type=int, help='Worker processes for --sweep (default: CPU count)')
+    parser.add_argument('--output', default=SWEEP_RESULTS_PATH, help='Sweep results CSV')
+    parser.add_argument('--check', nargs='?', const=REFERENCE_RESULTS_PATH, metavar='CSV',
+                        help='Re-run the symbols in a saved results CSV and compare trades '
+                             '(offline check: python bb_squeeze_check.py)')
+    args = parser.parse_args()
+    
+    if args.check:
+        from bb_squeeze_check import check_against_reference
+        raise SystemExit(0 if check_against_reference(args.check) else 1)
+    elif args.sweep:
+        grid = SWEEP_GRID
+        if args.grid:
+            with open(args.grid) as f:
+                grid = json.load(f)
+        run_sweep(grid, workers=args.workers, output_path=args.output)
+    else:
+        trades, metrics = main()
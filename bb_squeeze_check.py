@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+BB Squeeze Backtest - Regression Check
+Checks the array-based backtest_symbol / backtest_symbol_hourly in
+bb_squeeze_backtest.py against the original row-by-row engine.
+
+Usage:
+    python bb_squeeze_check.py              # offline: original loops vs current engine on synthetic bars
+    python bb_squeeze_check.py --csv [CSV]  # re-run the symbols in bb_squeeze_backtest_results.csv
+                                            # (same as bb_squeeze_backtest.py --check; needs yfinance)
+
+The ORIGINAL ENGINE section is the pre-rewrite code (df.iloc rows plus
+get_signal per bar, with its own indicator math) copied unchanged except
+that bars are passed in instead of downloaded.
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+
+from bb_squeeze_backtest import (
+    BB_PERIOD, BB_STD, RSI_PERIOD, SQUEEZE_THRESHOLD,
+    INITIAL_CAPITAL, POSITION_SIZE, COMMISSION, STAMP_DUTY, SLIPPAGE,
+    STOP_LOSS_ATR_MULT, TAKE_PROFIT_1_R_MULT, TAKE_PROFIT_2_R_MULT, MAX_HOLDING_DAYS,
+    REFERENCE_RESULTS_PATH, TRADE_COLUMNS, Trade,
+    backtest_symbol, backtest_symbol_hourly, trades_to_frame
+)
+
+# =============================================================================
+# ORIGINAL ENGINE
+# =============================================================================
+
+def original_indicators(df):
+    """Calculate BB, RSI, ATR, EMA200"""
+    # Bollinger Bands
+    df['SMA'] = df['Close'].rolling(BB_PERIOD).mean()
+    df['STD'] = df['Close'].rolling(BB_PERIOD).std()
+    df['BB_Upper'] = df['SMA'] + (BB_STD * df['STD'])
+    df['BB_Lower'] = df['SMA'] - (BB_STD * df['STD'])
+    df['BB_Width'] = (df['BB_Upper'] - df['BB_Lower']) / df['SMA']
+    df['BB_Position'] = (df['Close'] - df['BB_Lower']) / (df['BB_Upper'] - df['BB_Lower'])
+    
+    # EMA 200 for trend filter
+    df['EMA200'] = df['Close'].ewm(span=200, adjust=False).mean()
+    df['Above_EMA200'] = df['Close'] > df['EMA200']
+    
+    # RSI
+    delta = df['Close'].diff()
+    gain = delta.where(delta > 0, 0).rolling(RSI_PERIOD).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(RSI_PERIOD).mean()
+    rs = gain / loss
+    df['RSI'] = 100 - (100 / (1 + rs))
+    
+    # ATR for stop loss
+    df['TR'] = np.maximum(
+        df['High'] - df['Low'],
+        np.maximum(
+            abs(df['High'] - df['Close'].shift(1)),
+            abs(df['Low'] - df['Close'].shift(1))
+        )
+    )
+    df['ATR'] = df['TR'].rolling(14).mean()
+    
+    # Volume MA
+    df['Vol_MA'] = df['Volume'].rolling(20).mean()
+    
+    return df
+
+def original_detect_squeeze(row):
+    """Detect BB squeeze condition"""
+    return row['BB_Width'] < SQUEEZE_THRESHOLD
+
+def original_get_signal(df, i, min_bars=200):
+    """
+    FADE THE BREAKOUT strategy
+    Short breakouts above upper band, Long breakouts below lower band
+    Returns: 1 (Long), -1 (Short), 0 (No signal)
+    """
+    if i < 30:
+        return 0
+    
+    curr = df.iloc[i]
+    prev = df.iloc[i-1]
+    
+    # Check if previous bar was in squeeze
+    if not original_detect_squeeze(prev):
+        return 0
+    
+    # FADE UPWARD BREAKOUT: Price breaks above upper band -> SHORT
+    # Expect failed breakout and reversion down
+    if curr['Close'] > prev['BB_Upper']:
+        return -1
+    
+    # FADE DOWNWARD BREAKOUT: Price breaks below lower band -> LONG
+    # Expect failed breakout and reversion up
+    if curr['Close'] < prev['BB_Lower']:
+        return 1
+    
+    return 0
+
+def original_backtest_symbol(symbol, df):
+    """backtest_symbol() as it was before the array rewrite, on given daily bars"""
+    df = original_indicators(df)
+    df = df.dropna()
+    
+    trades = []
+    position = None
+    partial_pnl = 0  # Track partial profit from TP1
+    
+    for i in range(BB_PERIOD + 5, len(df)):
+        curr = df.iloc[i]
+        date = df.index[i]
+        
+        # Check exit conditions if in position
+        if position:
+            position.holding_days += 1
+            
+            # Check TP1 first (1.5R) - take 50% off
+            if not position.tp1_hit:
+                if position.direction == 1 and curr['High'] >= position.take_profit_1:
+                    # Partial exit at TP1
+                    partial_size = position.size // 2
+                    partial_pnl = (position.take_profit_1 - position.entry_price) * position.direction * partial_size
+                    partial_pnl -= position.entry_price * partial_size * (COMMISSION + STAMP_DUTY + SLIPPAGE) * 2
+                    position.remaining_size = position.size - partial_size
+                    position.tp1_hit = True
+                    # Move stop to breakeven
+                    position.stop_loss = position.entry_price
+                elif position.direction == -1 and curr['Low'] <= position.take_profit_1:
+                    partial_size = position.size // 2
+                    partial_pnl = (position.entry_price - position.take_profit_1) * partial_size
+                    partial_pnl -= position.entry_price * partial_size * (COMMISSION + STAMP_DUTY + SLIPPAGE) * 2
+                    position.remaining_size = position.size - partial_size
+                    position.tp1_hit = True
+                    position.stop_loss = position.entry_price
+            
+            # Stop Loss
+            if position.direction == 1 and curr['Low'] <= position.stop_loss:
+                position.exit_price = position.stop_loss
+                position.exit_date = date
+                position.exit_reason = 'Stop Loss' if not position.tp1_hit else 'TP1+BE Stop'
+            elif position.direction == -1 and curr['High'] >= position.stop_loss:
+                position.exit_price = position.stop_loss
+                position.exit_date = date
+                position.exit_reason = 'Stop Loss' if not position.tp1_hit else 'TP1+BE Stop'
+            
+            # Take Profit 2 (2R) - exit remaining
+            elif position.direction == 1 and curr['High'] >= position.take_profit_2:
+                position.exit_price = position.take_profit_2
+                position.exit_date = date
+                position.exit_reason = 'Take Profit 2R'
+            elif position.direction == -1 and curr['Low'] <= position.take_profit_2:
+                position.exit_price = position.take_profit_2
+                position.exit_date = date
+                position.exit_reason = 'Take Profit 2R'
+            
+            # Time-based exit
+            elif position.holding_days >= MAX_HOLDING_DAYS:
+                position.exit_price = curr['Close']
+                position.exit_date = date
+                position.exit_reason = 'Time Exit'
+            
+            # Calculate PnL if exited
+            if position.exit_price:
+                # PnL from remaining position
+                remaining_pnl = (position.exit_price - position.entry_price) * position.direction * position.remaining_size
+                remaining_pnl -= position.entry_price * position.remaining_size * (COMMISSION + STAMP_DUTY + SLIPPAGE) * 2
+                
+                position.pnl = partial_pnl + remaining_pnl
+                position.pnl_pct = position.pnl / (position.entry_price * position.size) * 100
+                trades.append(position)
+                position = None
+                partial_pnl = 0
+        
+        # Check entry signal if no position
+        if position is None:
+            signal = original_get_signal(df, i, min_bars=50)
+            
+            if signal == 1:  # Long only
+                entry_price = curr['Close']
+                atr = curr['ATR']
+                risk = STOP_LOSS_ATR_MULT * atr
+                
+                if signal == 1:  # Long
+                    stop_loss = entry_price - risk
+                    take_profit_1 = entry_price + (TAKE_PROFIT_1_R_MULT * risk)
+                    take_profit_2 = entry_price + (TAKE_PROFIT_2_R_MULT * risk)
+                else:  # Short
+                    stop_loss = entry_price + risk
+                    take_profit_1 = entry_price - (TAKE_PROFIT_1_R_MULT * risk)
+                    take_profit_2 = entry_price - (TAKE_PROFIT_2_R_MULT * risk)
+                
+                size = int((INITIAL_CAPITAL * POSITION_SIZE) / entry_price)
+                
+                position = Trade(
+                    symbol=symbol,
+                    entry_date=date,
+                    entry_price=entry_price,
+                    direction=signal,
+                    size=size,
+                    stop_loss=stop_loss,
+                    take_profit_1=take_profit_1,
+                    take_profit_2=take_profit_2
+                )
+    
+    # Close any open position at end
+    if position:
+        position.exit_price = df.iloc[-1]['Close']
+        position.exit_date = df.index[-1]
+        position.exit_reason = 'End of Data'
+        remaining_pnl = (position.exit_price - position.entry_price) * position.direction * position.remaining_size
+        remaining_pnl -= position.entry_price * position.remaining_size * (COMMISSION + STAMP_DUTY + SLIPPAGE) * 2
+        position.pnl = partial_pnl + remaining_pnl
+        position.pnl_pct = position.pnl / (position.entry_price * position.size) * 100
+        trades.append(position)
+    
+    return trades
+
+def original_indicators_hourly(df):
+    """Calculate BB, RSI, ATR with EMA50 for hourly"""
+    # Bollinger Bands
+    df['SMA'] = df['Close'].rolling(BB_PERIOD).mean()
+    df['STD'] = df['Close'].rolling(BB_PERIOD).std()
+    df['BB_Upper'] = df['SMA'] + (BB_STD * df['STD'])
+    df['BB_Lower'] = df['SMA'] - (BB_STD * df['STD'])
+    df['BB_Width'] = (df['BB_Upper'] - df['BB_Lower']) / df['SMA']
+    df['BB_Position'] = (df['Close'] - df['BB_Lower']) / (df['BB_Upper'] - df['BB_Lower'])
+    
+    # EMA50 for hourly trend filter (50 hours ≈ 7 trading days)
+    df['EMA200'] = df['Close'].ewm(span=50, adjust=False).mean()
+    df['Above_EMA200'] = df['Close'] > df['EMA200']
+    
+    # RSI
+    delta = df['Close'].diff()
+    gain = delta.where(delta > 0, 0).rolling(RSI_PERIOD).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(RSI_PERIOD).mean()
+    rs = gain / loss
+    df['RSI'] = 100 - (100 / (1 + rs))
+    
+    # ATR
+    df['TR'] = np.maximum(
+        df['High'] - df['Low'],
+        np.maximum(
+            abs(df['High'] - df['Close'].shift(1)),
+            abs(df['Low'] - df['Close'].shift(1))
+        )
+    )
+    df['ATR'] = df['TR'].rolling(14).mean()
+    
+    # Volume MA
+    df['Vol_MA'] = df['Volume'].rolling(20).mean()
+    
+    return df
+
+def original_backtest_symbol_hourly(symbol, df):
+    """backtest_symbol_hourly() as it was before the array rewrite, on given hourly bars"""
+    df = original_indicators_hourly(df)
+    df = df.dropna()
+    
+    trades = []
+    position = None
+    partial_pnl = 0
+    
+    # Adjust max holding for hourly (in hours, ~5 trading days = 35 hours)
+    max_holding_hours = 35
+    
+    for i in range(50 + 5, len(df)):
+        curr = df.iloc[i]
+        date = df.index[i]
+        
+        if position:
+            position.holding_days += 1
+            
+            # Check TP1 first (1.5R)
+            if not position.tp1_hit:
+                if position.direction == 1 and curr['High'] >= position.take_profit_1:
+                    partial_size = position.size // 2
+                    partial_pnl = (position.take_profit_1 - position.entry_price) * position.direction * partial_size
+                    partial_pnl -= position.entry_price * partial_size * (COMMISSION + STAMP_DUTY + SLIPPAGE) * 2
+                    position.remaining_size = position.size - partial_size
+                    position.tp1_hit = True
+                    position.stop_loss = position.entry_price
+            
+            # Stop Loss
+            if position.direction == 1 and curr['Low'] <= position.stop_loss:
+                position.exit_price = position.stop_loss
+                position.exit_date = date
+                position.exit_reason = 'Stop Loss' if not position.tp1_hit else 'TP1+BE Stop'
+            
+            # Take Profit 2
+            elif position.direction == 1 and curr['High'] >= position.take_profit_2:
+                position.exit_price = position.take_profit_2
+                position.exit_date = date
+                position.exit_reason = 'Take Profit 2R'
+            
+            # Time exit
+            elif position.holding_days >= max_holding_hours:
+                position.exit_price = curr['Close']
+                position.exit_date = date
+                position.exit_reason = 'Time Exit'
+            
+            if position.exit_price:
+                remaining_pnl = (position.exit_price - position.entry_price) * position.direction * position.remaining_size
+                remaining_pnl -= position.entry_price * position.remaining_size * (COMMISSION + STAMP_DUTY + SLIPPAGE) * 2
+                position.pnl = partial_pnl + remaining_pnl
+                position.pnl_pct = position.pnl / (position.entry_price * position.size) * 100
+                trades.append(position)
+                position = None
+                partial_pnl = 0
+        
+        if position is None:
+            signal = original_get_signal(df, i, min_bars=30)
+            
+            if signal != 0:
+                entry_price = curr['Close']
+                atr = curr['ATR']
+                
+                # FADE BREAKOUT: SL at breakout day high/low +/- 2 ATR
+                if signal == 1:  # Long (fading downward breakout)
+                    # Stop below the low of breakout day
+                    stop_loss = curr['Low'] - (STOP_LOSS_ATR_MULT * atr)
+                    risk = entry_price - stop_loss
+                    take_profit_1 = entry_price + (TAKE_PROFIT_1_R_MULT * risk)
+                    take_profit_2 = entry_price + (TAKE_PROFIT_2_R_MULT * risk)
+                else:  # Short (fading upward breakout)
+                    # Stop above the high of breakout day
+                    stop_loss = curr['High'] + (STOP_LOSS_ATR_MULT * atr)
+                    risk = stop_loss - entry_price
+                    take_profit_1 = entry_price - (TAKE_PROFIT_1_R_MULT * risk)
+                    take_profit_2 = entry_price - (TAKE_PROFIT_2_R_MULT * risk)
+                
+                size = int((INITIAL_CAPITAL * POSITION_SIZE) / entry_price)
+                
+                position = Trade(
+                    symbol=symbol,
+                    entry_date=date,
+                    entry_price=entry_price,
+                    direction=signal,
+                    size=size,
+                    stop_loss=stop_loss,
+                    take_profit_1=take_profit_1,
+                    take_profit_2=take_profit_2
+                )
+    
+    if position:
+        position.exit_price = df.iloc[-1]['Close']
+        position.exit_date = df.index[-1]
+        position.exit_reason = 'End of Data'
+        remaining_pnl = (position.exit_price - position.entry_price) * position.direction * position.remaining_size
+        remaining_pnl -= position.entry_price * position.remaining_size * (COMMISSION + STAMP_DUTY + SLIPPAGE) * 2
+        position.pnl = partial_pnl + remaining_pnl
+        position.pnl_pct = position.pnl / (position.entry_price * position.size) * 100
+        trades.append(position)
+    
+    return trades
+
+# =============================================================================
+# CHECKS
+# =============================================================================
+
+def compare_trades(expected, actual, rtol=1e-6):
+    """
+    Compare two trade tables row by row
+    
+    Symbols, dates, direction, holding days and exit reason must match exactly;
+    prices and PnL within rtol.
+    
+    Returns:
+        list of mismatch descriptions (empty when identical)
+    """
+    exact = ['symbol', 'entry_date', 'exit_date', 'direction', 'holding_days', 'exit_reason']
+    numeric = ['entry_price', 'exit_price', 'pnl', 'pnl_pct']
+    
+    expected = expected[TRADE_COLUMNS].reset_index(drop=True)
+    actual = actual[TRADE_COLUMNS].reset_index(drop=True)
+    for df in (expected, actual):
+        for col in ['entry_date', 'exit_date']:
+            df[col] = df[col].astype(str)
+        df['holding_days'] = df['holding_days'].astype(int)
+    
+    mismatches = []
+    if len(expected) != len(actual):
+        mismatches.append(f"trade count {len(actual)} != {len(expected)}")
+    
+    n = min(len(expected), len(actual))
+    for col in exact:
+        bad = np.flatnonzero(expected[col].to_numpy()[:n] != actual[col].to_numpy()[:n])
+        mismatches.extend(f"row {i} {col}: {actual.at[i, col]} != {expected.at[i, col]}" for i in bad)
+    for col in numeric:
+        close = np.isclose(actual[col].to_numpy(dtype=float)[:n], expected[col].to_numpy(dtype=float)[:n],
+                           rtol=rtol, atol=0, equal_nan=True)
+        mismatches.extend(f"row {i} {col}: {actual.at[i, col]} != {expected.at[i, col]}"
+                          for i in np.flatnonzero(~close))
+    
+    return mismatches
+
+def report(label, expected, actual, rtol):
+    """Print the comparison for one check; True if the trades match"""
+    mismatches = compare_trades(trades_to_frame(expected) if isinstance(expected, list) else expected,
+                                trades_to_frame(actual), rtol)
+    if mismatches:
+        print(f"❌ {label}: {len(mismatches)} mismatches")
+        for line in mismatches[:20]:
+            print(f"  {line}")
+        return False
+    
+    print(f"✅ {label}: all {len(expected)} trades match")
+    return True
+
+def synthetic_bars(seed, n=1250, freq='B'):
+    """
+    Deterministic OHLCV bars (same seed, same bars) alternating quiet and
+    volatile regimes, so squeezes, breakouts and every exit type occur
+    """
+    rng = np.random.default_rng(seed)
+    vol = np.where((np.arange(n) // 60) % 2 == 0, 0.002, 0.02)
+    close = 50 * np.exp(np.cumsum(rng.normal(0, vol)))
+    open_ = np.r_[close[0], close[:-1]] * (1 + rng.normal(0, vol / 4))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, vol / 2)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, vol / 2)))
+    volume = rng.integers(100_000, 10_000_000, n).astype(float)
+    index = pd.date_range('2021-01-04', periods=n, freq=freq, tz='Asia/Hong_Kong')
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}, index=index)
+
+def check_engine(seeds=range(20), rtol=1e-9):
+    """
+    Offline check: current daily and hourly engines against the original
+    loops on synthetic bars. The indicator math was since moved to
+    squeeze_indicators, so prices / PnL are compared within rtol.
+    
+    Returns:
+        True if all trades match
+    """
+    checks = [
+        ('daily', 'B', original_backtest_symbol,
+         lambda symbol, df: backtest_symbol(symbol, symbol, df=df)),
+        ('hourly', 'h', original_backtest_symbol_hourly,
+         lambda symbol, df: backtest_symbol_hourly(symbol, symbol, df=df)),
+    ]
+    
+    ok = True
+    for label, freq, original, current in checks:
+        expected, actual = [], []
+        for seed in seeds:
+            symbol = f"SYN{seed:02d}"
+            expected.extend(original(symbol, synthetic_bars(seed, freq=freq)))
+            actual.extend(current(symbol, synthetic_bars(seed, freq=freq)))
+        ok &= report(f"{label} vs original engine", expected, actual, rtol)
+    
+    return ok
+
+def check_against_reference(reference_path=REFERENCE_RESULTS_PATH, rtol=1e-6,
+                            start_date='2021-01-01', end_date='2025-12-31'):
+    """
+    Re-run the daily backtest for every symbol in a saved results CSV and
+    compare the trades (symbols without trades aren't in the CSV, so they
+    aren't re-run)
+    
+    Note: yfinance back-adjusts prices for later dividends, so a fresh
+    download can drift from an old CSV; compare within the same data vintage.
+    
+    Returns:
+        True if all trades match
+    """
+    expected = pd.read_csv(reference_path)
+    symbols = list(dict.fromkeys(expected['symbol']))
+    print(f"🔁 Checking {len(expected)} trades over {len(symbols)} symbols against {reference_path}")
+    
+    trades = []
+    for symbol in symbols:
+        trades.extend(backtest_symbol(symbol, symbol, start_date, end_date))
+    
+    return report(reference_path, expected, trades, rtol)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='BB Squeeze backtest regression check')
+    parser.add_argument('--csv', nargs='?', const=REFERENCE_RESULTS_PATH, metavar='CSV',
+                        help='Re-run the symbols of a saved results CSV instead of the offline check')
+    args = parser.parse_args()
+    
+    ok = check_against_reference(args.csv) if args.csv else check_engine()
+    raise SystemExit(0 if ok else 1)
@@ -2,28 +2,202 @@
 """
 Crypto BB Squeeze Scanner using TradingView MCP
 Scans BINANCE/KUCOIN for Bollinger Band squeezes
+
+TradingView tools are called over one long-lived MCP session (the stdio
+server configured for mcporter), falling back to `mcporter call` per request
+when that isn't available.
+
+Usage: crypto_bb_squeeze_scanner.py [EXCHANGE] [TIMEFRAME] [BBW_THRESHOLD] [--detail]
+    --detail: also run coin_analysis for every squeezing coin (on a small
+              thread pool, cached until the candle closes) and save it with
+              the results
 """
 
+import os
 import json
+import atexit
+import itertools
 import subprocess
 import sys
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+# mcporter server definitions ({"mcpServers": {name: {"command", "args", "env"}}})
+MCPORTER_CONFIG = os.environ.get('MCPORTER_CONFIG', '/root/clawd/config/mcporter.json')
+MCP_SERVER = 'tradingview'
+
+# Concurrent coin_analysis calls
+COIN_WORKERS = int(os.environ.get('CRYPTO_COIN_WORKERS', 8))
+
+# Per-coin analyses, valid until their candle closes (override with CRYPTO_COIN_CACHE env var)
+COIN_CACHE_PATH = Path(os.environ.get('CRYPTO_COIN_CACHE', Path(__file__).parent / "data" / "crypto_coin_cache.json"))
+
+
+class MCPSession:
+    """
+    Long-lived stdio session with one MCP server from the mcporter config
+
+    Requests are multiplexed by JSON-RPC id, so one session serves
+    concurrent calls from several threads.
+    """
+
+    PROTOCOL_VERSION = '2024-11-05'
+
+    def __init__(self, server, config_path=MCPORTER_CONFIG):
+        with open(config_path) as f:
+            spec = json.load(f)['mcpServers'][server]
+        if 'command' not in spec:
+            raise ValueError(f"MCP server {server} is not a stdio server")
+
+        self.server = server
+        self.proc = subprocess.Popen(
+            [spec['command'], *spec.get('args', [])],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, bufsize=1, cwd=spec.get('cwd'),
+            env={**os.environ, **spec.get('env', {})}
+        )
+        self.closed = False
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        threading.Thread(target=self._read_loop, daemon=True).start()
+
+        try:
+            self.request('initialize', {
+                'protocolVersion': self.PROTOCOL_VERSION,
+                'capabilities': {},
+                'clientInfo': {'name': 'crypto_bb_squeeze_scanner', 'version': '1.0'},
+            }, timeout=60)
+        except Exception:
+            self.close()
+            raise
+        self._send({'jsonrpc': '2.0', 'method': 'notifications/initialized'})
+
+    def _send(self, message):
+        with self._write_lock:
+            self.proc.stdin.write(json.dumps(message) + '\n')
+            self.proc.stdin.flush()
+
+    def _read_loop(self):
+        for line in self.proc.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue  # server log noise on stdout
+            if 'method' in message:
+                if 'id' in message:
+                    # Requests from the server: answer pings, decline the rest
+                    reply = {'jsonrpc': '2.0', 'id': message['id']}
+                    if message['method'] == 'ping':
+                        reply['result'] = {}
+                    else:
+                        reply['error'] = {'code': -32601, 'message': 'Method not found'}
+                    self._send(reply)
+                continue
+            with self._pending_lock:
+                waiter = self._pending.pop(message.get('id'), None)
+            if waiter:
+                waiter['response'] = message
+                waiter['done'].set()
+
+        # Server exited - fail everything still waiting
+        self.closed = True
+        with self._pending_lock:
+            waiters, self._pending = list(self._pending.values()), {}
+        for waiter in waiters:
+            waiter['done'].set()
+
+    def request(self, method, params, timeout=30):
+        if self.closed:
+            raise RuntimeError(f"MCP server {self.server} has exited")
+        request_id = next(self._ids)
+        waiter = {'done': threading.Event(), 'response': None}
+        with self._pending_lock:
+            self._pending[request_id] = waiter
+        self._send({'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params})
+
+        if not waiter['done'].wait(timeout):
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+            raise TimeoutError(f"{method} timed out after {timeout}s")
+        response = waiter['response']
+        if response is None:
+            raise RuntimeError(f"MCP server {self.server} has exited")
+        if 'error' in response:
+            raise RuntimeError(response['error'].get('message', str(response['error'])))
+        return response['result']
+
+    def call_tool(self, tool, arguments, timeout=30):
+        """Call a tool and parse its JSON text output (what `mcporter call` prints)"""
+        result = self.request('tools/call', {'name': tool, 'arguments': arguments}, timeout)
+        text = ''.join(item.get('text', '') for item in result.get('content', []) if item.get('type') == 'text')
+        if result.get('isError'):
+            raise RuntimeError(text or f"{tool} failed")
+        if not text.strip() and 'structuredContent' in result:
+            return result['structuredContent']
+        return json.loads(text)
+
+    def close(self):
+        self.closed = True
+        if self.proc.poll() is None:
+            self.proc.terminate()
+
+
+_session = None
+_session_lock = threading.Lock()
+_session_unavailable = False
+
+
+def get_session():
+    """Shared MCPSession for MCP_SERVER, None if it can't be started (use mcporter instead)"""
+    global _session, _session_unavailable
+    with _session_lock:
+        if _session is not None and not _session.closed:
+            return _session
+        if _session_unavailable:
+            return None
+        try:
+            _session = MCPSession(MCP_SERVER)
+            atexit.register(_session.close)
+            return _session
+        except Exception as e:
+            print(f"⚠️  MCP session unavailable ({e}), using mcporter per call", file=sys.stderr)
+            _session_unavailable = True
+            return None
+
+
+def call_mcporter(tool, arguments, timeout=30):
+    """Call a TradingView MCP tool on the shared session, or via `mcporter call` as a fallback"""
+    session = get_session()
+    if session is not None:
+        try:
+            return session.call_tool(tool, arguments, timeout)
+        except (RuntimeError, OSError) as e:
+            if not session.closed:
+                raise
+            print(f"⚠️  MCP session lost ({e}), retrying with mcporter", file=sys.stderr)
+
+    cmd = ["mcporter", "call", f"{MCP_SERVER}.{tool}"]
+    cmd += [f'{key}:{json.dumps(value)}' for key, value in arguments.items()]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    if result.returncode == 0 and result.stdout.strip():
+        return json.loads(result.stdout)
+    return None
+
 
 def call_mcporter_bollinger_scan(exchange="BINANCE", timeframe="4h", bbw_threshold=0.04, limit=100):
     """Call TradingView MCP bollinger_scan tool"""
-    cmd = [
-        "mcporter", "call", "tradingview.bollinger_scan",
-        f'exchange:"{exchange}"',
-        f'timeframe:"{timeframe}"',
-        f'bbw_threshold:{bbw_threshold}',
-        f'limit:{limit}'
-    ]
-    
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-        if result.returncode == 0 and result.stdout.strip():
-            return json.loads(result.stdout)
-        return None
+        return call_mcporter('bollinger_scan', {
+            'exchange': exchange,
+            'timeframe': timeframe,
+            'bbw_threshold': bbw_threshold,
+            'limit': limit,
+        }, timeout=60)
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         return None
@@ -31,22 +205,101 @@ def call_mcporter_bollinger_scan(exchange="BINANCE", timeframe="4h", bbw_thresho
 
 def call_mcporter_coin_analysis(symbol, exchange="BINANCE", timeframe="4h"):
     """Get detailed analysis for a specific coin"""
-    cmd = [
-        "mcporter", "call", "tradingview.coin_analysis",
-        f'symbol:"{symbol}"',
-        f'exchange:"{exchange}"',
-        f'timeframe:"{timeframe}"'
-    ]
-    
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        if result.returncode == 0:
-            return json.loads(result.stdout)
-        return None
+        return call_mcporter('coin_analysis', {
+            'symbol': symbol,
+            'exchange': exchange,
+            'timeframe': timeframe,
+        }, timeout=30)
     except Exception as e:
         return None
 
 
+# Candle length per TradingView timeframe unit (M = month, handled separately)
+TIMEFRAME_SECONDS = {'m': 60, 'h': 3600, 'H': 3600, 'd': 86400, 'D': 86400, 'w': 604800, 'W': 604800}
+
+
+def candle_start(timeframe, now=None):
+    """Open time (UTC epoch seconds) of the candle `timeframe` is currently on"""
+    now = now or datetime.now(timezone.utc)
+    count, unit = int(timeframe[:-1] or 1), timeframe[-1]
+    if unit == 'M':
+        months = (now.year * 12 + now.month - 1) // count * count
+        return int(datetime(months // 12, months % 12 + 1, 1, tzinfo=timezone.utc).timestamp())
+
+    seconds = count * TIMEFRAME_SECONDS[unit]
+    ts = int(now.timestamp())
+    if unit in 'wW':
+        ts -= 4 * 86400  # the epoch is a Thursday, weeks open on Monday
+        return ts - ts % seconds + 4 * 86400
+    return ts - ts % seconds
+
+
+_coin_cache = None
+_coin_cache_lock = threading.Lock()
+
+
+def _load_coin_cache():
+    global _coin_cache
+    if _coin_cache is None:
+        try:
+            with open(COIN_CACHE_PATH) as f:
+                _coin_cache = json.load(f)
+        except (OSError, ValueError):
+            _coin_cache = {}
+    return _coin_cache
+
+
+def _save_coin_cache():
+    """Write the cache, dropping analyses of candles that have closed"""
+    with _coin_cache_lock:
+        current = {}
+        live = {key: entry for key, entry in _load_coin_cache().items()
+                if entry['candle'] == current.setdefault(entry['timeframe'], candle_start(entry['timeframe']))}
+        _coin_cache.clear()
+        _coin_cache.update(live)
+        COIN_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = COIN_CACHE_PATH.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(live, f)
+        os.replace(tmp_path, COIN_CACHE_PATH)
+
+
+def analyze_coins(symbols, exchange="BINANCE", timeframe="4h", workers=COIN_WORKERS):
+    """
+    coin_analysis for several coins at once, cached until the current candle closes
+
+    Returns:
+        ({symbol: analysis or None}, number served from cache)
+    """
+    candle = candle_start(timeframe)
+    results = {}
+    with _coin_cache_lock:
+        cache = _load_coin_cache()
+        for symbol in symbols:
+            entry = cache.get(f"{exchange}:{timeframe}:{symbol}")
+            if entry and entry['candle'] == candle:
+                results[symbol] = entry['data']
+    cached = len(results)
+
+    missing = [symbol for symbol in dict.fromkeys(symbols) if symbol not in results]
+    if missing:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(missing)))) as pool:
+            fetched = pool.map(lambda symbol: call_mcporter_coin_analysis(symbol, exchange, timeframe), missing)
+            for symbol, data in zip(missing, fetched):
+                results[symbol] = data
+                if data:
+                    with _coin_cache_lock:
+                        _load_coin_cache()[f"{exchange}:{timeframe}:{symbol}"] = {
+                            'timeframe': timeframe, 'candle': candle, 'data': data
+                        }
+        try:
+            _save_coin_cache()
+        except OSError as e:
+            print(f"Warning: Could not save coin cache: {e}", file=sys.stderr)
+    return results, cached
+
+
 def analyze_squeeze_opportunity(symbol, data, timeframe):
     """Analyze BB squeeze for trading opportunity"""
     
@@ -108,8 +361,8 @@ def analyze_squeeze_opportunity(symbol, data, timeframe):
     }
 
 
-def scan_crypto_bb_squeeze(exchange="BINANCE", timeframe="4h", bbw_threshold=0.04):
-    """Scan crypto markets for BB squeeze opportunities"""
+def scan_crypto_bb_squeeze(exchange="BINANCE", timeframe="4h", bbw_threshold=0.04, detail=False):
+    """Scan crypto markets for BB squeeze opportunities (detail: add coin_analysis for every coin)"""
     
     print("=" * 100)
     print(f"🔍 CRYPTO BOLLINGER BAND SQUEEZE SCANNER")
@@ -139,14 +392,28 @@ def scan_crypto_bb_squeeze(exchange="BINANCE", timeframe="4h", bbw_threshold=0.0
     print(f"✅ Found {len(squeeze_coins)} coins with BB squeeze")
     print()
     
-    # Step 2: Analyze each coin for trading opportunity
+    symbols = [coin_data.get('symbol', 'UNKNOWN') for coin_data in squeeze_coins]
+    
+    # Step 2 (detail only): coin_analysis for every coin - concurrently, and
+    # cached until the candle closes
+    needed = [symbol for symbol in symbols if symbol != 'UNKNOWN'] if detail else []
+    details = {}
+    if needed:
+        print(f"🔬 Running coin analysis for {len(needed)} coins ({COIN_WORKERS} at a time)...")
+        started = time.time()
+        details, cached = analyze_coins(needed, exchange, timeframe)
+        print(f"✅ Done in {time.time() - started:.1f}s ({cached} from cache)")
+        print()
+    
+    # Step 3: Analyze each coin for trading opportunity
     opportunities = []
     
-    for i, coin_data in enumerate(squeeze_coins, 1):
-        symbol = coin_data.get('symbol', 'UNKNOWN')
+    for i, (symbol, coin_data) in enumerate(zip(symbols, squeeze_coins), 1):
         print(f"[{i}/{len(squeeze_coins)}] Analyzing {symbol}...", end=" ")
         
         opportunity = analyze_squeeze_opportunity(symbol, coin_data, timeframe)
+        if opportunity and details.get(symbol):
+            opportunity['coin_analysis'] = details[symbol]
         
         if opportunity:
             opportunities.append(opportunity)
@@ -255,12 +522,13 @@ def main():
     """Main execution"""
     
     # Parse arguments
-    exchange = sys.argv[1] if len(sys.argv) > 1 else "BINANCE"
-    timeframe = sys.argv[2] if len(sys.argv) > 2 else "4h"
-    bbw_threshold = float(sys.argv[3]) if len(sys.argv) > 3 else 0.04
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    exchange = args[0] if len(args) > 0 else "BINANCE"
+    timeframe = args[1] if len(args) > 1 else "4h"
+    bbw_threshold = float(args[2]) if len(args) > 2 else 0.04
     
     # Run scan
-    opportunities = scan_crypto_bb_squeeze(exchange, timeframe, bbw_threshold)
+    opportunities = scan_crypto_bb_squeeze(exchange, timeframe, bbw_threshold, detail='--detail' in sys.argv)
     
     # Print results
     print_opportunities(opportunities)
@@ -30,6 +30,8 @@ import torch
 import numpy as np
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 
+from sentiment_cache import SentimentCache
+
 # Global Application Object
 app = Flask(__name__)
 
@@ -259,12 +261,22 @@ class MyFXBookAPI:
 # PART B: YOUR ORIGINAL NEWS ENGINE (FinBERT + RSS)
 # ==============================================================================
 
+FINBERT_MODEL = "yiyanghkust/finbert-tone"
+
 print("Loading FinBERT model...")
-finbert_model = AutoModelForSequenceClassification.from_pretrained("yiyanghkust/finbert-tone")
-finbert_tokenizer = AutoTokenizer.from_pretrained("yiyanghkust/finbert-tone")
+finbert_model = AutoModelForSequenceClassification.from_pretrained(FINBERT_MODEL)
+finbert_tokenizer = AutoTokenizer.from_pretrained(FINBERT_MODEL)
 labels = ['Neutral', 'Positive', 'Negative']
 print("Model loaded successfully!")
 
+# Articles per FinBERT forward pass (CPU: bigger batches mostly add padding)
+SENTIMENT_BATCH_SIZE = int(os.environ.get('SENTIMENT_BATCH_SIZE', 16))
+
+# FinBERT results cache (sentiment_cache.py); a different model revision gets fresh entries
+MODEL_VERSION = f"{FINBERT_MODEL}@{getattr(finbert_model.config, '_commit_hash', None) or 'local'}"
+sentiment_cache = SentimentCache(MODEL_VERSION)
+cache_stats = sentiment_cache.stats
+
 ASSETS = {
     "EURUSD": {
         "name": "Euro (EUR/USD)",
@@ -326,19 +338,29 @@ def fetch_article_content(url):
     except:
         return "Content not retrieved."
 
+def finbert_scores(texts, batch_size=SENTIMENT_BATCH_SIZE):
+    """FinBERT (confidence, label) for every text, in dynamically padded batches"""
+    scores = []
+    with torch.inference_mode():
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            inputs = finbert_tokenizer(batch, return_tensors="pt", truncation=True, max_length=512, padding=True)
+            probabilities = torch.softmax(finbert_model(**inputs).logits, dim=1).numpy()
+            for probs in probabilities:
+                max_index = int(np.argmax(probs))
+                scores.append((float(probs[max_index]), labels[max_index]))
+    return scores
+
+def analyze_sentiment_batch(texts, batch_size=SENTIMENT_BATCH_SIZE):
+    """
+    FinBERT (confidence, label) for every text, in input order
+    Identical texts are scored once and texts already in the sentiment cache
+    are not scored at all.
+    """
+    return sentiment_cache.score(texts, lambda todo: finbert_scores(todo, batch_size))
+
 def analyze_sentiment(text):
-    if not text.strip():
-        return 0.0, 'Neutral'
-    
-    inputs = finbert_tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-    with torch.no_grad():
-        outputs = finbert_model(**inputs)
-    
-    logits = outputs.logits
-    probabilities = torch.softmax(logits, dim=1).numpy()[0]
-    max_index = np.argmax(probabilities)
-    
-    return float(probabilities[max_index]), labels[max_index]
+    return sentiment_cache.score([text], finbert_scores, verbose=False)[0]
 
 def fetch_news(query, num_articles=5, days=2):
     rss_url = f"https://news.google.com/rss/search?q={quote(query)}&hl=en-US&gl=US&ceid=US:en&when={days}d"
@@ -397,23 +419,27 @@ def invert_sentiment(label, desc):
     }
     return inv_map.get(label, (label, desc))
 
-def process_news_for_asset(asset_key, config):
+def fetch_news_for_asset(config):
     all_articles = []
     for query in config['queries']:
         all_articles.extend(fetch_news(query, config['articles_per_query'], config['days']))
     
     unique, _ = deduplicate_articles(all_articles)
-    
-    pos, neg, neu = 0, 0, 0
-    processed_articles = []
-    
-    for a in unique:
-        text = a['title'] + ". " + (a['content'][:500] if a['content'] else "")
-        conf, sent = analyze_sentiment(text)
+    return unique
+
+def score_articles(articles):
+    """Set 'sentiment' / 'confidence' on every article in one batched FinBERT pass"""
+    texts = [a['title'] + ". " + (a['content'][:500] if a['content'] else "") for a in articles]
+    for a, (conf, sent) in zip(articles, analyze_sentiment_batch(texts)):
         a['sentiment'] = sent
         a['confidence'] = conf
-        processed_articles.append(a)
-        
+    return articles
+
+def summarize_asset(config, processed_articles):
+    pos, neg, neu = 0, 0, 0
+    
+    for a in processed_articles:
+        sent = a['sentiment']
         if sent == 'Positive':
             pos += 1
         elif sent == 'Negative':
@@ -432,7 +458,7 @@ def process_news_for_asset(asset_key, config):
     
     return {
         "name": config['name'],
-        "total_articles": len(unique),
+        "total_articles": len(processed_articles),
         "sentiment_counts": {
             "positive": pos,
             "negative": neg,
@@ -450,6 +476,9 @@ def process_news_for_asset(asset_key, config):
         "articles": processed_articles
     }
 
+def process_news_for_asset(asset_key, config):
+    return summarize_asset(config, score_articles(fetch_news_for_asset(config)))
+
 # ==============================================================================
 # PART C: FLASK SERVER & EXECUTION BRIDGE
 # ==============================================================================
@@ -472,10 +501,18 @@ def trigger_full_analysis():
         "timestamp": datetime.now().isoformat(),
         "assets": {}
     }
+    stats_before = dict(cache_stats)
     
+    asset_articles = {}
     for key, config in ASSETS.items():
         print(f"Processing News for {key}...")
-        final_output["assets"][key] = process_news_for_asset(key, config)
+        asset_articles[key] = fetch_news_for_asset(config)
+    
+    # Score all pairs' articles together so FinBERT runs full batches
+    score_articles([a for articles in asset_articles.values() for a in articles])
+    for key, config in ASSETS.items():
+        final_output["assets"][key] = summarize_asset(config, asset_articles[key])
+    final_output["sentiment_cache"] = {name: cache_stats[name] - stats_before[name] for name in cache_stats}
     
     # 2. RUN RETAIL SCRAPE IN BACKGROUND AND MERGE
     try:
@@ -495,7 +532,8 @@ def trigger_full_analysis():
     return jsonify({
         "status": "success",
         "message": "Full Analysis Complete",
-        "file": DATA_FILE
+        "file": DATA_FILE,
+        "sentiment_cache": final_output["sentiment_cache"]
     })
 
 @app.route('/forex-analysis-realtime', methods=['GET'])
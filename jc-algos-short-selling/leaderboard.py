@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Short Selling Leaderboards
+Builds the /api/short/top20 leaderboards and the Telegram report text once
+per data publication and stores them as a JSON snapshot, so requests serve
+a file instead of re-fetching SFC/HKEX data.
+
+Usage:
+    python leaderboard.py               # rebuild now (e.g. from cron after each publication)
+    python leaderboard.py --watch       # rebuild every REFRESH_INTERVAL seconds
+"""
+
+import os
+import sys
+import json
+import math
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sfc_short_positions import fetch_short_positions, get_top_shorted_stocks
+from hkex_short_selling import fetch_short_selling_data, add_float_data
+from stock_names import get_chinese_names_batch
+
+# Snapshot location (override with LEADERBOARD_PATH env var)
+LEADERBOARD_PATH = Path(os.environ.get(
+    'LEADERBOARD_PATH',
+    Path(__file__).parent / "data" / "leaderboard.json"
+))
+
+# How often the web server checks for a new publication (seconds)
+REFRESH_INTERVAL = 30 * 60
+
+_build_lock = threading.Lock()
+_snapshot = {'mtime': None, 'data': None}
+
+
+def build_top20(sfc_df, hkex_df, top_n: int = 20) -> dict:
+    """Aggregate (SFC) and daily (HKEX) leaderboards ranked by % of float"""
+    report_date = sfc_df['fetch_date'].iloc[0] if 'fetch_date' in sfc_df.columns else datetime.now().strftime('%Y-%m-%d')
+
+    # Top 50 by value first, then rank by % of float
+    top_by_value = get_top_shorted_stocks(sfc_df, 50, include_float=True)
+    aggregate_top = sorted(
+        [s for s in top_by_value if s.get('short_pct_of_float', 0) > 0],
+        key=lambda x: x.get('short_pct_of_float', 0),
+        reverse=True
+    )[:top_n]
+
+    names = get_chinese_names_batch([stock['stock_code'] for stock in aggregate_top])
+    for stock in aggregate_top:
+        stock['chinese_name'] = names[stock['stock_code']]
+
+    trading_date = hkex_df['trading_date'].iloc[0] if 'trading_date' in hkex_df.columns else "Today"
+
+    top_by_value_hkex = hkex_df.nlargest(50, 'short_turnover_hkd')
+    top_df = add_float_data(top_by_value_hkex)
+    names = get_chinese_names_batch(list(top_df['stock_code']))
+
+    valid_rows = []
+    for _, row in top_df.iterrows():
+        pct = row.get('daily_turnover_pct_of_float', 0)
+        if pct and not math.isnan(pct) and pct > 0:
+            valid_rows.append({
+                'stock_code': row['stock_code'],
+                'stock_name': row['stock_name'],
+                'chinese_name': names[row['stock_code']],
+                'short_shares': int(row['short_turnover_shares']),
+                'short_value': int(row['short_turnover_hkd']),
+                'pct_of_float': round(pct, 4)
+            })
+
+    daily_top = sorted(valid_rows, key=lambda x: x['pct_of_float'], reverse=True)[:top_n]
+
+    return {
+        'aggregate': {
+            'report_date': report_date,
+            'stocks': aggregate_top
+        },
+        'daily': {
+            'trading_date': trading_date,
+            'stocks': daily_top
+        }
+    }
+
+
+def _load_file() -> dict:
+    try:
+        with open(LEADERBOARD_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def materialize(force: bool = False) -> bool:
+    """
+    Fetch SFC + HKEX data once and rebuild the leaderboards and report text
+
+    The snapshot is only rewritten when the leaderboards changed (a new
+    publication), so its ETag / Last-Modified stay stable in between.
+
+    Returns:
+        True if a new snapshot was written
+    """
+    from short_selling_report import generate_telegram_report_v2
+
+    with _build_lock:
+        sfc_df = fetch_short_positions()
+        hkex_df = fetch_short_selling_data()
+        top20 = build_top20(sfc_df, hkex_df)
+        # Round-trip through JSON so numpy scalars compare equal to the stored copy
+        top20 = json.loads(json.dumps(top20, default=str))
+
+        current = _load_file()
+        if not force and current is not None and current.get('top20') == top20:
+            return False
+
+        snapshot = {
+            'published_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'top20': top20,
+            'telegram_report': generate_telegram_report_v2(sfc_df=sfc_df, hkex_df=hkex_df),
+        }
+        LEADERBOARD_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = LEADERBOARD_PATH.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, LEADERBOARD_PATH)
+        return True
+
+
+def load_snapshot() -> dict:
+    """
+    Current snapshot, re-read only when the file changes
+
+    Returns:
+        dict with serialized 'top20_body' / 'report_body' bytes, their ETags,
+        'last_modified' (datetime), or None if nothing was materialized yet
+    """
+    try:
+        mtime = LEADERBOARD_PATH.stat().st_mtime
+    except OSError:
+        return None
+    if _snapshot['mtime'] == mtime:
+        return _snapshot['data']
+
+    stored = _load_file()
+    if stored is None:
+        return None
+    top20_body = json.dumps(stored['top20'], sort_keys=True).encode()
+    report_body = stored.get('telegram_report', '').encode()
+    data = {
+        'top20_body': top20_body,
+        'top20_etag': hashlib.sha1(top20_body).hexdigest(),
+        'report_body': report_body,
+        'report_etag': hashlib.sha1(report_body).hexdigest(),
+        'last_modified': datetime.fromisoformat(stored['published_at']),
+    }
+    _snapshot.update(mtime=mtime, data=data)
+    return data
+
+
+def get_snapshot() -> dict:
+    """load_snapshot(), materializing on the spot if there is none yet"""
+    snapshot = load_snapshot()
+    if snapshot is None:
+        materialize()
+        snapshot = load_snapshot()
+    return snapshot
+
+
+def run_scheduler(interval: int = REFRESH_INTERVAL):
+    """Rebuild the snapshot forever (run in a daemon thread or with --watch)"""
+    while True:
+        try:
+            if materialize():
+                print(f"Leaderboard snapshot updated: {LEADERBOARD_PATH}", file=sys.stderr)
+        except Exception as e:
+            print(f"Warning: Leaderboard refresh failed: {e}", file=sys.stderr)
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Materialize short selling leaderboards')
+    parser.add_argument('--force', action='store_true', help='Rewrite the snapshot even if unchanged')
+    parser.add_argument('--watch', action='store_true', help='Keep rebuilding every --interval seconds')
+    parser.add_argument('--interval', type=int, default=REFRESH_INTERVAL, help='Seconds between rebuilds (with --watch)')
+    args = parser.parse_args()
+
+    if args.watch:
+        run_scheduler(args.interval)
+    elif materialize(force=args.force):
+        print(f"✅ Snapshot written to {LEADERBOARD_PATH}")
+    else:
+        print("No new publication - snapshot unchanged")
@@ -1,27 +1,134 @@
 #!/usr/bin/env python3
 """
 Stock Name Lookup - Get Chinese names for HK stocks via Sina Finance API
+
+Names are kept in a persistent code -> traditional name table
+(data/stock_names.json). Unknown codes are resolved with one batched Sina
+request per call, so lookups on the request path are dictionary hits.
 """
 
 import requests
 import re
+import os
+import json
+import threading
+import time
 from functools import lru_cache
+from pathlib import Path
 
-SINA_API_URL = "https://hq.sinajs.cn/list=hk{code}"
+SINA_API_URL = "https://hq.sinajs.cn/list={codes}"
 
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
     'Referer': 'https://finance.sina.com.cn'
 }
 
-# Cache for stock names to avoid repeated API calls
-_name_cache = {}
+# Persistent name table (override with STOCK_NAMES_PATH env var)
+NAMES_PATH = Path(os.environ.get(
+    'STOCK_NAMES_PATH',
+    Path(__file__).parent / "data" / "stock_names.json"
+))
+
+# Re-resolve the whole table after a week (names change on renames only)
+NAMES_TTL = 7 * 24 * 60 * 60
+
+# Seconds before a code Sina didn't know is asked for again
+UNKNOWN_RETRY = 60 * 60
+
+# Codes per Sina request (the list= parameter takes comma-separated codes)
+SINA_BATCH_SIZE = 100
+
+# Where fetch_hsi_constituents.py / the backtests keep the HSI universe
+SEED_DIRS = [Path('/root/clawd')] + list(Path(__file__).resolve().parents)[:2]
+
+_names = {}  # 5-digit code -> traditional Chinese name
+_unknown = {}  # 5-digit code -> time of the last failed lookup
+_updated_at = 0.0
+_lock = threading.Lock()
+_loaded = False
+
+
+def _sina_code(stock_code) -> str:
+    """'700', '0700', '0700.HK' -> '00700'"""
+    code = str(stock_code).upper().replace('.HK', '').strip()
+    return str(int(code)).zfill(5) if code.isdigit() else code.zfill(5)
+
+
+def _load():
+    """Read the name table into memory once per process"""
+    global _loaded, _updated_at
+    with _lock:
+        if _loaded:
+            return
+        try:
+            with open(NAMES_PATH) as f:
+                data = json.load(f)
+            _names.update(data.get('names', {}))
+            _updated_at = data.get('updated_at', 0.0)
+        except (OSError, ValueError):
+            pass
+        _loaded = True
+
+
+def _save():
+    """Write the name table atomically (caller holds _lock)"""
+    NAMES_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = NAMES_PATH.with_suffix('.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump({'updated_at': _updated_at, 'names': _names}, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, NAMES_PATH)
+
+
+def fetch_names_from_sina(codes: list) -> dict:
+    """
+    Resolve names with batched Sina requests (SINA_BATCH_SIZE codes each)
+    
+    Returns:
+        {5-digit code: traditional Chinese name} for the codes Sina knows
+    """
+    names = {}
+    for i in range(0, len(codes), SINA_BATCH_SIZE):
+        batch = codes[i:i + SINA_BATCH_SIZE]
+        try:
+            url = SINA_API_URL.format(codes=','.join(f"hk{c}" for c in batch))
+            response = requests.get(url, headers=HEADERS, timeout=10)
+            if response.status_code != 200:
+                continue
+            # One line per code: var hq_str_hk00700="TENCENT,腾讯控股,...";
+            for code, fields in re.findall(r'hq_str_hk(\w+)="([^"]*)"', response.text):
+                parts = fields.split(',')
+                if len(parts) >= 2 and parts[1]:
+                    # Convert simplified to traditional Chinese if needed
+                    names[code] = convert_to_traditional(parts[1])
+        except Exception as e:
+            print(f"Warning: Sina name lookup failed: {e}")
+    return names
+
+
+def _store(names: dict, refreshed: bool = False):
+    global _updated_at
+    if not names and not refreshed:
+        return
+    with _lock:
+        _names.update(names)
+        if refreshed:
+            _updated_at = time.time()
+        try:
+            _save()
+        except OSError as e:
+            print(f"Warning: Could not write {NAMES_PATH}: {e}")
+    _cached_name.cache_clear()
+
+
+@lru_cache(maxsize=2048)
+def _cached_name(code: str) -> str:
+    """Name table hit (KeyError for unknown codes, which lru_cache doesn't keep)"""
+    return _names[code]
 
 
-@lru_cache(maxsize=500)
 def get_chinese_name(stock_code: str) -> str:
     """
-    Get Chinese name for a HK stock code via Sina Finance API.
+    Get Chinese name for a HK stock code.
     Returns the Chinese name or the stock code if not found.
     
     Args:
@@ -30,26 +137,11 @@ def get_chinese_name(stock_code: str) -> str:
     Returns:
         Chinese name (e.g., "騰訊控股") or stock code if not found
     """
-    # Normalize code to 5 digits with leading zeros
-    code = str(stock_code).zfill(5)
-    
+    _load()
     try:
-        url = SINA_API_URL.format(code=code)
-        response = requests.get(url, headers=HEADERS, timeout=5)
-        
-        if response.status_code == 200:
-            # Parse response: var hq_str_hk00700="TENCENT,腾讯控股,..."
-            match = re.search(r'"([^"]+)"', response.text)
-            if match:
-                parts = match.group(1).split(',')
-                if len(parts) >= 2 and parts[1]:
-                    # Convert simplified to traditional Chinese if needed
-                    chinese_name = parts[1]
-                    return convert_to_traditional(chinese_name)
-    except Exception as e:
-        pass
-    
-    return stock_code
+        return _cached_name(_sina_code(stock_code))
+    except KeyError:
+        return get_chinese_names_batch([stock_code])[stock_code]
 
 
 def convert_to_traditional(text: str) -> str:
@@ -407,22 +499,74 @@ def convert_to_traditional(text: str) -> str:
 def get_chinese_names_batch(stock_codes: list) -> dict:
     """
     Get Chinese names for multiple stock codes.
+    Codes missing from the name table are resolved with one batched request.
     
     Args:
         stock_codes: List of stock codes
     
     Returns:
-        Dict mapping stock code to Chinese name
+        Dict mapping stock code to Chinese name (or the code if not found)
     """
-    result = {}
-    for code in stock_codes:
-        result[code] = get_chinese_name(code)
-    return result
+    _load()
+    sina_codes = {code: _sina_code(code) for code in stock_codes}
+    now = time.time()
+    missing = sorted({c for c in sina_codes.values()
+                      if c not in _names and now - _unknown.get(c, 0) >= UNKNOWN_RETRY})
+    if missing:
+        names = fetch_names_from_sina(missing)
+        _unknown.update((c, now) for c in missing if c not in names)
+        _store(names)
+    
+    return {code: _names.get(sina, code) for code, sina in sina_codes.items()}
+
+
+def seed_codes() -> list:
+    """Stock codes from the hsi_constituents*.json files"""
+    codes = set()
+    for directory in SEED_DIRS:
+        for filepath in directory.glob("hsi_constituents*.json"):
+            try:
+                with open(filepath) as f:
+                    codes.update(_sina_code(symbol) for symbol in json.load(f))
+            except (OSError, ValueError):
+                continue
+    return sorted(codes)
+
+
+def refresh_names(stock_codes: list = None) -> int:
+    """
+    Re-resolve the whole name table (plus the HSI constituents and any
+    extra stock_codes) with batched Sina requests
+    
+    Returns:
+        number of names resolved
+    """
+    _load()
+    codes = set(_names) | set(seed_codes()) | {_sina_code(c) for c in (stock_codes or [])}
+    names = fetch_names_from_sina(sorted(codes))
+    _store(names, refreshed=bool(names))
+    return len(names)
+
+
+def warm_names() -> int:
+    """Refresh the name table if it is empty or older than NAMES_TTL"""
+    _load()
+    if _names and time.time() - _updated_at < NAMES_TTL:
+        return 0
+    return refresh_names()
 
 
 if __name__ == "__main__":
-    # Test
-    test_codes = ['0700', '2318', '9988', '1810', '3690', '0241', '9992']
-    for code in test_codes:
-        name = get_chinese_name(code)
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='HK stock Chinese names')
+    parser.add_argument('codes', nargs='*', help='Stock codes to look up')
+    parser.add_argument('--refresh', '-r', action='store_true', help='Re-resolve the whole name table (seeded from hsi_constituents*.json)')
+    args = parser.parse_args()
+    
+    if args.refresh:
+        print(f"✅ Resolved {refresh_names(args.codes)} names into {NAMES_PATH}")
+    
+    test_codes = args.codes or ['0700', '2318', '9988', '1810', '3690', '0241', '9992']
+    for code, name in get_chinese_names_batch(test_codes).items():
         print(f"{code}: {name}")
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Local OHLCV Bar Store
+Persists Yahoo Finance bars on disk (one Parquet file per symbol/interval)
+and only downloads the missing tail since the last stored bar.
+
+Each file records where its history begins (the start of the full download
+it came from, or 'max'), so symbols listed after that start - whose first
+bar is later than any requested period - still count as covered.
+
+Needs pyarrow; without it the import fails and callers download directly.
+"""
+
+import os
+import re
+import time
+import threading
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import yfinance as yf
+
+logger = logging.getLogger(__name__)
+
+# Store location (override with BAR_STORE_DIR env var, e.g. in Docker)
+BAR_STORE_DIR = os.environ.get(
+    'BAR_STORE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'bars')
+)
+
+# Seconds a stored file is considered fresh before the tail is re-checked
+REFRESH_TTL = {
+    '1d': 15 * 60,
+    '1wk': 60 * 60,
+    '1mo': 6 * 60 * 60,
+}
+DEFAULT_REFRESH_TTL = 5 * 60  # intraday intervals
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Parquet schema metadata key holding the history start
+HISTORY_START_KEY = b'bar_store.history_start'
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _get_lock(key: str) -> threading.Lock:
+    """One lock per symbol/interval so concurrent requests don't race on a file"""
+    with _locks_guard:
+        if key not in _locks:
+            _locks[key] = threading.Lock()
+        return _locks[key]
+
+
+def _store_path(symbol: str, interval: str) -> str:
+    """File path for a symbol/interval (^HSI -> _HSI, EURUSD=X -> EURUSD_X)"""
+    safe_symbol = re.sub(r'[^A-Za-z0-9.\-]', '_', symbol.upper())
+    return os.path.join(BAR_STORE_DIR, interval, f'{safe_symbol}.parquet')
+
+
+def period_to_start(period: str) -> Optional[datetime]:
+    """
+    Convert a yfinance period string ('2y', '13mo', '60d', '1wk', 'ytd') to a start date
+
+    Returns None for 'max' (no lower bound); raises ValueError for other periods.
+    """
+    if period == 'max':
+        return None
+    if period == 'ytd':
+        return datetime(datetime.now().year, 1, 1)
+    match = re.fullmatch(r'(\d+)(mo|wk|d|y)', period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    n, unit = int(match.group(1)), match.group(2)
+    now = datetime.now()
+    if unit == 'y':
+        return now - timedelta(days=365 * n)
+    if unit == 'mo':
+        return now - timedelta(days=31 * n)
+    if unit == 'wk':
+        return now - timedelta(weeks=n)
+    return now - timedelta(days=n)
+
+
+def _normalize(data: pd.DataFrame) -> pd.DataFrame:
+    """Flatten yfinance MultiIndex columns and keep OHLCV only"""
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = data.columns.get_level_values(0)
+    data = data[[c for c in OHLCV_COLUMNS if c in data.columns]]
+    return data[~data.index.duplicated(keep='last')].sort_index()
+
+
+def _read_store(symbol: str, interval: str):
+    """
+    Stored bars and where their history begins
+
+    Returns:
+        (DataFrame or None, history start: ISO date string, 'max' or None if unknown)
+    """
+    path = _store_path(symbol, interval)
+    if not os.path.exists(path):
+        return None, None
+    try:
+        table = pq.read_table(path)
+    except Exception as e:
+        logger.warning(f"Corrupt bar store file {path}, ignoring: {e}")
+        return None, None
+    history_start = (table.schema.metadata or {}).get(HISTORY_START_KEY)
+    return table.to_pandas(), history_start.decode() if history_start else None
+
+
+def load_bars(symbol: str, interval: str = '1d') -> Optional[pd.DataFrame]:
+    """Read stored bars for a symbol, or None if nothing is stored"""
+    return _read_store(symbol, interval)[0]
+
+
+def save_bars(symbol: str, interval: str, data: pd.DataFrame, history_start: Optional[str] = None) -> None:
+    """Atomically write bars for a symbol (write to temp file, then rename)"""
+    path = _store_path(symbol, interval)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.Table.from_pandas(data)
+    if history_start is not None:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), HISTORY_START_KEY: history_start.encode()})
+    tmp_path = f'{path}.tmp'
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _covers(stored: Optional[pd.DataFrame], history_start: Optional[str], start: Optional[datetime]) -> bool:
+    """True if the stored bars hold everything from `start` (None = 'max') on"""
+    if stored is None or stored.empty:
+        return False
+    if history_start == 'max':
+        return True
+    if start is None:
+        return False
+    # A full download from this start (or earlier) has been done - a later first bar is the listing date
+    if history_start is not None and pd.Timestamp(history_start) <= pd.Timestamp(start):
+        return True
+    return stored.index[0].tz_localize(None) <= pd.Timestamp(start) + timedelta(days=7)
+
+
+def _is_fresh(symbol: str, interval: str) -> bool:
+    """True if the stored file was refreshed within the interval's TTL"""
+    path = _store_path(symbol, interval)
+    ttl = REFRESH_TTL.get(interval, DEFAULT_REFRESH_TTL)
+    return os.path.exists(path) and time.time() - os.path.getmtime(path) < ttl
+
+
+def get_bars(symbol: str, period: str = '1y', interval: str = '1d') -> pd.DataFrame:
+    """
+    Get OHLCV bars, reading the local store first and downloading only the tail
+
+    Args:
+        symbol: Yahoo Finance symbol (e.g. '0700.HK', 'AAPL')
+        period: yfinance period string ('2y', '13mo', 'max', ...)
+        interval: yfinance interval ('1d', '1wk', '1h', ...)
+
+    Returns:
+        DataFrame with Open/High/Low/Close/Volume covering the requested period
+    """
+    try:
+        start = period_to_start(period)
+    except ValueError:
+        # Periods the store can't map to a start date are downloaded directly
+        logger.warning(f"Bar store: unsupported period {period!r}, downloading {symbol} directly")
+        data = yf.download(symbol, period=period, interval=interval, progress=False)
+        return data if data.empty else _normalize(data)
+
+    with _get_lock(f'{symbol}|{interval}'):
+        stored, history_start = _read_store(symbol, interval)
+        covers_period = _covers(stored, history_start, start)
+
+        if covers_period and _is_fresh(symbol, interval):
+            data = stored
+        elif covers_period:
+            # Re-fetch from the last stored bar (it may have been a partial bar)
+            last_bar = stored.index[-1]
+            tail = yf.download(symbol, start=last_bar.tz_localize(None).to_pydatetime(),
+                               interval=interval, progress=False)
+            if tail.empty:
+                data = stored
+            else:
+                tail = _normalize(tail)
+                data = pd.concat([stored[stored.index < tail.index[0]], tail])
+            save_bars(symbol, interval, data, history_start)
+            logger.info(f"Bar store: {symbol} {interval} refreshed tail ({len(tail)} bars)")
+        else:
+            data = yf.download(symbol, period=period, interval=interval, progress=False)
+            if data.empty:
+                return data
+            data = _normalize(data)
+            save_bars(symbol, interval, data, start.isoformat() if start else 'max')
+            logger.info(f"Bar store: {symbol} {interval} full download ({len(data)} bars)")
+
+    if start is not None:
+        data = data[data.index.tz_localize(None) >= pd.Timestamp(start)]
+    return data.copy()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Float Shares Cache
+Float / outstanding shares and market cap from Yahoo Finance, cached in
+SQLite with a daily TTL so request paths only do dictionary lookups.
+
+Usage:
+    python float_cache.py --prefetch        # warm the cache for the SFC + HKEX universe
+    python float_cache.py --stock 700       # show one cached entry
+"""
+
+import os
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Cache location (override with FLOAT_CACHE_PATH env var)
+FLOAT_CACHE_PATH = Path(os.environ.get(
+    'FLOAT_CACHE_PATH',
+    Path(__file__).parent / "data" / "float_shares.db"
+))
+
+# Share counts change rarely - refresh once a day
+FLOAT_CACHE_TTL = 24 * 60 * 60
+
+PREFETCH_WORKERS = 16
+
+FIELDS = ('float_shares', 'shares_outstanding', 'market_cap')
+EMPTY = {field: None for field in FIELDS}
+
+_cache = {}  # stock_code -> (fetched_at, data)
+_lock = threading.Lock()
+_loaded = False
+
+
+def normalize_code(stock_code) -> str:
+    """'700', '00700', '0700.HK' -> '0700'"""
+    code = str(stock_code).upper().replace('.HK', '').strip()
+    return str(int(code)).zfill(4) if code.isdigit() else code.zfill(4)
+
+
+def _connect() -> sqlite3.Connection:
+    FLOAT_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(FLOAT_CACHE_PATH, timeout=30)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS float_shares (
+            stock_code TEXT PRIMARY KEY,
+            float_shares INTEGER,
+            shares_outstanding INTEGER,
+            market_cap INTEGER,
+            fetched_at REAL NOT NULL
+        )
+    """)
+    return conn
+
+
+def _load():
+    """Read the whole SQLite table into memory once per process"""
+    global _loaded
+    with _lock:
+        if _loaded:
+            return
+        try:
+            conn = _connect()
+            try:
+                rows = conn.execute(
+                    "SELECT stock_code, float_shares, shares_outstanding, market_cap, fetched_at FROM float_shares"
+                ).fetchall()
+            finally:
+                conn.close()
+            for code, float_shares, outstanding, market_cap, fetched_at in rows:
+                _cache[code] = (fetched_at, {
+                    'float_shares': float_shares,
+                    'shares_outstanding': outstanding,
+                    'market_cap': market_cap,
+                })
+        except sqlite3.Error as e:
+            print(f"Warning: Could not read float cache {FLOAT_CACHE_PATH}: {e}")
+        _loaded = True
+
+
+def _save(entries: dict, fetched_at: float):
+    """Persist {stock_code: data} in one transaction"""
+    rows = [(code, data['float_shares'], data['shares_outstanding'], data['market_cap'], fetched_at)
+            for code, data in entries.items()]
+    if not rows:
+        return
+    try:
+        conn = _connect()
+        try:
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO float_shares VALUES (?, ?, ?, ?, ?)", rows)
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"Warning: Could not write float cache {FLOAT_CACHE_PATH}: {e}")
+
+
+def _fetch(stock_code: str) -> dict:
+    """Fetch one stock from Yahoo Finance (raises on network/API errors)"""
+    import yfinance as yf
+    info = yf.Ticker(f"{stock_code}.HK").info or {}
+    return {
+        'float_shares': info.get('floatShares'),
+        'shares_outstanding': info.get('sharesOutstanding'),
+        'market_cap': info.get('marketCap')
+    }
+
+
+def _is_fresh(code: str, now: float) -> bool:
+    entry = _cache.get(code)
+    return entry is not None and now - entry[0] < FLOAT_CACHE_TTL
+
+
+def prefetch_float_shares(stock_codes, max_workers: int = PREFETCH_WORKERS, force: bool = False) -> dict:
+    """
+    Make sure every stock in stock_codes has a fresh cache entry
+
+    Missing or expired entries are fetched in parallel and written to SQLite
+    in one batch. Failed fetches keep the previous (stale) entry if any.
+
+    Returns:
+        {stock_code: data} for all requested codes
+    """
+    _load()
+    codes = list(dict.fromkeys(normalize_code(c) for c in stock_codes))
+    now = time.time()
+    with _lock:
+        todo = codes if force else [c for c in codes if not _is_fresh(c, now)]
+
+    if todo:
+        fetched = {}
+
+        def fetch_one(code):
+            try:
+                fetched[code] = _fetch(code)
+            except Exception:
+                pass  # leave the stale entry (or nothing) in place
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(todo)))) as executor:
+            list(executor.map(fetch_one, todo))
+
+        now = time.time()
+        with _lock:
+            for code, data in fetched.items():
+                _cache[code] = (now, data)
+        _save(fetched, now)
+
+    with _lock:
+        return {c: dict(_cache[c][1]) if c in _cache else dict(EMPTY) for c in codes}
+
+
+def get_float_shares(stock_code: str) -> dict:
+    """Get float shares data (cached, fetched from Yahoo Finance when stale)"""
+    code = normalize_code(stock_code)
+    _load()
+    with _lock:
+        if _is_fresh(code, time.time()):
+            return dict(_cache[code][1])
+    return prefetch_float_shares([code])[code]
+
+
+def get_cached_float_shares(stock_code: str) -> dict:
+    """Cached float data without any network call (may be stale or empty)"""
+    code = normalize_code(stock_code)
+    _load()
+    with _lock:
+        return dict(_cache[code][1]) if code in _cache else dict(EMPTY)
+
+
+def universe_codes() -> list:
+    """Stock codes in the latest saved SFC and HKEX short selling data"""
+    from sfc_short_positions import load_latest_data as load_sfc_latest
+    from hkex_short_selling import load_latest_data as load_hkex_latest
+
+    codes = []
+    try:
+        codes += [str(c) for c in load_sfc_latest()['Stock Code']]
+    except Exception as e:
+        print(f"Warning: Could not load SFC universe: {e}")
+    try:
+        codes += [str(c) for c in load_hkex_latest()['stock_code']]
+    except Exception as e:
+        print(f"Warning: Could not load HKEX universe: {e}")
+    return list(dict.fromkeys(normalize_code(c) for c in codes))
+
+
+def warm_cache(max_workers: int = PREFETCH_WORKERS) -> int:
+    """Prefetch the whole SFC + HKEX universe, returns number of stocks"""
+    codes = universe_codes()
+    if codes:
+        prefetch_float_shares(codes, max_workers=max_workers)
+    return len(codes)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Float Shares Cache')
+    parser.add_argument('--prefetch', '-p', action='store_true', help='Refresh stale entries for the SFC + HKEX universe')
+    parser.add_argument('--force', action='store_true', help='Refetch even fresh entries (with --prefetch)')
+    parser.add_argument('--workers', '-w', type=int, default=PREFETCH_WORKERS, help='Parallel Yahoo Finance requests')
+    parser.add_argument('--stock', '-s', help='Show cached data for a stock code')
+
+    args = parser.parse_args()
+
+    if args.prefetch:
+        codes = universe_codes()
+        start = time.time()
+        data = prefetch_float_shares(codes, max_workers=args.workers, force=args.force)
+        found = sum(1 for d in data.values() if d['float_shares'])
+        print(f"✅ {len(codes)} stocks cached ({found} with float data) in {time.time() - start:.1f}s")
+    if args.stock:
+        print(json.dumps(get_float_shares(args.stock), indent=2))
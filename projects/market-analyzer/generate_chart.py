@@ -8,12 +8,13 @@ import os
 import sys
 import yfinance as yf
 import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
 from matplotlib.patches import Rectangle
 import pytz
 
+from volume_profile import calculate_volume_profile
+
 # Check if mplfinance is available
 try:
     import mplfinance as mpf
@@ -184,76 +185,6 @@ def detect_chart_patterns(data: pd.DataFrame) -> dict:
     return patterns
 
 
-def calculate_volume_profile(data: pd.DataFrame, num_bins: int = 30) -> tuple:
-    """
-    Calculate Volume Profile data
-    
-    Returns:
-        price_levels: array of price levels
-        volumes: volume at each price level
-        poc: Point of Control (highest volume price)
-        vah: Value Area High
-        val: Value Area Low
-    """
-    price_min = data['Low'].min()
-    price_max = data['High'].max()
-    bin_size = (price_max - price_min) / num_bins
-    
-    # Initialize volume profile
-    price_levels = []
-    volumes = []
-    
-    for i in range(num_bins):
-        bin_low = price_min + (i * bin_size)
-        bin_high = bin_low + bin_size
-        bin_mid = (bin_low + bin_high) / 2
-        price_levels.append(bin_mid)
-        
-        # Calculate volume in this price range
-        vol = 0
-        for idx, row in data.iterrows():
-            if row['High'] >= bin_low and row['Low'] <= bin_high:
-                # Proportional volume distribution
-                candle_range = row['High'] - row['Low'] if row['High'] > row['Low'] else 1
-                overlap_low = max(row['Low'], bin_low)
-                overlap_high = min(row['High'], bin_high)
-                overlap_pct = (overlap_high - overlap_low) / candle_range
-                vol += row['Volume'] * overlap_pct
-        volumes.append(vol)
-    
-    # Find POC (Point of Control)
-    max_vol_idx = np.argmax(volumes)
-    poc = price_levels[max_vol_idx]
-    
-    # Calculate Value Area (70% of volume)
-    total_vol = sum(volumes)
-    target_vol = total_vol * 0.70
-    
-    # Start from POC and expand outward
-    accumulated = volumes[max_vol_idx]
-    lower_idx = max_vol_idx
-    upper_idx = max_vol_idx
-    
-    while accumulated < target_vol:
-        # Expand to the side with more volume
-        lower_vol = volumes[lower_idx - 1] if lower_idx > 0 else 0
-        upper_vol = volumes[upper_idx + 1] if upper_idx < len(volumes) - 1 else 0
-        
-        if lower_vol >= upper_vol and lower_idx > 0:
-            lower_idx -= 1
-            accumulated += lower_vol
-        elif upper_idx < len(volumes) - 1:
-            upper_idx += 1
-            accumulated += upper_vol
-        else:
-            break
-    
-    val = price_levels[lower_idx]
-    vah = price_levels[upper_idx]
-    
-    return np.array(price_levels), np.array(volumes), poc, vah, val
-
-
 def generate_chart(symbol: str, market: str = 'HK', period: str = '13mo', 
                    output_dir: str = '/root/clawd/research/charts') -> str:
     """
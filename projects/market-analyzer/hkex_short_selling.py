@@ -8,10 +8,14 @@ Data Source: https://www.hkex.com.hk/Market-Data/Statistics/Securities-Market/Sh
 
 import json
 import os
+import re
 from datetime import datetime, timedelta
 from pathlib import Path
 import pandas as pd
 
+from float_cache import get_float_shares, prefetch_float_shares, normalize_code
+from short_history import append_hkex
+
 # Data storage path
 DATA_DIR = Path(__file__).parent / "data" / "hkex_short_selling"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -20,13 +24,50 @@ HKEX_URL = "https://www.hkex.com.hk/Market-Data/Statistics/Securities-Market/Sho
 
 HKEX_MAIN_BOARD_URL = "https://www.hkex.com.hk/Market-Data/Statistics/Securities-Market/Short-Selling-Turnover-Today/Short-Selling-Turnover-(Main-Board)-up-to-day-close-today?sc_lang=en"
 
+# One stock per line: number, name, optional currency, shares, value (commas)
+#         1  CKH HOLDINGS           1,520,500    100,518,925
+# [^\S\n] is whitespace that can't run onto the next line
+STOCK_LINE_PATTERN = re.compile(
+    r'^[^\S\n]*(\d+)[^\S\n]+([A-Z][A-Z0-9 \t\-&\'\.]+?)[^\S\n]+(?:(?:HKD|RMB|USD)[^\S\n]+)?'
+    r'([\d,]+)[^\S\n]+([\d,]+)[^\S\n]*$',
+    re.MULTILINE
+)
+TRADING_DATE_PATTERN = re.compile(r'TRADING DATE[^\n]*?(\d{1,2}[^\S\n]+\w+[^\S\n]+\d{4})')
+
+SHORT_SELLING_COLUMNS = ['stock_code', 'stock_name', 'short_turnover_shares', 'short_turnover_hkd', 'trading_date']
+
+
+def parse_short_selling_text(text: str) -> pd.DataFrame:
+    """
+    Parse HKEX short selling turnover text (web page or fixed-format report)
+    in one pass over the whole text
+    
+    Returns:
+        DataFrame with SHORT_SELLING_COLUMNS (int64 shares, float64 HK$),
+        empty if no stock lines were found
+    """
+    rows = STOCK_LINE_PATTERN.findall(text)
+    if not rows:
+        return pd.DataFrame()
+    
+    match = TRADING_DATE_PATTERN.search(text)
+    trading_date = match.group(1) if match else None
+    
+    df = pd.DataFrame(rows, columns=SHORT_SELLING_COLUMNS[:4])
+    df['stock_code'] = df['stock_code'].str.zfill(4)
+    df['stock_name'] = df['stock_name'].str.strip()
+    df['short_turnover_shares'] = df['short_turnover_shares'].str.replace(',', '', regex=False).astype('int64')
+    df['short_turnover_hkd'] = df['short_turnover_hkd'].str.replace(',', '', regex=False).astype('float64')
+    df['trading_date'] = trading_date
+    return df
+
+
 def fetch_short_selling_data() -> pd.DataFrame:
     """
     Fetch daily short selling turnover data from HKEX using Playwright
     Returns DataFrame with stock-level short selling data
     """
     from playwright.sync_api import sync_playwright
-    import re
     
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
@@ -42,50 +83,15 @@ def fetch_short_selling_data() -> pd.DataFrame:
         visible_text = page.evaluate('() => document.body.innerText')
         
         browser.close()
-        
-        # Parse the text format data
-        # Format: CODE   NAME OF STOCK               (SH)            ($)
-        #         1  CKH HOLDINGS           1,520,500    100,518,925
-        
-        data = []
-        lines = visible_text.split('\n')
-        
-        # Find the trading date
-        trading_date = None
-        for line in lines:
-            if 'TRADING DATE' in line:
-                match = re.search(r'(\d{1,2}\s+\w+\s+\d{4})', line)
-                if match:
-                    trading_date = match.group(1)
-                break
-        
-        # Parse stock data
-        # Pattern: number, name, shares (with commas), value (with commas)
-        pattern = re.compile(r'^\s*(\d+)\s+([A-Z][A-Z0-9\s\-&\'\.]+?)\s+([\d,]+)\s+([\d,]+)\s*$')
-        
-        for line in lines:
-            match = pattern.match(line)
-            if match:
-                code = match.group(1).zfill(4)
-                name = match.group(2).strip()
-                shares = int(match.group(3).replace(',', ''))
-                value = int(match.group(4).replace(',', ''))
-                
-                data.append({
-                    'stock_code': code,
-                    'stock_name': name,
-                    'short_turnover_shares': shares,
-                    'short_turnover_hkd': value,
-                    'trading_date': trading_date
-                })
-        
-        if data:
-            df = pd.DataFrame(data)
-            print(f"Parsed {len(df)} stocks from HKEX")
-            return df
-        else:
-            print("No data parsed from page")
-            return pd.DataFrame()
+    
+    # Format: CODE   NAME OF STOCK               (SH)            ($)
+    #         1  CKH HOLDINGS           1,520,500    100,518,925
+    df = parse_short_selling_text(visible_text)
+    if df.empty:
+        print("No data parsed from page")
+    else:
+        print(f"Parsed {len(df)} stocks from HKEX")
+    return df
 
 
 def fetch_with_api() -> dict:
@@ -116,29 +122,14 @@ def fetch_with_api() -> dict:
     return {}
 
 
-def get_float_shares(stock_code: str) -> dict:
-    """Get float shares data from Yahoo Finance"""
-    try:
-        import yfinance as yf
-        ticker_symbol = f"{stock_code.zfill(4)}.HK"
-        ticker = yf.Ticker(ticker_symbol)
-        info = ticker.info
-        return {
-            'float_shares': info.get('floatShares'),
-            'shares_outstanding': info.get('sharesOutstanding'),
-            'market_cap': info.get('marketCap')
-        }
-    except Exception as e:
-        return {'float_shares': None, 'shares_outstanding': None, 'market_cap': None}
-
-
 def save_data(df: pd.DataFrame, date: str = None):
-    """Save data to JSON file"""
+    """Save data to JSON file (and append it to the history store)"""
     if date is None:
         date = datetime.now().strftime('%Y-%m-%d')
     
     filepath = DATA_DIR / f"hkex_short_selling_{date}.json"
     df.to_json(filepath, orient='records', indent=2)
+    append_hkex(df, date)
     return filepath
 
 
@@ -184,23 +175,8 @@ def fetch_hkex_report_txt():
 
 
 def parse_hkex_txt(text: str) -> pd.DataFrame:
-    """Parse HKEX fixed-format text file"""
-    lines = text.strip().split('\n')
-    data = []
-    
-    for line in lines:
-        # Parse based on fixed column positions
-        # Typical format: StockCode  Name  ShortTurnover  TotalTurnover  %
-        parts = line.split()
-        if len(parts) >= 4 and parts[0].isdigit():
-            data.append({
-                'stock_code': parts[0],
-                'short_turnover': parts[-3] if len(parts) > 3 else None,
-                'total_turnover': parts[-2] if len(parts) > 2 else None,
-                'short_ratio': parts[-1] if len(parts) > 1 else None
-            })
-    
-    return pd.DataFrame(data)
+    """Parse HKEX fixed-format text file (same columns as fetch_short_selling_data)"""
+    return parse_short_selling_text(text)
 
 
 def add_float_data(df: pd.DataFrame, top_n: int = None) -> pd.DataFrame:
@@ -208,22 +184,24 @@ def add_float_data(df: pd.DataFrame, top_n: int = None) -> pd.DataFrame:
     if top_n:
         df = df.nlargest(top_n, 'short_turnover_hkd')
     
-    result = []
-    for _, row in df.iterrows():
-        stock_code = row['stock_code']
-        float_data = get_float_shares(stock_code)
-        
-        item = row.to_dict()
-        if float_data['float_shares']:
-            item['float_shares'] = float_data['float_shares']
-            # Note: This is daily TURNOVER as % of float, not position
-            item['daily_turnover_pct_of_float'] = round(row['short_turnover_shares'] / float_data['float_shares'] * 100, 4)
-        if float_data['shares_outstanding']:
-            item['shares_outstanding'] = float_data['shares_outstanding']
-        
-        result.append(item)
+    if df.empty:
+        return pd.DataFrame()
+    
+    # Fetch stale/missing float data in parallel, then join it in one merge
+    float_map = prefetch_float_shares(df['stock_code'])
+    floats = pd.DataFrame.from_dict(float_map, orient='index', columns=['float_shares', 'shares_outstanding', 'market_cap'])
+    floats = floats[['float_shares', 'shares_outstanding']].apply(pd.to_numeric).replace(0, float('nan'))
+    
+    result = df.assign(_code=df['stock_code'].map(normalize_code).values)
+    result = result.merge(floats, left_on='_code', right_index=True, how='left').drop(columns='_code')
+    # Note: This is daily TURNOVER as % of float, not position
+    result['daily_turnover_pct_of_float'] = (result['short_turnover_shares'] / result['float_shares'] * 100).round(4)
     
-    return pd.DataFrame(result)
+    # Float columns without any data are left out, like rows without it
+    empty = [c for c in ('float_shares', 'daily_turnover_pct_of_float', 'shares_outstanding') if result[c].isna().all()]
+    result = result.drop(columns=empty)
+    columns = [c for c in result.columns if c != 'shares_outstanding'] + (['shares_outstanding'] if 'shares_outstanding' in result.columns else [])
+    return result[columns].reset_index(drop=True)
 
 
 if __name__ == "__main__":
@@ -284,7 +262,7 @@ if __name__ == "__main__":
                     print(f"{'#':>2} {'Code':<6} {'Name':<20} {'Shares':>14} {'Value (HK$)':>14}")
                     print("-" * 65)
                     for i, (_, row) in enumerate(top_df.iterrows(), 1):
-                        print(f"{i:2}. {row['stock_code']:<6} {row['stock_name'][:18]:<20} {row['short_turnover_shares']:>13,} {row['short_turnover_hkd']:>13,}")
+                        print(f"{i:2}. {row['stock_code']:<6} {row['stock_name'][:18]:<20} {row['short_turnover_shares']:>13,} {row['short_turnover_hkd']:>13,.0f}")
             
             if args.save and not args.stock:
                 filepath = save_data(df)
@@ -0,0 +1,88 @@
+"""
+Relative Strength Score Engine
+Cross-sectional RS scores for a whole basket, shared by rs.py and rrg_rs_analyzer.py
+
+A symbol's score on a date is the number of other symbols it outperformed
+over `window` bars minus the number it underperformed. Symbols without a
+valid return on that date score 0 and don't count for the others.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict
+
+
+def rs_score_matrix(close_data: pd.DataFrame, window: int) -> pd.DataFrame:
+    """
+    RS scores for every date and symbol in one pass
+
+    Returns are computed once for the whole panel and ranked per date:
+    with min/max ranks among the n valid returns on a date,
+        outperformed  = rank_min - 1
+        underperformed = n - rank_max
+    so the score is rank_min + rank_max - n - 1 (ties count for neither side).
+
+    Args:
+        close_data: date x symbol close prices
+        window: lookback in bars for the percentage change
+
+    Returns:
+        date x symbol DataFrame of int scores
+    """
+    returns = close_data.pct_change(periods=window)
+    rank_min = returns.rank(axis=1, method='min')
+    rank_max = returns.rank(axis=1, method='max')
+    valid_count = returns.notna().sum(axis=1)
+
+    scores = rank_min.add(rank_max).sub(valid_count + 1, axis=0)
+    return scores.fillna(0).astype(np.int64)
+
+
+def calculate_relative_strength(close_data: pd.DataFrame, window: int, date) -> Dict:
+    """Calculate relative strength scores for one date ({symbol: score})"""
+    scores = rs_score_matrix(close_data.loc[:date], window)
+    return {symbol: int(score) for symbol, score in scores.iloc[-1].items()}
+
+
+def rs_rank_matrix(scores: pd.DataFrame) -> pd.DataFrame:
+    """Rank per date (1 = strongest); ties keep column order like a stable sort"""
+    return scores.rank(axis=1, method='first', ascending=False).astype(np.int64)
+
+
+def first_changed_row(old_close: pd.DataFrame, new_close: pd.DataFrame) -> int:
+    """
+    Position in new_close of the first row that differs from old_close
+
+    Returns len(new_close) if nothing changed, 0 if the columns differ.
+    """
+    if not old_close.columns.equals(new_close.columns):
+        return 0
+    common = new_close.index.intersection(old_close.index)
+    if len(common) < len(old_close.index[old_close.index >= new_close.index[0]]):
+        return 0  # rows disappeared inside the overlap, rebuild everything
+
+    old_rows = old_close.loc[common]
+    new_rows = new_close.loc[common]
+    same = ((old_rows == new_rows) | (old_rows.isna() & new_rows.isna())).all(axis=1)
+    changed = np.flatnonzero(~same.to_numpy())
+    if len(changed):
+        return new_close.index.get_loc(common[changed[0]])
+    return new_close.index.get_loc(common[-1]) + 1 if len(common) else 0
+
+
+def update_rs_score_matrix(scores: pd.DataFrame, close_data: pd.DataFrame,
+                           window: int, first_changed: int) -> pd.DataFrame:
+    """
+    Recompute only the rows of a score matrix from `first_changed` onward
+
+    A score on row t depends on closes at t and t - window, so the tail is
+    rebuilt from `window` rows of context before first_changed.
+    """
+    if first_changed <= 0 or scores is None:
+        return rs_score_matrix(close_data, window)
+    if first_changed >= len(close_data):
+        return scores
+
+    start = max(0, first_changed - window)
+    tail = rs_score_matrix(close_data.iloc[start:], window).iloc[first_changed - start:]
+    return pd.concat([scores.iloc[:first_changed], tail])
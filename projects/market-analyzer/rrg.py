@@ -11,14 +11,23 @@ import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 import logging
 
+from rrg_quadrants import calculate_rrg_panel, label_quadrants, quadrant_names
+
 app = Flask(__name__)
 CORS(app)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# RRG windows: RS-Ratio short/long MA, RS-Momentum short/long MA
+RRG_WINDOWS = {'ratio_short': 10, 'ratio_long': 26, 'momentum_short': 1, 'momentum_long': 4}
+
+# Concurrent real-time quote lookups
+REALTIME_WORKERS = 16
+
 # Define universe configurations
 UNIVERSE_CONFIG = {
     "WORLD": {
@@ -195,23 +204,56 @@ def get_realtime_price(ticker):
         return None
 
 
-def calculate_ma(data, period):
-    """Calculate moving average"""
-    return data.rolling(window=period).mean()
-
-
-def calculate_rrg_values(asset_data, benchmark_data):
+def build_rrg_results(data, benchmark_ticker, assets, tail_length):
     """
-    Calculate RS-Ratio and RS-Momentum for RRG
+    Build the /rrg asset list for a universe with one vectorized RRG pass
+
+    Assets without data or with fewer than tail_length + 1 RS-Ratio values are skipped.
     """
-    sbr = asset_data / benchmark_data
-    rs1 = calculate_ma(sbr, 10)
-    rs2 = calculate_ma(sbr, 26)
-    rs_ratio = 100 * ((rs1 - rs2) / rs2 + 1)
-    rm1 = calculate_ma(rs_ratio, 1)
-    rm2 = calculate_ma(rs_ratio, 4)
-    rs_momentum = 100 * ((rm1 - rm2) / rm2 + 1)
-    return rs_ratio, rs_momentum
+    tickers = [asset["ticker"] for asset in assets if asset["ticker"] in data.columns]
+    for asset in assets:
+        if asset["ticker"] not in data.columns:
+            logger.warning(f"No data for ticker {asset['ticker']}, skipping")
+
+    # Duplicate tickers (e.g. benchmark also listed as an asset) are computed once
+    panel = data.loc[:, ~data.columns.duplicated()][list(dict.fromkeys(tickers))]
+    rs_ratio, rs_momentum = calculate_rrg_panel(panel, data[benchmark_ticker], **RRG_WINDOWS)
+    quadrant = quadrant_names(label_quadrants(rs_ratio, rs_momentum))
+    valid_counts = rs_ratio.notna().sum()
+
+    ratio_values = rs_ratio.to_numpy()
+    momentum_values = rs_momentum.to_numpy()
+    column_pos = {ticker: i for i, ticker in enumerate(rs_ratio.columns)}
+    trail_start = max(len(rs_ratio) - tail_length, 0)
+
+    results = []
+    for asset in assets:
+        ticker = asset["ticker"]
+        if ticker not in column_pos:
+            continue
+        col = column_pos[ticker]
+        if valid_counts.iat[col] < tail_length + 1:
+            logger.warning(f"Not enough data for {ticker}, skipping")
+            continue
+
+        ratios = ratio_values[trail_start:, col]
+        momentums = momentum_values[trail_start:, col]
+        trail_data = [
+            [round(float(r), 2), round(float(m), 2)]
+            for r, m in zip(ratios, momentums)
+            if not (np.isnan(r) or np.isnan(m))
+        ]
+
+        results.append({
+            "name": ticker,
+            "label": asset["label"],
+            "rsRatio": round(float(ratio_values[-1, col]), 2),
+            "rsMomentum": round(float(momentum_values[-1, col]), 2),
+            "quadrant": quadrant[-1, col],
+            "trail": trail_data
+        })
+
+    return results
 
 
 def fetch_stock_data(tickers, timeframe='weekly', weeks=100):
@@ -253,11 +295,11 @@ def fetch_stock_data(tickers, timeframe='weekly', weeks=100):
         if last_data_date and last_data_date < datetime.now().date():
             logger.info(f"Last data date is {last_data_date}, fetching real-time prices for today")
             
-            realtime_prices = {}
-            for ticker in tickers:
-                price = get_realtime_price(ticker)
-                if price is not None:
-                    realtime_prices[ticker] = price
+            with ThreadPoolExecutor(max_workers=REALTIME_WORKERS) as executor:
+                prices = executor.map(get_realtime_price, tickers)
+            realtime_prices = {
+                ticker: price for ticker, price in zip(tickers, prices) if price is not None
+            }
             
             if realtime_prices:
                 # Create a new row with today's date
@@ -366,43 +408,7 @@ def get_rrg_data():
                 "error": f"No data available for benchmark {benchmark_ticker}"
             }), 500
 
-        results = []
-        benchmark_data = data[benchmark_ticker]
-
-        for asset in assets:
-            ticker = asset["ticker"]
-            label = asset["label"]
-
-            if ticker not in data.columns:
-                logger.warning(f"No data for ticker {ticker}, skipping")
-                continue
-
-            asset_data = data[ticker]
-            rs_ratio, rs_momentum = calculate_rrg_values(asset_data, benchmark_data)
-
-            valid_data = rs_ratio.dropna()
-            if len(valid_data) < tail_length + 1:
-                logger.warning(f"Not enough data for {ticker}, skipping")
-                continue
-
-            trail_data = []
-            for i in range(-tail_length, 0):
-                if pd.notna(rs_ratio.iloc[i]) and pd.notna(rs_momentum.iloc[i]):
-                    trail_data.append([
-                        round(float(rs_ratio.iloc[i]), 2),
-                        round(float(rs_momentum.iloc[i]), 2)
-                    ])
-
-            current_rs_ratio = round(float(rs_ratio.iloc[-1]), 2)
-            current_rs_momentum = round(float(rs_momentum.iloc[-1]), 2)
-
-            results.append({
-                "name": ticker,
-                "label": label,
-                "rsRatio": current_rs_ratio,
-                "rsMomentum": current_rs_momentum,
-                "trail": trail_data
-            })
+        results = build_rrg_results(data, benchmark_ticker, assets, tail_length)
 
         return jsonify({
             "success": True,
@@ -474,43 +480,7 @@ def get_rrg_custom():
         if benchmark_ticker not in data.columns:
             return jsonify({"success": False, "error": f"No data available for benchmark {benchmark_ticker}"}), 500
         
-        results = []
-        benchmark_data = data[benchmark_ticker]
-        
-        for asset in assets:
-            ticker = asset["ticker"]
-            label = asset["label"]
-            
-            if ticker not in data.columns:
-                logger.warning(f"No data for ticker {ticker}, skipping")
-                continue
-            
-            asset_data = data[ticker]
-            rs_ratio, rs_momentum = calculate_rrg_values(asset_data, benchmark_data)
-            
-            valid_data = rs_ratio.dropna()
-            if len(valid_data) < tail_length + 1:
-                logger.warning(f"Not enough data for {ticker}, skipping")
-                continue
-            
-            trail_data = []
-            for i in range(-tail_length, 0):
-                if pd.notna(rs_ratio.iloc[i]) and pd.notna(rs_momentum.iloc[i]):
-                    trail_data.append([
-                        round(float(rs_ratio.iloc[i]), 2),
-                        round(float(rs_momentum.iloc[i]), 2)
-                    ])
-            
-            current_rs_ratio = round(float(rs_ratio.iloc[-1]), 2)
-            current_rs_momentum = round(float(rs_momentum.iloc[-1]), 2)
-            
-            results.append({
-                "name": ticker,
-                "label": label,
-                "rsRatio": current_rs_ratio,
-                "rsMomentum": current_rs_momentum,
-                "trail": trail_data
-            })
+        results = build_rrg_results(data, benchmark_ticker, assets, tail_length)
         
         return jsonify({
             "success": True,
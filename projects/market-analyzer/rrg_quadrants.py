@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+RRG Engine
+==========
+RS-Ratio / RS-Momentum and quadrant labels for a whole (date x symbol) panel.
+Shared by the RRG API (rrg.py), rrg_rs_analyzer.py, the squeeze + RRG scripts
+and the root rrg_*_backtest.py scripts; no Flask dependency.
+
+Quadrants are stored as a compact int8 array instead of per-symbol object
+Series, and transitions such as Lagging -> Improving emergence are derived
+with array operations.
+"""
+
+import numpy as np
+import pandas as pd
+
+# =============================================================================
+# QUADRANT CODES
+# =============================================================================
+
+NO_QUADRANT = -1
+LEADING = 0
+IMPROVING = 1
+LAGGING = 2
+WEAKENING = 3
+
+QUADRANT_NAMES = {
+    LEADING: "Leading",
+    IMPROVING: "Improving",
+    LAGGING: "Lagging",
+    WEAKENING: "Weakening",
+}
+
+# Names indexed by code; the trailing '' is picked up by NO_QUADRANT (-1)
+_NAME_LOOKUP = np.array([QUADRANT_NAMES[q] for q in range(4)] + [''], dtype=object)
+
+# =============================================================================
+# RS-RATIO / RS-MOMENTUM
+# =============================================================================
+
+def rolling_mean_2d(values, window):
+    """
+    Rolling mean down the rows of a 2D array (all columns in one pass)
+
+    Matches pandas rolling(window).mean(): NaN until `window` rows are
+    available and wherever the window contains a NaN.
+    """
+    out = np.full(values.shape, np.nan)
+    if window <= len(values):
+        windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=0)
+        out[window - 1:] = windows.mean(axis=-1)
+    return out
+
+def calculate_rrg_panel(close_data, benchmark_close,
+                        ratio_short=10, ratio_long=26,
+                        momentum_short=1, momentum_long=4):
+    """
+    Calculate RS-Ratio and RS-Momentum for every column at once
+
+    Args:
+        close_data: DataFrame of asset closes (one column per symbol)
+        benchmark_close: Series of benchmark closes on the same index
+
+    Returns:
+        (rs_ratio, rs_momentum) DataFrames shaped like close_data
+    """
+    sbr = close_data.div(benchmark_close, axis=0).to_numpy(dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rs1 = rolling_mean_2d(sbr, ratio_short)
+        rs2 = rolling_mean_2d(sbr, ratio_long)
+        ratio = 100 * ((rs1 - rs2) / rs2 + 1)
+        rm1 = rolling_mean_2d(ratio, momentum_short)
+        rm2 = rolling_mean_2d(ratio, momentum_long)
+        momentum = 100 * ((rm1 - rm2) / rm2 + 1)
+
+    rs_ratio = pd.DataFrame(ratio, index=close_data.index, columns=close_data.columns)
+    rs_momentum = pd.DataFrame(momentum, index=close_data.index, columns=close_data.columns)
+    return rs_ratio, rs_momentum
+
+# =============================================================================
+# QUADRANT LABELS
+# =============================================================================
+
+def label_quadrants(rs_ratio, rs_momentum):
+    """
+    Quadrant code for every cell of the panel
+
+    Returns:
+        int8 array shaped like rs_ratio (NO_QUADRANT where either value is NaN)
+    """
+    ratio = np.asarray(rs_ratio, dtype=float)
+    momentum = np.asarray(rs_momentum, dtype=float)
+    with np.errstate(invalid='ignore'):
+        return np.select(
+            [np.isnan(ratio) | np.isnan(momentum),
+             (ratio >= 100) & (momentum >= 100),
+             (ratio < 100) & (momentum >= 100),
+             (ratio < 100) & (momentum < 100)],
+            [NO_QUADRANT, LEADING, IMPROVING, LAGGING],
+            default=WEAKENING
+        ).astype(np.int8)
+
+def quadrant_name(code):
+    """Quadrant name for a code (None for NO_QUADRANT)"""
+    return QUADRANT_NAMES.get(int(code))
+
+def quadrant_names(codes):
+    """Object array of names for an array of codes ('' for NO_QUADRANT)"""
+    return _NAME_LOOKUP[np.asarray(codes)]
+
+# =============================================================================
+# TRANSITIONS
+# =============================================================================
+
+def detect_transitions(codes, from_quadrants, to_quadrants):
+    """
+    True where the quadrant moved from one of from_quadrants (previous bar)
+    to one of to_quadrants (current bar). Row 0 is always False.
+    """
+    codes = np.asarray(codes)
+    transitions = np.zeros(codes.shape, dtype=bool)
+    transitions[1:] = np.isin(codes[:-1], from_quadrants) & np.isin(codes[1:], to_quadrants)
+    return transitions
+
+def transition_counts(codes):
+    """4x4 DataFrame of from -> to quadrant transition counts over the panel"""
+    codes = np.asarray(codes)
+    prev, curr = codes[:-1].ravel(), codes[1:].ravel()
+    valid = (prev >= 0) & (curr >= 0)
+    counts = np.bincount(prev[valid] * 4 + curr[valid], minlength=16).reshape(4, 4)
+    names = [QUADRANT_NAMES[q] for q in range(4)]
+    return pd.DataFrame(counts, index=names, columns=names)
+
+def track_emergence(codes):
+    """
+    Emergence from Lagging for every symbol and bar
+
+    An emergence starts on a Lagging -> Improving/Leading bar (day 1) and
+    counts every later bar with a quadrant until the next Lagging bar.
+    Bars without a quadrant neither count nor reset.
+
+    Returns:
+        days_out: int array, days since emergence (0 when not emerging)
+        episode_start: int array, row index of the emergence bar (-1 when not emerging)
+    """
+    codes = np.asarray(codes)
+    if codes.ndim == 1:
+        codes = codes[:, None]
+    rows = np.arange(len(codes))[:, None]
+
+    emerged = detect_transitions(codes, [LAGGING], [IMPROVING, LEADING])
+    reset = emerged | (codes == LAGGING)
+
+    # Last reset bar at or before each row, and whether it was an emergence
+    last_reset = np.maximum.accumulate(np.where(reset, rows, -1), axis=0)
+    has_reset = last_reset >= 0
+    cols = np.arange(codes.shape[1])[None, :]
+    in_episode = has_reset & emerged[np.maximum(last_reset, 0), cols]
+
+    # Quadrant bars counted since the emergence bar (inclusive)
+    counted = np.cumsum(codes >= 0, axis=0)
+    days_out = np.where(in_episode, counted - counted[np.maximum(last_reset, 0), cols] + 1, 0)
+    episode_start = np.where(in_episode, last_reset, -1)
+
+    return days_out, episode_start
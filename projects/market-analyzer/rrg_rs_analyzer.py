@@ -13,6 +13,9 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import logging
 
+from relative_strength import rs_score_matrix
+from rrg_quadrants import calculate_rrg_panel, label_quadrants, quadrant_names
+
 # Configure Chinese font for matplotlib
 import matplotlib.font_manager as fm
 import os
@@ -78,35 +81,38 @@ HK_SYMBOLS = [
 ]
 
 
-def calculate_ma(data, period):
-    """Calculate moving average"""
-    return data.rolling(window=period).mean()
+def get_rrg_quadrant(rs_ratio: float, rs_momentum: float) -> str:
+    """Determine RRG quadrant ('' when either value is NaN)"""
+    return quadrant_names(label_quadrants(rs_ratio, rs_momentum))
+
 
+def get_benchmark(market: str) -> str:
+    """Benchmark index for a market"""
+    return '^HSI' if market.upper() == 'HK' else '^GSPC'
 
-def calculate_rrg_values(asset_data, benchmark_data):
-    """
-    Calculate RS-Ratio and RS-Momentum for RRG
+
+def normalize_ticker(ticker: str, market: str) -> str:
+    """Convert ticker to Yahoo Finance format (HK stocks need 4-digit .HK form)"""
+    if market.upper() == 'HK' and not ticker.endswith('.HK'):
+        return f"{ticker.zfill(4)}.HK"
+    return ticker
+
+
+def get_rs_basket(ticker: str, market: str) -> Tuple[str, List[str], bool]:
     """
-    sbr = asset_data / benchmark_data
-    rs1 = calculate_ma(sbr, 10)
-    rs2 = calculate_ma(sbr, 26)
-    rs_ratio = 100 * ((rs1 - rs2) / rs2 + 1)
-    rm1 = calculate_ma(rs_ratio, 1)
-    rm2 = calculate_ma(rs_ratio, 4)
-    rs_momentum = 100 * ((rm1 - rm2) / rm2 + 1)
-    return rs_ratio, rs_momentum
+    Get the RS comparison basket for a ticker
 
+    Returns:
+        (normalized ticker, basket symbols incl. ticker, whether ticker was in the original basket)
+    """
+    ticker = normalize_ticker(ticker, market)
+    basket = HK_SYMBOLS.copy() if market.upper() == 'HK' else US_SYMBOLS.copy()
 
-def get_rrg_quadrant(rs_ratio: float, rs_momentum: float) -> str:
-    """Determine RRG quadrant"""
-    if rs_ratio >= 100 and rs_momentum >= 100:
-        return "Leading"
-    elif rs_ratio < 100 and rs_momentum >= 100:
-        return "Improving"
-    elif rs_ratio < 100 and rs_momentum < 100:
-        return "Lagging"
-    else:  # rs_ratio >= 100 and rs_momentum < 100
-        return "Weakening"
+    ticker_in_basket = ticker in basket or ticker.upper() in [s.upper() for s in basket]
+    if not ticker_in_basket:
+        basket.append(ticker)
+        logger.info(f"Added {ticker} to basket (not originally in list)")
+    return ticker, basket, ticker_in_basket
 
 
 def get_rrg_quadrant_zh(quadrant: str) -> str:
@@ -121,7 +127,8 @@ def get_rrg_quadrant_zh(quadrant: str) -> str:
 
 
 def generate_rrg_chart(ticker: str, market: str = 'HK', 
-                       output_path: str = None, tail_length: int = 8) -> Dict:
+                       output_path: str = None, tail_length: int = 8,
+                       close_data: Optional[pd.DataFrame] = None) -> Dict:
     """
     Generate RRG chart for a single ticker against benchmark
     
@@ -130,25 +137,25 @@ def generate_rrg_chart(ticker: str, market: str = 'HK',
         market: 'HK' or 'US'
         output_path: Path to save chart
         tail_length: Number of weeks for trail
+        close_data: Optional daily closes with ticker and benchmark columns
+                    (skips the download when the caller already has the bars)
     
     Returns:
         Dict with RRG data and chart path
     """
     try:
         # Set benchmark based on market
-        if market.upper() == 'HK':
-            benchmark = '^HSI'
-            if not ticker.endswith('.HK'):
-                ticker = f"{ticker.zfill(4)}.HK"
-        else:
-            benchmark = '^GSPC'
+        benchmark = get_benchmark(market)
+        ticker = normalize_ticker(ticker, market)
         
-        # Fetch data (weekly, 100 weeks)
-        end_date = datetime.now()
-        start_date = end_date - timedelta(weeks=100)
-        
-        tickers_to_fetch = [ticker, benchmark]
-        data = yf.download(tickers_to_fetch, start=start_date, end=end_date, progress=False)['Close']
+        if close_data is None:
+            # Fetch data (weekly, 100 weeks)
+            end_date = datetime.now()
+            start_date = end_date - timedelta(weeks=100)
+            
+            tickers_to_fetch = [ticker, benchmark]
+            close_data = yf.download(tickers_to_fetch, start=start_date, end=end_date, progress=False)['Close']
+        data = close_data
         
         if isinstance(data, pd.Series):
             data = data.to_frame(name=ticker)
@@ -163,7 +170,8 @@ def generate_rrg_chart(ticker: str, market: str = 'HK',
         asset_data = data[ticker]
         
         # Calculate RRG values
-        rs_ratio, rs_momentum = calculate_rrg_values(asset_data, benchmark_data)
+        rs_ratio, rs_momentum = calculate_rrg_panel(asset_data.to_frame(), benchmark_data)
+        rs_ratio, rs_momentum = rs_ratio[ticker], rs_momentum[ticker]
         
         # Get trail data
         trail_data = []
@@ -280,38 +288,8 @@ def generate_rrg_chart(ticker: str, market: str = 'HK',
         return {'success': False, 'error': str(e)}
 
 
-def calculate_relative_strength(close_data: pd.DataFrame, window: int, date) -> Dict:
-    """Calculate relative strength scores"""
-    rs_scores = {}
-    data_slice = close_data.loc[:date]
-    
-    for symbol in data_slice.columns:
-        try:
-            symbol_data = data_slice[symbol]
-            pct_change = symbol_data.pct_change(periods=window)
-            
-            if pd.isna(pct_change.iloc[-1]):
-                rs_scores[symbol] = 0
-                continue
-            
-            other_data = data_slice.drop(columns=[symbol])
-            other_pct_change = other_data.pct_change(periods=window)
-            
-            current_val = pct_change.iloc[-1]
-            others_val = other_pct_change.iloc[-1]
-            
-            outperformance = (current_val > others_val).sum()
-            underperformance = (current_val < others_val).sum()
-            
-            rs_scores[symbol] = int(outperformance - underperformance)
-            
-        except Exception as e:
-            rs_scores[symbol] = 0
-    
-    return rs_scores
-
-
-def get_rs_ranking(ticker: str, market: str = 'HK', window: int = 10) -> Dict:
+def get_rs_ranking(ticker: str, market: str = 'HK', window: int = 10,
+                   close_data: Optional[pd.DataFrame] = None) -> Dict:
     """
     Get RS ranking for a ticker
     
@@ -319,35 +297,27 @@ def get_rs_ranking(ticker: str, market: str = 'HK', window: int = 10) -> Dict:
         ticker: Stock ticker
         market: 'HK' or 'US'
         window: Lookback window for RS calculation
+        close_data: Optional daily closes for the whole basket
+                    (skips the download when the caller already has the bars)
     
     Returns:
         Dict with ranking info for current and historical
     """
     try:
         # Select basket
-        if market.upper() == 'HK':
-            basket = HK_SYMBOLS.copy()
-            if not ticker.endswith('.HK'):
-                ticker = f"{ticker.zfill(4)}.HK"
-        else:
-            basket = US_SYMBOLS.copy()
-        
-        # Add ticker if not in basket
-        ticker_in_basket = ticker in basket or ticker.upper() in [s.upper() for s in basket]
-        if not ticker_in_basket:
-            basket.append(ticker)
-            logger.info(f"Added {ticker} to basket (not originally in list)")
+        ticker, basket, ticker_in_basket = get_rs_basket(ticker, market)
         
-        # Fetch data
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=365)
-        
-        data = yf.download(basket, start=start_date, end=end_date, progress=False)
-        
-        if data.empty:
-            return {'success': False, 'error': 'No data available'}
-        
-        close_data = data['Close'] if 'Close' in data.columns else data
+        if close_data is None:
+            # Fetch data
+            end_date = datetime.now()
+            start_date = end_date - timedelta(days=365)
+            
+            data = yf.download(basket, start=start_date, end=end_date, progress=False)
+            
+            if data.empty:
+                return {'success': False, 'error': 'No data available'}
+            
+            close_data = data['Close'] if 'Close' in data.columns else data
         
         # Remove columns with all NaN
         close_data = close_data.dropna(axis=1, how='all')
@@ -359,12 +329,15 @@ def get_rs_ranking(ticker: str, market: str = 'HK', window: int = 10) -> Dict:
         current_date = close_data.index[-1]
         dates_back = [0, 1, 2, 5, 10]  # Current, 1d, 2d, 5d, 10d ago
         
+        # RS scores for every date in one pass
+        score_matrix = rs_score_matrix(close_data, window)
+        
         rankings = {}
         for days_back in dates_back:
             date_idx = max(0, len(close_data) - 1 - days_back)
             date = close_data.index[date_idx]
             
-            rs_scores = calculate_relative_strength(close_data, window, date)
+            rs_scores = score_matrix.iloc[date_idx].to_dict()
             
             # Sort and get ranking
             sorted_scores = sorted(rs_scores.items(), key=lambda x: x[1], reverse=True)
@@ -10,6 +10,11 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import logging
+import os
+import threading
+import time
+
+from relative_strength import rs_rank_matrix, first_changed_row, update_rs_score_matrix
 
 app = Flask(__name__)
 CORS(app)
@@ -58,6 +63,9 @@ HK_SYMBOLS = [
 US_BENCHMARKS = ['^NDX', '^GSPC']
 HK_BENCHMARKS = ['^HSI']
 
+# Seconds before a market's price panel is re-downloaded
+RS_REFRESH_SECONDS = 15 * 60
+
 
 def fetch_stock_data(symbols, days=365):
     """Fetch stock data from Yahoo Finance"""
@@ -79,6 +87,112 @@ def fetch_stock_data(symbols, days=365):
         raise
 
 
+class RSScoreStore:
+    """
+    Precomputed date x symbol RS score and rank matrices per (market, window)
+
+    The price panel for each market is re-downloaded at most every
+    RS_REFRESH_SECONDS and merged onto the stored history. Score matrices
+    are then only recomputed from the first row whose prices changed
+    (normally just the newest bar), so requests read straight from memory.
+    """
+
+    def __init__(self, refresh_seconds=RS_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._refresh_locks = {}  # market -> lock held while downloading
+        self._data = {}        # market -> full OHLCV panel (Price, Ticker)
+        self._fetched_at = {}  # market -> time.time() of last download
+        self._scores = {}      # (market, window) -> (panel version, scores, ranks)
+        self._version = {}     # market -> panel version, bumped on every change
+        self._changed_from = {}  # market -> {version: first changed row}
+
+    def _symbols(self, market):
+        return list(set(HK_SYMBOLS)) if market == 'HK' else list(set(US_SYMBOLS))
+
+    def _refresh_lock(self, market):
+        with self._lock:
+            return self._refresh_locks.setdefault(market, threading.Lock())
+
+    def _is_stale(self, market):
+        return time.time() - self._fetched_at.get(market, 0) > self.refresh_seconds
+
+    def refresh(self, market):
+        """Download the latest panel for a market and merge it onto the stored history"""
+        new_data = fetch_stock_data(self._symbols(market))
+        if new_data.empty:
+            return
+
+        with self._lock:
+            old_data = self._data.get(market)
+            if old_data is None:
+                merged, first_changed = new_data, 0
+            else:
+                merged = pd.concat([old_data[old_data.index < new_data.index[0]], new_data])
+                first_changed = first_changed_row(old_data['Close'], merged['Close'])
+
+            self._fetched_at[market] = time.time()
+            if first_changed >= len(merged):
+                return
+
+            version = self._version.get(market, 0) + 1
+            self._data[market] = merged
+            self._version[market] = version
+            self._changed_from.setdefault(market, {})[version] = first_changed
+            logger.info(f"RS store: {market} panel v{version}, {len(merged)} rows, changed from row {first_changed}")
+
+    def get_data(self, market):
+        """Full OHLCV panel for a market, refreshing it if stale"""
+        if self._is_stale(market):
+            # One download per market: requests that queued behind it re-check
+            # and use the panel it fetched
+            with self._refresh_lock(market):
+                if self._is_stale(market):
+                    self.refresh(market)
+        return self._data.get(market, pd.DataFrame())
+
+    def get_scores(self, market, window):
+        """(scores, ranks) matrices for a market and lookback window"""
+        data = self.get_data(market)
+        if data.empty:
+            return pd.DataFrame(), pd.DataFrame()
+
+        with self._lock:
+            version = self._version[market]
+            cached = self._scores.get((market, window))
+            if cached and cached[0] == version:
+                return cached[1], cached[2]
+
+            # Earliest changed row across all panel versions since the cached one
+            if cached:
+                first_changed = min(row for v, row in self._changed_from[market].items() if v > cached[0])
+                scores = update_rs_score_matrix(cached[1], self._data[market]['Close'], window, first_changed)
+            else:
+                scores = update_rs_score_matrix(None, self._data[market]['Close'], window, 0)
+            ranks = rs_rank_matrix(scores)
+            self._scores[(market, window)] = (version, scores, ranks)
+            return scores, ranks
+
+    def start_background_refresh(self, markets=('US', 'HK'), windows=(10,)):
+        """Keep panels and score matrices warm from a daemon thread"""
+        def loop():
+            while True:
+                for market in markets:
+                    try:
+                        with self._refresh_lock(market):
+                            self.refresh(market)
+                        for window in windows:
+                            self.get_scores(market, window)
+                    except Exception as e:
+                        logger.error(f"RS store refresh failed for {market}: {str(e)}")
+                time.sleep(self.refresh_seconds)
+
+        threading.Thread(target=loop, name='rs-store-refresh', daemon=True).start()
+
+
+rs_store = RSScoreStore()
+
+
 def calculate_ema(data, period):
     """Calculate Exponential Moving Average"""
     return data.ewm(span=period, adjust=False).mean()
@@ -161,52 +275,6 @@ def generate_signal(symbol_data):
         return 'neutral'
 
 
-def calculate_relative_strength(close_data, window, date):
-    """
-    Calculate relative strength scores.
-    Accepts ONLY the 'Close' dataframe (matching Streamlit logic)
-    """
-    try:
-        rs_scores = {}
-        
-        # Ensure we are slicing up to the requested date
-        data_slice = close_data.loc[:date]
-
-        for symbol in data_slice.columns:
-            try:
-                symbol_data = data_slice[symbol]
-
-                # Calculate percentage change over window
-                pct_change = symbol_data.pct_change(periods=window)
-
-                if pd.isna(pct_change.iloc[-1]):
-                    rs_scores[symbol] = 0
-                    continue
-
-                # Compare against all other symbols
-                other_data = data_slice.drop(columns=[symbol])
-                other_pct_change = other_data.pct_change(periods=window)
-                
-                # Use numpy for faster comparison
-                current_val = pct_change.iloc[-1]
-                others_val = other_pct_change.iloc[-1]
-                
-                outperformance = (current_val > others_val).sum()
-                underperformance = (current_val < others_val).sum()
-
-                rs_scores[symbol] = int(outperformance - underperformance)
-
-            except Exception as e:
-                logger.error(f"Error calculating RS for {symbol}: {str(e)}")
-                rs_scores[symbol] = 0
-
-        return rs_scores
-
-    except Exception as e:
-        logger.error(f"Error in calculate_relative_strength: {str(e)}")
-        raise
-
-
 def create_dashboard_data(data, date, rs_scores, benchmarks):
     """Create dashboard data with scores, RSI, and signals"""
     dashboard_stocks = []
@@ -322,8 +390,8 @@ def get_relative_strength():
             symbols = list(set(US_SYMBOLS))  # Remove duplicates
             benchmarks = US_BENCHMARKS
 
-        # Fetch data
-        data = fetch_stock_data(symbols)
+        # Precomputed price panel
+        data = rs_store.get_data(market)
 
         if data.empty:
             return jsonify({
@@ -341,12 +409,10 @@ def get_relative_strength():
 
         logger.info(f"Current date: {current_date}, Previous date: {previous_date}")
 
-        # Pass only the 'Close' data to the RS calculation (Matching Streamlit Logic)
-        close_data = data['Close'] if 'Close' in data.columns else data
-
-        # Calculate RS scores for current and previous dates
-        rs_scores_current = calculate_relative_strength(close_data, window, current_date)
-        rs_scores_previous = calculate_relative_strength(close_data, window, previous_date)
+        # Precomputed RS scores for all dates
+        score_matrix, _ = rs_store.get_scores(market, window)
+        rs_scores_current = score_matrix.loc[current_date].to_dict()
+        rs_scores_previous = score_matrix.loc[previous_date].to_dict()
 
         # Create dashboard data (Pass full data for RSI/Signal calc)
         current_dashboard = create_dashboard_data(data, current_date, rs_scores_current, benchmarks)
@@ -365,7 +431,7 @@ def get_relative_strength():
             period_date_index = max(0, date_index - period)
             period_date = data.index[period_date_index]
 
-            rs_scores_period = calculate_relative_strength(close_data, window, period_date)
+            rs_scores_period = score_matrix.loc[period_date].to_dict()
             period_dashboard = create_dashboard_data(data, period_date, rs_scores_period, benchmarks)
 
             comparison = compare_top_stocks(current_dashboard, period_dashboard)
@@ -406,6 +472,81 @@ def get_relative_strength():
         }), 500
 
 
+@app.route('/rs/history', methods=['GET'])
+def get_relative_strength_history():
+    """
+    RS scores, ranks and rank changes for a date range from the precomputed matrix
+
+    Params: market, window (RS lookback, default 10), start/end (YYYY-MM-DD),
+            change_days (rank change lookback, default 1), symbols (comma list, default all)
+    """
+    try:
+        market = request.args.get('market', 'US').upper()
+        window = int(request.args.get('window', 10))
+        change_days = int(request.args.get('change_days', 1))
+        start = request.args.get('start')
+        end = request.args.get('end')
+        symbols_param = request.args.get('symbols', '')
+
+        logger.info(f"RS history request: market={market}, window={window}, start={start}, end={end}, change_days={change_days}")
+
+        scores, ranks = rs_store.get_scores(market, window)
+        if scores.empty:
+            return jsonify({
+                'success': False,
+                'error': 'No data available'
+            }), 404
+
+        # Rank change over change_days (positive = improved)
+        rank_changes = ranks.shift(change_days) - ranks
+
+        date_slice = slice(start, end)
+        scores = scores.loc[date_slice]
+        ranks = ranks.loc[date_slice]
+        rank_changes = rank_changes.loc[date_slice]
+
+        if symbols_param:
+            requested = [s.strip() for s in symbols_param.split(',') if s.strip()]
+            symbols = [s for s in requested if s in scores.columns]
+        else:
+            symbols = list(scores.columns)
+
+        def to_list(series):
+            return [None if pd.isna(v) else int(v) for v in series]
+
+        result = {
+            'success': True,
+            'data': {
+                'dates': [d.strftime('%Y-%m-%d') for d in scores.index],
+                'total_stocks': len(scores.columns),
+                'symbols': {
+                    symbol: {
+                        'score': to_list(scores[symbol]),
+                        'rank': to_list(ranks[symbol]),
+                        'rank_change': to_list(rank_changes[symbol])
+                    }
+                    for symbol in symbols
+                },
+                'metadata': {
+                    'market': market,
+                    'window': window,
+                    'change_days': change_days,
+                    'num_dates': len(scores.index),
+                    'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                }
+            }
+        }
+
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"Error in get_relative_strength_history: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @app.route('/rs/debug', methods=['GET'])
 def debug_info():
     """Debug endpoint to check available symbols"""
@@ -427,5 +568,13 @@ def debug_info():
 
 
 if __name__ == '__main__':
+    debug = True
+
+    # Keep RS matrices warm so /rs and /rs/history never download on the request path.
+    # The debug reloader runs this block in a watcher process too; only the
+    # serving child (WERKZEUG_RUN_MAIN) starts the refresh thread.
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        rs_store.start_background_refresh()
+
     # Run on port 5002 (different from economic data and RRG)
-    app.run(host='0.0.0.0', port=5002, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5002, debug=debug)
\ No newline at end of file
@@ -8,16 +8,31 @@ import torch
 import numpy as np
 import json
 import os
+import sys
+
+# Shared FinBERT results cache lives in the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+from sentiment_cache import SentimentCache
+
+FINBERT_MODEL = "yiyanghkust/finbert-tone"
 
 # Load FinBERT model
 print("Loading FinBERT model...")
-finbert_model = AutoModelForSequenceClassification.from_pretrained("yiyanghkust/finbert-tone")
-finbert_tokenizer = AutoTokenizer.from_pretrained("yiyanghkust/finbert-tone")
+finbert_model = AutoModelForSequenceClassification.from_pretrained(FINBERT_MODEL)
+finbert_tokenizer = AutoTokenizer.from_pretrained(FINBERT_MODEL)
 # CRITICAL: Use the model's actual label order!
 # Model outputs: [Neutral, Positive, Negative] not [Positive, Negative, Neutral]!
 labels = ['Neutral', 'Positive', 'Negative']
 print("Model loaded successfully!\n")
 
+# Articles per FinBERT forward pass (CPU: bigger batches mostly add padding)
+SENTIMENT_BATCH_SIZE = int(os.environ.get('SENTIMENT_BATCH_SIZE', 16))
+
+# FinBERT results cache (sentiment_cache.py); a different model revision gets fresh entries
+MODEL_VERSION = f"{FINBERT_MODEL}@{getattr(finbert_model.config, '_commit_hash', None) or 'local'}"
+sentiment_cache = SentimentCache(MODEL_VERSION)
+cache_stats = sentiment_cache.stats
+
 # Define asset classes
 ASSETS = {
     "US_SPX": {
@@ -175,22 +190,35 @@ def fetch_article_content(url):
         return "Content not retrieved."
 
 
-def analyze_sentiment(text):
-    """Analyze sentiment using FinBERT"""
-    if not text.strip():
-        return 0.0, 'Neutral'
+def finbert_scores(texts, batch_size=SENTIMENT_BATCH_SIZE):
+    """FinBERT (confidence, sentiment) for every text, in dynamically padded batches"""
+    scores = []
+    with torch.inference_mode():
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            inputs = finbert_tokenizer(batch, return_tensors="pt", truncation=True, max_length=512, padding=True)
+            probabilities = torch.softmax(finbert_model(**inputs).logits, dim=1).numpy()
+            for probs in probabilities:
+                max_index = int(np.argmax(probs))
+                # Convert to Python float for JSON
+                scores.append((float(probs[max_index]), labels[max_index]))
+    return scores
 
-    inputs = finbert_tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-    with torch.no_grad():
-        outputs = finbert_model(**inputs)
 
-    logits = outputs.logits
-    probabilities = torch.softmax(logits, dim=1).numpy()[0]
-    max_index = np.argmax(probabilities)
-    sentiment = labels[max_index]
-    confidence = float(probabilities[max_index])  # Convert to Python float for JSON
+def analyze_sentiment_batch(texts, batch_size=SENTIMENT_BATCH_SIZE):
+    """
+    Analyze sentiment of many texts using FinBERT in padded batches
+    
+    Identical texts are scored once and texts already in the sentiment cache
+    (sentiment_cache.py) are not scored at all.
+    Returns [(confidence, sentiment), ...] in the order of texts.
+    """
+    return sentiment_cache.score(texts, lambda todo: finbert_scores(todo, batch_size))
+
 
-    return confidence, sentiment
+def analyze_sentiment(text):
+    """Analyze sentiment using FinBERT"""
+    return sentiment_cache.score([text], finbert_scores, verbose=False)[0]
 
 
 def deduplicate_articles(articles):
@@ -242,8 +270,22 @@ def classify_sentiment(positive_pct):
         return "STRONG BEARISH", "Very strong negative sentiment"
 
 
-def summarize_sentiments(articles, asset_name):
-    """Summarize sentiment distribution for articles"""
+def sentiment_text(article):
+    """Text FinBERT scores for an article"""
+    # Use first 1000 characters of content to avoid truncation issues
+    if article['content'] != "Content not retrieved.":
+        return article['title'] + ". " + article['content'][:1000]
+    # If content fetch failed, only use title
+    return article['title']
+
+
+def summarize_sentiments(articles, asset_name, results=None):
+    """
+    Summarize sentiment distribution for articles
+    
+    results: [(confidence, sentiment), ...] for the articles when they were
+    already scored (main() scores every asset's articles in one batch)
+    """
     summary = {
         "Positive": 0,
         "Negative": 0,
@@ -252,24 +294,17 @@ def summarize_sentiments(articles, asset_name):
     
     failed_fetch_count = 0
 
-    for idx, article in enumerate(articles, 1):
+    texts = [sentiment_text(article) for article in articles]
+    if results is None:
+        # Analyze sentiment of all articles in batches
+        results = analyze_sentiment_batch(texts)
+
+    for idx, (article, text_to_analyze, (confidence, sentiment)) in enumerate(zip(articles, texts, results), 1):
         # Check if content was retrieved
         content_retrieved = article['content'] != "Content not retrieved."
         if not content_retrieved:
             failed_fetch_count += 1
         
-        # Prepare text for analysis
-        # Use first 1000 characters of content to avoid truncation issues
-        if content_retrieved:
-            content_preview = article['content'][:1000] if len(article['content']) > 1000 else article['content']
-            text_to_analyze = article['title'] + ". " + content_preview
-        else:
-            # If content fetch failed, only use title
-            text_to_analyze = article['title']
-        
-        # Analyze sentiment
-        confidence, sentiment = analyze_sentiment(text_to_analyze)
-        
         article['sentiment'] = sentiment
         article['confidence'] = confidence
         article['text_length'] = len(text_to_analyze)
@@ -399,8 +434,9 @@ def main():
     print("")
     
     results = {}
+    asset_articles = {}
     
-    # Analyze each asset
+    # Fetch and dedupe each asset's articles
     for asset_key, asset_config in ASSETS.items():
         print(f"\n{'='*80}")
         print(f"Analyzing: {asset_config['name']}")
@@ -420,9 +456,20 @@ def main():
         unique_articles, duplicate_count = deduplicate_articles(all_articles)
         print(f"[DUPLICATE] Duplicates removed: {duplicate_count}")
         print(f"[OK] Unique articles for analysis: {len(unique_articles)}")
-        
-        # Analyze sentiment
-        sentiment_summary = summarize_sentiments(unique_articles, asset_config['name'])
+        asset_articles[asset_key] = (unique_articles, duplicate_count)
+    
+    # Score all assets' articles in one FinBERT batch; an article found for
+    # several assets is scored once
+    texts = [sentiment_text(a) for articles, _ in asset_articles.values() for a in articles]
+    scored = analyze_sentiment_batch(texts)
+    
+    # Analyze sentiment
+    start = 0
+    for asset_key, asset_config in ASSETS.items():
+        unique_articles, duplicate_count = asset_articles[asset_key]
+        asset_results = scored[start:start + len(unique_articles)]
+        start += len(unique_articles)
+        sentiment_summary = summarize_sentiments(unique_articles, asset_config['name'], asset_results)
         
         # Store results
         total = len(unique_articles)
@@ -442,6 +489,8 @@ def main():
             "articles": unique_articles
         }
     
+    print(f"\n[CACHE] Sentiment cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+    
     # Generate and display report
     print("\n\n")
     report = generate_report(results)
@@ -473,6 +522,7 @@ def main():
     output = {
         "timestamp": datetime.now().isoformat(),
         "calculation_method": "Percentages exclude neutral articles (Positive + Negative only)",
+        "sentiment_cache": dict(cache_stats),
         "assets": {}
     }
     
@@ -13,6 +13,9 @@ import json
 import os
 from pathlib import Path
 
+from float_cache import get_float_shares, prefetch_float_shares, normalize_code
+from short_history import append_sfc
+
 # Data storage path
 DATA_DIR = Path(__file__).parent / "data" / "short_positions"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -138,22 +141,6 @@ def get_stock_short_position(stock_code: str, df: pd.DataFrame = None) -> dict:
     }
 
 
-def get_float_shares(stock_code: str) -> dict:
-    """Get float shares data from Yahoo Finance"""
-    try:
-        import yfinance as yf
-        ticker_symbol = f"{stock_code.zfill(4)}.HK"
-        ticker = yf.Ticker(ticker_symbol)
-        info = ticker.info
-        return {
-            'float_shares': info.get('floatShares'),
-            'shares_outstanding': info.get('sharesOutstanding'),
-            'market_cap': info.get('marketCap')
-        }
-    except Exception as e:
-        return {'float_shares': None, 'shares_outstanding': None, 'market_cap': None}
-
-
 def get_top_shorted_stocks(df: pd.DataFrame = None, top_n: int = 20, include_float: bool = True) -> list:
     """Get top N most shorted stocks by value, with optional float % calculation"""
     if df is None:
@@ -163,6 +150,10 @@ def get_top_shorted_stocks(df: pd.DataFrame = None, top_n: int = 20, include_flo
     value_col = 'Aggregated Reportable Short Positions (HK$)'
     sorted_df = df.sort_values(value_col, ascending=False).head(top_n)
     
+    if include_float:
+        # Fetch stale/missing float data in parallel, then the loop only does lookups
+        float_map = prefetch_float_shares(sorted_df['Stock Code'].astype(str))
+    
     result = []
     for _, row in sorted_df.iterrows():
         stock_code = str(row['Stock Code']).zfill(4)
@@ -177,7 +168,7 @@ def get_top_shorted_stocks(df: pd.DataFrame = None, top_n: int = 20, include_flo
         }
         
         if include_float:
-            float_data = get_float_shares(stock_code)
+            float_data = float_map[normalize_code(stock_code)]
             if float_data['float_shares']:
                 item['float_shares'] = float_data['float_shares']
                 item['short_pct_of_float'] = round(short_shares / float_data['float_shares'] * 100, 2)
@@ -200,6 +191,8 @@ def get_top_by_short_ratio(df: pd.DataFrame = None, top_n: int = 20) -> list:
     
     # Process all stocks and calculate ratios
     print("Fetching float data (this may take a moment)...")
+    candidates = df[df[shares_col].fillna(0).astype(int) >= 1000000]
+    float_map = prefetch_float_shares(candidates['Stock Code'].astype(str))
     for _, row in df.iterrows():
         stock_code = str(row['Stock Code']).zfill(4)
         short_shares = int(row.get(shares_col, 0))
@@ -207,7 +200,7 @@ def get_top_by_short_ratio(df: pd.DataFrame = None, top_n: int = 20) -> list:
         if short_shares < 1000000:  # Skip very small positions
             continue
             
-        float_data = get_float_shares(stock_code)
+        float_data = float_map[normalize_code(stock_code)]
         
         if float_data['float_shares'] and float_data['float_shares'] > 0:
             pct_of_float = short_shares / float_data['float_shares'] * 100
@@ -226,15 +219,16 @@ def get_top_by_short_ratio(df: pd.DataFrame = None, top_n: int = 20) -> list:
 
 
 def save_to_json(df: pd.DataFrame, filename: str = None):
-    """Save DataFrame to JSON file"""
+    """Save DataFrame to JSON file (and append it to the history store)"""
+    date_str = df['fetch_date'].iloc[0] if 'fetch_date' in df.columns else datetime.now().strftime('%Y-%m-%d')
     if filename is None:
-        date_str = df['fetch_date'].iloc[0] if 'fetch_date' in df.columns else datetime.now().strftime('%Y-%m-%d')
         filename = DATA_DIR / f"sfc_short_positions_{date_str}.json"
     
     records = df.to_dict('records')
     with open(filename, 'w') as f:
         json.dump(records, f, indent=2, ensure_ascii=False)
     
+    append_sfc(df, date_str)
     return filename
 
 
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Short Selling History Store
+Per-stock history of SFC aggregate positions and HKEX daily short turnover
+in one SQLite file, clustered by (stock_code, date) so a stock's history is
+a single indexed range read instead of parsing every daily JSON snapshot.
+
+Rows are appended whenever sfc_short_positions.save_to_json() or
+hkex_short_selling.save_data() runs. Snapshots saved before the store
+existed are imported from the JSON files on first use.
+
+Usage:
+    python short_history.py --sync          # import any JSON snapshots not yet in the store
+    python short_history.py --stock 700     # show stored history for a stock
+"""
+
+import os
+import json
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from float_cache import normalize_code
+
+DATA_DIR = Path(__file__).parent / "data"
+SFC_DATA_DIR = DATA_DIR / "short_positions"
+HKEX_DATA_DIR = DATA_DIR / "hkex_short_selling"
+
+# Store location (override with SHORT_HISTORY_PATH env var)
+SHORT_HISTORY_PATH = Path(os.environ.get('SHORT_HISTORY_PATH', DATA_DIR / "short_history.db"))
+
+SFC_SHARES_COL = 'Aggregated Reportable Short Positions (Shares)'
+SFC_VALUE_COL = 'Aggregated Reportable Short Positions (HK$)'
+
+# table -> (JSON snapshot directory, filename prefix)
+SOURCES = {
+    'sfc_positions': (SFC_DATA_DIR, "sfc_short_positions_"),
+    'hkex_turnover': (HKEX_DATA_DIR, "hkex_short_selling_"),
+}
+
+_lock = threading.Lock()
+_synced = set()
+
+
+def _connect() -> sqlite3.Connection:
+    SHORT_HISTORY_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(SHORT_HISTORY_PATH, timeout=30)
+    for table in SOURCES:
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                stock_code TEXT NOT NULL,
+                date TEXT NOT NULL,
+                short_shares INTEGER,
+                short_value INTEGER,
+                PRIMARY KEY (stock_code, date)
+            ) WITHOUT ROWID
+        """)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_date ON {table} (date)")
+    return conn
+
+
+def _sfc_rows(df: pd.DataFrame, date: str) -> list:
+    codes = df['Stock Code'].map(normalize_code)
+    shares = pd.to_numeric(df[SFC_SHARES_COL], errors='coerce').fillna(0).astype('int64')
+    values = pd.to_numeric(df[SFC_VALUE_COL], errors='coerce').fillna(0).astype('int64')
+    return list(zip(codes, [date] * len(df), shares.tolist(), values.tolist()))
+
+
+def _hkex_rows(df: pd.DataFrame, date: str) -> list:
+    codes = df['stock_code'].map(normalize_code)
+    shares = pd.to_numeric(df['short_turnover_shares'], errors='coerce').fillna(0).astype('int64')
+    values = pd.to_numeric(df['short_turnover_hkd'], errors='coerce').fillna(0).astype('int64')
+    return list(zip(codes, [date] * len(df), shares.tolist(), values.tolist()))
+
+
+def _write(table: str, rows: list) -> int:
+    if not rows:
+        return 0
+    conn = _connect()
+    try:
+        with conn:
+            conn.executemany(f"INSERT OR REPLACE INTO {table} VALUES (?, ?, ?, ?)", rows)
+    finally:
+        conn.close()
+    return len(rows)
+
+
+def append_sfc(df: pd.DataFrame, date: str) -> int:
+    """Store one SFC snapshot (rows as returned by fetch_short_positions)"""
+    if df.empty or 'Stock Code' not in df.columns:
+        return 0
+    return _write('sfc_positions', _sfc_rows(df, date))
+
+
+def append_hkex(df: pd.DataFrame, date: str) -> int:
+    """Store one HKEX daily snapshot (rows as returned by fetch_short_selling_data)"""
+    if df.empty or 'stock_code' not in df.columns:
+        return 0
+    return _write('hkex_turnover', _hkex_rows(df, date))
+
+
+def sync_from_json(force: bool = False) -> int:
+    """
+    Import JSON snapshots whose date isn't in the store yet (once per process)
+
+    Returns:
+        number of snapshot files imported
+    """
+    imported = 0
+    with _lock:
+        for table, (directory, prefix) in SOURCES.items():
+            if table in _synced and not force:
+                continue
+            conn = _connect()
+            try:
+                stored = {row[0] for row in conn.execute(f"SELECT DISTINCT date FROM {table}")}
+            finally:
+                conn.close()
+
+            for filepath in sorted(directory.glob(f"{prefix}*.json")):
+                date_str = filepath.stem.replace(prefix, "")
+                if not re.fullmatch(r'\d{4}-\d{2}-\d{2}', date_str) or date_str in stored:
+                    continue
+                try:
+                    with open(filepath) as f:
+                        df = pd.DataFrame(json.load(f))
+                except (OSError, ValueError) as e:
+                    print(f"Warning: Could not import {filepath}: {e}")
+                    continue
+                if table == 'sfc_positions':
+                    append_sfc(df, date_str)
+                else:
+                    append_hkex(df, date_str)
+                imported += 1
+            _synced.add(table)
+    return imported
+
+
+def _read(query: str, params: tuple) -> list:
+    sync_from_json()
+    conn = _connect()
+    try:
+        rows = conn.execute(query, params).fetchall()
+    finally:
+        conn.close()
+    return [{'date': date, 'short_shares': shares, 'short_value': value} for date, shares, value in rows]
+
+
+def sfc_history(stock_code: str, since: str = None) -> list:
+    """SFC aggregate positions for a stock on or after `since` (YYYY-MM-DD), oldest first"""
+    return _read(
+        "SELECT date, short_shares, short_value FROM sfc_positions "
+        "WHERE stock_code = ? AND date >= ? ORDER BY date",
+        (normalize_code(stock_code), since or '')
+    )
+
+
+def hkex_history(stock_code: str, days: int = 10) -> list:
+    """HKEX daily short turnover for a stock over the last `days` stored trading dates, oldest first"""
+    return _read(
+        "SELECT date, short_shares, short_value FROM hkex_turnover "
+        "WHERE stock_code = ? AND date >= COALESCE("
+        "(SELECT MIN(date) FROM (SELECT DISTINCT date FROM hkex_turnover ORDER BY date DESC LIMIT ?)), '') "
+        "ORDER BY date",
+        (normalize_code(stock_code), days)
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Short Selling History Store')
+    parser.add_argument('--sync', action='store_true', help='Import JSON snapshots not yet in the store')
+    parser.add_argument('--stock', '-s', help='Show stored history for a stock code')
+    parser.add_argument('--days', '-d', type=int, default=10, help='HKEX trading days to show (with --stock)')
+
+    args = parser.parse_args()
+
+    if args.sync:
+        count = sync_from_json(force=True)
+        print(f"✅ Imported {count} snapshot files into {SHORT_HISTORY_PATH}")
+    if args.stock:
+        print(json.dumps({
+            'stock_code': normalize_code(args.stock),
+            'sfc': sfc_history(args.stock),
+            'hkex': hkex_history(args.stock, args.days),
+        }, indent=2))
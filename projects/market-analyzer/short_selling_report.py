@@ -13,7 +13,7 @@ from datetime import datetime, timezone
 # Import from local modules
 from sfc_short_positions import fetch_short_positions, get_top_shorted_stocks, get_top_by_short_ratio
 from hkex_short_selling import fetch_short_selling_data, add_float_data
-from stock_names import get_chinese_name
+from stock_names import get_chinese_name, get_chinese_names_batch
 
 
 def format_number(n: int) -> str:
@@ -112,8 +112,11 @@ def generate_telegram_report(top_n: int = 20, include_daily: bool = True, includ
     return "\n".join(lines)
 
 
-def generate_telegram_report_v2(top_n: int = 20) -> str:
-    """Alternative format with emoji bullets - cleaner for mobile"""
+def generate_telegram_report_v2(top_n: int = 20, sfc_df=None, hkex_df=None) -> str:
+    """
+    Alternative format with emoji bullets - cleaner for mobile
+    Pass sfc_df / hkex_df to reuse already fetched data.
+    """
     
     lines = []
     now_hkt = datetime.now(timezone.utc)
@@ -125,8 +128,9 @@ def generate_telegram_report_v2(top_n: int = 20) -> str:
     
     # Section 1: SFC Aggregate Positions - Ranked by % of Float
     try:
-        print("Fetching SFC aggregate short positions...", file=sys.stderr)
-        sfc_df = fetch_short_positions()
+        if sfc_df is None:
+            print("Fetching SFC aggregate short positions...", file=sys.stderr)
+            sfc_df = fetch_short_positions()
         report_date = sfc_df['fetch_date'].iloc[0] if 'fetch_date' in sfc_df.columns else date_str
         
         lines.append(f"🏦 **累計沽空倉位** (SFC截至{report_date})")
@@ -142,6 +146,9 @@ def generate_telegram_report_v2(top_n: int = 20) -> str:
             reverse=True
         )[:top_n]
         
+        # Resolve all names in one batch, the loop below only hits the name table
+        get_chinese_names_batch([stock['stock_code'] for stock in top_stocks])
+        
         for i, stock in enumerate(top_stocks, 1):
             code = stock['stock_code']
             # Get Chinese name
@@ -171,8 +178,9 @@ def generate_telegram_report_v2(top_n: int = 20) -> str:
     
     # Section 2: HKEX Daily - Ranked by % of Float
     try:
-        print("Fetching HKEX daily short selling...", file=sys.stderr)
-        hkex_df = fetch_short_selling_data()
+        if hkex_df is None:
+            print("Fetching HKEX daily short selling...", file=sys.stderr)
+            hkex_df = fetch_short_selling_data()
         
         if not hkex_df.empty:
             trading_date = hkex_df['trading_date'].iloc[0] if 'trading_date' in hkex_df.columns else "今日"
@@ -196,6 +204,7 @@ def generate_telegram_report_v2(top_n: int = 20) -> str:
             # Sort by % descending and take top N
             valid_rows.sort(key=lambda x: x.get('daily_turnover_pct_of_float', 0), reverse=True)
             top_sorted = valid_rows[:top_n]
+            get_chinese_names_batch([row['stock_code'] for row in top_sorted])
             
             for i, row in enumerate(top_sorted, 1):
                 code = row['stock_code']
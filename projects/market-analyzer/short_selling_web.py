@@ -4,17 +4,19 @@ JC Algos Short Selling Web Tool API
 Flask API for short selling data and charts
 """
 
+import threading
 from flask import Flask, jsonify, request, send_from_directory, make_response
-import pandas as pd
 from datetime import datetime, timedelta
-import json
 import os
 from pathlib import Path
 
 # Import local modules
 from sfc_short_positions import fetch_short_positions, get_stock_short_position, get_float_shares
 from hkex_short_selling import fetch_short_selling_data, load_latest_data as load_hkex_latest
-from stock_names import get_chinese_name
+from stock_names import get_chinese_name, warm_names
+from float_cache import warm_cache
+from short_history import sfc_history, hkex_history
+from leaderboard import get_snapshot, run_scheduler
 
 app = Flask(__name__, static_folder='static')
 
@@ -26,94 +28,31 @@ def after_request(response):
     response.headers.add('Access-Control-Allow-Methods', 'GET,OPTIONS')
     return response
 
-# Data directories
-DATA_DIR = Path(__file__).parent / "data"
-SFC_DATA_DIR = DATA_DIR / "short_positions"
-HKEX_DATA_DIR = DATA_DIR / "hkex_short_selling"
-
-
 def get_historical_sfc_data(stock_code: str, weeks: int = 14) -> list:
     """Get historical SFC short position data for a stock"""
     code = str(stock_code).zfill(4)
-    code_int = int(code)
-    
-    results = []
-    json_files = sorted(SFC_DATA_DIR.glob("sfc_short_positions_*.json"), reverse=True)
-    
-    cutoff_date = datetime.now() - timedelta(weeks=weeks)
+    since = (datetime.now() - timedelta(weeks=weeks)).strftime('%Y-%m-%d')
+    float_data = get_float_shares(code)
     
-    for filepath in json_files[:70]:  # Check last 70 files (covers 10 weeks)
-        try:
-            # Extract date from filename
-            date_str = filepath.stem.replace("sfc_short_positions_", "")
-            file_date = datetime.strptime(date_str, "%Y-%m-%d")
-            
-            if file_date < cutoff_date:
-                continue
-            
-            with open(filepath) as f:
-                data = json.load(f)
-            
-            df = pd.DataFrame(data)
-            match = df[df['Stock Code'] == code_int]
-            
-            if not match.empty:
-                row = match.iloc[0]
-                short_shares = int(row.get('Aggregated Reportable Short Positions (Shares)', 0))
-                short_value = int(row.get('Aggregated Reportable Short Positions (HK$)', 0))
-                
-                # Get float for %
-                float_data = get_float_shares(code)
-                pct = round(short_shares / float_data['float_shares'] * 100, 2) if float_data.get('float_shares') else None
-                
-                results.append({
-                    'date': date_str,
-                    'short_shares': short_shares,
-                    'short_value': short_value,
-                    'pct_of_float': pct
-                })
-        except Exception as e:
-            continue
+    results = sfc_history(code, since)
+    for item in results:
+        # Float for %
+        item['pct_of_float'] = round(item['short_shares'] / float_data['float_shares'] * 100, 2) if float_data.get('float_shares') else None
     
-    return sorted(results, key=lambda x: x['date'])
+    return results
 
 
 def get_historical_hkex_data(stock_code: str, days: int = 10) -> list:
     """Get historical HKEX daily short selling data for a stock"""
     code = str(stock_code).zfill(4)
+    float_data = get_float_shares(code)
     
-    results = []
-    json_files = sorted(HKEX_DATA_DIR.glob("hkex_short_selling_*.json"), reverse=True)
-    
-    for filepath in json_files[:days]:
-        try:
-            date_str = filepath.stem.replace("hkex_short_selling_", "")
-            
-            with open(filepath) as f:
-                data = json.load(f)
-            
-            df = pd.DataFrame(data)
-            match = df[df['stock_code'] == code]
-            
-            if not match.empty:
-                row = match.iloc[0]
-                short_shares = int(row.get('short_turnover_shares', 0))
-                short_value = int(row.get('short_turnover_hkd', 0))
-                
-                # Get float for %
-                float_data = get_float_shares(code)
-                pct = round(short_shares / float_data['float_shares'] * 100, 4) if float_data.get('float_shares') else None
-                
-                results.append({
-                    'date': date_str,
-                    'short_shares': short_shares,
-                    'short_value': short_value,
-                    'pct_of_float': pct
-                })
-        except Exception as e:
-            continue
+    results = hkex_history(code, days)
+    for item in results:
+        # Float for %
+        item['pct_of_float'] = round(item['short_shares'] / float_data['float_shares'] * 100, 4) if float_data.get('float_shares') else None
     
-    return sorted(results, key=lambda x: x['date'])
+    return results
 
 
 @app.route('/')
@@ -188,69 +127,46 @@ def lookup_stock():
 
 @app.route('/api/short/top20')
 def get_top20():
-    """Get top 20 short selling stocks for both daily and aggregate"""
+    """Get top 20 short selling stocks for both daily and aggregate (materialized snapshot)"""
     try:
-        from short_selling_report import generate_telegram_report_v2
-        from sfc_short_positions import get_top_shorted_stocks
-        from hkex_short_selling import add_float_data
-        import math
-        
-        # Get SFC aggregate top 20 by % of float
-        sfc_df = fetch_short_positions()
-        report_date = sfc_df['fetch_date'].iloc[0] if 'fetch_date' in sfc_df.columns else datetime.now().strftime('%Y-%m-%d')
-        
-        top_by_value = get_top_shorted_stocks(sfc_df, 50, include_float=True)
-        aggregate_top = sorted(
-            [s for s in top_by_value if s.get('short_pct_of_float', 0) > 0],
-            key=lambda x: x.get('short_pct_of_float', 0),
-            reverse=True
-        )[:20]
-        
-        # Add Chinese names
-        for stock in aggregate_top:
-            stock['chinese_name'] = get_chinese_name(stock['stock_code'])
-        
-        # Get HKEX daily top 20 by % of float
-        hkex_df = fetch_short_selling_data()
-        trading_date = hkex_df['trading_date'].iloc[0] if 'trading_date' in hkex_df.columns else "Today"
-        
-        top_by_value_hkex = hkex_df.nlargest(50, 'short_turnover_hkd')
-        top_df = add_float_data(top_by_value_hkex)
-        
-        valid_rows = []
-        for _, row in top_df.iterrows():
-            pct = row.get('daily_turnover_pct_of_float', 0)
-            if pct and not math.isnan(pct) and pct > 0:
-                valid_rows.append({
-                    'stock_code': row['stock_code'],
-                    'stock_name': row['stock_name'],
-                    'chinese_name': get_chinese_name(row['stock_code']),
-                    'short_shares': int(row['short_turnover_shares']),
-                    'short_value': int(row['short_turnover_hkd']),
-                    'pct_of_float': round(pct, 4)
-                })
-        
-        daily_top = sorted(valid_rows, key=lambda x: x['pct_of_float'], reverse=True)[:20]
-        
-        return jsonify({
-            'aggregate': {
-                'report_date': report_date,
-                'stocks': aggregate_top
-            },
-            'daily': {
-                'trading_date': trading_date,
-                'stocks': daily_top
-            }
-        })
-        
+        snapshot = get_snapshot()
+        return _conditional_response(snapshot['top20_body'], 'application/json',
+                                     snapshot['top20_etag'], snapshot['last_modified'])
     except Exception as e:
         import traceback
         return jsonify({'error': str(e), 'trace': traceback.format_exc()}), 500
 
 
+@app.route('/api/short/report')
+def get_report():
+    """Telegram report text for the current snapshot"""
+    try:
+        snapshot = get_snapshot()
+        return _conditional_response(snapshot['report_body'], 'text/plain; charset=utf-8',
+                                     snapshot['report_etag'], snapshot['last_modified'])
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def _conditional_response(body: bytes, mimetype: str, etag: str, last_modified):
+    """Response with ETag / Last-Modified, 304 when the client copy is current"""
+    response = app.response_class(body, mimetype=mimetype)
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True  # always revalidate, cheap with a 304
+    return response.make_conditional(request)
+
+
 if __name__ == '__main__':
     # Ensure static directory exists
     static_dir = Path(__file__).parent / 'static'
     static_dir.mkdir(exist_ok=True)
     
+    # Warm the float cache and name table for the whole universe in the background
+    threading.Thread(target=warm_cache, daemon=True).start()
+    threading.Thread(target=warm_names, daemon=True).start()
+    
+    # Rebuild the top20 snapshot when SFC / HKEX publish new data
+    threading.Thread(target=run_scheduler, daemon=True).start()
+    
     app.run(host='0.0.0.0', port=5004, debug=True)
@@ -11,15 +11,26 @@ import pandas_ta as ta
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 import json
 
 # Import RRG and RS analyzer
 try:
-    from rrg_rs_analyzer import generate_rrg_chart, get_rs_ranking, format_rrg_report_zh, format_rs_report_zh, get_rrg_quadrant_zh
+    from rrg_rs_analyzer import (generate_rrg_chart, get_rs_ranking, format_rrg_report_zh, format_rs_report_zh,
+                                 get_rrg_quadrant_zh, get_benchmark, get_rs_basket)
     RRG_RS_AVAILABLE = True
 except ImportError:
     RRG_RS_AVAILABLE = False
 
+# Import local OHLCV bar store
+try:
+    from bar_store import get_bars
+    BAR_STORE_AVAILABLE = True
+except ImportError:
+    BAR_STORE_AVAILABLE = False
+
+from volume_profile import calculate_volume_profile
+
 class NumpyEncoder(json.JSONEncoder):
     """Custom encoder to handle numpy types"""
     def default(self, obj):
@@ -40,8 +51,12 @@ class MarketAnalyzer:
         'US': ''  # US stocks don't need suffix
     }
     
+    # Max concurrent network stages (info, benchmark, RS basket) across all requests
+    PIPELINE_WORKERS = 4
+    
     def __init__(self):
         self.indicators = {}
+        self._executor = ThreadPoolExecutor(max_workers=self.PIPELINE_WORKERS, thread_name_prefix='ta-pipeline')
         
     def get_symbol(self, ticker: str, market: str = 'US') -> str:
         """Convert ticker to Yahoo Finance format"""
@@ -52,10 +67,16 @@ class MarketAnalyzer:
         return ticker
     
     def fetch_data(self, ticker: str, market: str = 'US', period: str = '1y', interval: str = '1d') -> pd.DataFrame:
-        """Fetch OHLCV data from Yahoo Finance"""
-        symbol = self.get_symbol(ticker, market)
+        """Fetch OHLCV data (local bar store first, Yahoo Finance for the missing tail)"""
+        return self.fetch_symbol(self.get_symbol(ticker, market), period, interval)
+    
+    def fetch_symbol(self, symbol: str, period: str = '1y', interval: str = '1d') -> pd.DataFrame:
+        """Fetch OHLCV data for a Yahoo Finance symbol (e.g. '0700.HK', '^HSI')"""
         try:
-            data = yf.download(symbol, period=period, interval=interval, progress=False)
+            if BAR_STORE_AVAILABLE:
+                data = get_bars(symbol, period=period, interval=interval)
+            else:
+                data = yf.download(symbol, period=period, interval=interval, progress=False)
             if data.empty:
                 raise ValueError(f"No data found for {symbol}")
             # Flatten multi-index columns if present
@@ -65,6 +86,23 @@ class MarketAnalyzer:
         except Exception as e:
             raise ValueError(f"Failed to fetch {symbol}: {str(e)}")
     
+    def _fetch_name(self, symbol: str, ticker: str) -> str:
+        """Get display name from Yahoo Finance info (falls back to ticker)"""
+        try:
+            info = yf.Ticker(symbol).info
+            return info.get('shortName', info.get('longName', ticker))
+        except Exception:
+            return ticker
+    
+    def _fetch_basket_close(self, symbols: List[str], days: int = 365) -> pd.DataFrame:
+        """Download daily closes for the RS basket"""
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=days)
+        data = yf.download(symbols, start=start_date, end=end_date, progress=False)
+        if data.empty:
+            return pd.DataFrame()
+        return data['Close'] if 'Close' in data.columns else data
+    
     def calculate_emas(self, df: pd.DataFrame) -> Dict:
         """Calculate EMA 10, 20, 60, 200"""
         emas = {}
@@ -503,65 +541,8 @@ class MarketAnalyzer:
         if len(df) < 20:
             return {'error': 'Insufficient data for volume profile'}
         
-        # Use typical price (HLC/3) for volume distribution
-        df = df.copy()
-        df['typical_price'] = (df['High'] + df['Low'] + df['Close']) / 3
-        
-        # Create price bins
-        price_min = df['Low'].min()
-        price_max = df['High'].max()
-        bin_size = (price_max - price_min) / num_bins
-        
-        # Initialize volume profile
-        profile = {}
-        for i in range(num_bins):
-            bin_low = price_min + (i * bin_size)
-            bin_high = bin_low + bin_size
-            bin_mid = (bin_low + bin_high) / 2
-            profile[bin_mid] = 0
-        
-        # Distribute volume across price bins
-        for idx, row in df.iterrows():
-            low, high, vol = row['Low'], row['High'], row['Volume']
-            if vol == 0 or np.isnan(vol):
-                continue
-            
-            # Find bins that this candle spans
-            for bin_mid in profile.keys():
-                bin_low = bin_mid - (bin_size / 2)
-                bin_high = bin_mid + (bin_size / 2)
-                
-                # Check if candle overlaps with bin
-                if high >= bin_low and low <= bin_high:
-                    # Calculate overlap percentage
-                    overlap_low = max(low, bin_low)
-                    overlap_high = min(high, bin_high)
-                    candle_range = high - low if high > low else 1
-                    overlap_pct = (overlap_high - overlap_low) / candle_range
-                    profile[bin_mid] += vol * overlap_pct
-        
-        # Find Point of Control (PoC) - highest volume price level
-        poc_price = max(profile, key=profile.get)
-        poc_volume = profile[poc_price]
-        
-        # Calculate Value Area (VAH and VAL)
-        total_volume = sum(profile.values())
-        target_volume = total_volume * value_area_pct
-        
-        # Sort bins by distance from PoC
-        sorted_bins = sorted(profile.items(), key=lambda x: abs(x[0] - poc_price))
-        
-        accumulated_volume = 0
-        value_area_prices = []
-        
-        for price, vol in sorted_bins:
-            accumulated_volume += vol
-            value_area_prices.append(price)
-            if accumulated_volume >= target_volume:
-                break
-        
-        vah = max(value_area_prices)  # Value Area High
-        val = min(value_area_prices)  # Value Area Low
+        price_levels, volumes, poc_price, vah, val = calculate_volume_profile(df, num_bins, value_area_pct)
+        bin_size = (df['High'].max() - df['Low'].min()) / num_bins
         
         # Current price position relative to value area
         current_price = df['Close'].iloc[-1]
@@ -617,17 +598,31 @@ class MarketAnalyzer:
         return result
     
     def full_analysis(self, ticker: str, market: str = 'US') -> Dict:
-        """Run complete technical analysis"""
+        """
+        Run complete technical analysis
+        
+        Network stages run concurrently on the shared pipeline pool: stock info,
+        benchmark bars and the RS basket download start while the ticker's bars
+        are fetched and analysed. The ticker and benchmark bars are then reused
+        by the RRG and RS stages instead of being downloaded again.
+        """
         try:
+            symbol = self.get_symbol(ticker, market)
+            
+            # Start network stages that don't depend on the ticker's bars
+            name_future = self._executor.submit(self._fetch_name, symbol, ticker)
+            benchmark_future = None
+            basket_future = None
+            if RRG_RS_AVAILABLE:
+                benchmark = get_benchmark(market)
+                rs_ticker, basket, _ = get_rs_basket(ticker, market)
+                others = [s for s in basket if s.upper() not in (rs_ticker.upper(), benchmark)]
+                benchmark_future = self._executor.submit(self.fetch_symbol, benchmark, '2y')
+                basket_future = self._executor.submit(self._fetch_basket_close, others)
+            
             # Fetch data (use 2 years for better volume profile)
             df = self.fetch_data(ticker, market, period='2y')
             
-            # Get stock info
-            symbol = self.get_symbol(ticker, market)
-            stock = yf.Ticker(symbol)
-            info = stock.info
-            name = info.get('shortName', info.get('longName', ticker))
-            
             # Run all analyses
             emas = self.calculate_emas(df.copy())
             dmi_adx = self.calculate_dmi_adx(df.copy())
@@ -646,21 +641,30 @@ class MarketAnalyzer:
             rrg_data = None
             rs_data = None
             if RRG_RS_AVAILABLE:
+                # Ticker (and benchmark, once fetched) closes shared by RRG and RS
+                shared_close = df[['Close']].rename(columns={'Close': rs_ticker})
                 try:
+                    shared_close[benchmark] = benchmark_future.result()['Close']
+                    rrg_close = shared_close[shared_close.index >= datetime.now() - timedelta(weeks=100)]
+                    
                     # Generate RRG chart - use CHART_DIR env var if set
                     chart_dir = os.environ.get('CHART_DIR', '/root/clawd/research/charts')
                     os.makedirs(chart_dir, exist_ok=True)
                     rrg_output_path = f'{chart_dir}/rrg_{ticker}_{market}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.png'
-                    rrg_data = generate_rrg_chart(ticker, market, output_path=rrg_output_path)
+                    rrg_data = generate_rrg_chart(ticker, market, output_path=rrg_output_path, close_data=rrg_close)
                 except Exception as e:
                     rrg_data = {'success': False, 'error': str(e)}
                 
                 try:
-                    # Get RS ranking
-                    rs_data = get_rs_ranking(ticker, market)
+                    # Get RS ranking (basket + the ticker/benchmark bars already fetched)
+                    rs_close = basket_future.result().join(shared_close, how='outer')
+                    rs_close = rs_close[rs_close.index >= datetime.now() - timedelta(days=365)]
+                    rs_data = get_rs_ranking(ticker, market, close_data=rs_close)
                 except Exception as e:
                     rs_data = {'success': False, 'error': str(e)}
             
+            name = name_future.result()
+            
             return {
                 'success': True,
                 'ticker': ticker,
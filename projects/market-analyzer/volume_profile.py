@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Volume Profile Engine
+Vectorized Volume Profile (PoC, VAH, VAL) shared by ta_analyzer,
+generate_chart and generate_interactive_chart.
+
+Each candle's volume is spread across the price bins it spans, in proportion
+to the overlap between the candle's High-Low range and the bin. Candles are
+broadcast against the bin edges in one NumPy pass instead of a Python loop.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Tuple
+
+
+def bin_edges(price_min: float, price_max: float, num_bins: int) -> np.ndarray:
+    """Return num_bins + 1 equally spaced price edges"""
+    return price_min + np.arange(num_bins + 1) * ((price_max - price_min) / num_bins)
+
+
+def profile_weights(high: np.ndarray, low: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """
+    Fraction of each candle's range falling into each bin
+
+    Args:
+        high, low: candle highs/lows, shape (n,)
+        edges: bin edges, shape (num_bins + 1,)
+
+    Returns:
+        Array of shape (n, num_bins). Zero-range candles get weight 0.
+    """
+    high = np.asarray(high, dtype=float)[:, None]
+    low = np.asarray(low, dtype=float)[:, None]
+    overlap = np.minimum(high, edges[None, 1:]) - np.maximum(low, edges[None, :-1])
+    np.clip(overlap, 0, None, out=overlap)
+    candle_range = np.where(high > low, high - low, 1.0)
+    return np.nan_to_num(overlap / candle_range)
+
+
+def value_area(volumes: np.ndarray, value_area_pct: float = 0.70) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Locate PoC and expand outward to the side with more volume until the
+    value area holds value_area_pct of total volume
+
+    Args:
+        volumes: one profile (num_bins,) or many profiles (m, num_bins)
+
+    Returns:
+        (poc_idx, lower_idx, upper_idx) bin indices, one per profile
+    """
+    profiles = np.atleast_2d(volumes)
+    m, num_bins = profiles.shape
+    rows = np.arange(m)
+
+    poc = np.argmax(profiles, axis=1)
+    lower = poc.copy()
+    upper = poc.copy()
+    accumulated = profiles[rows, poc]
+    target = profiles.sum(axis=1) * value_area_pct
+
+    # At most num_bins steps; each step advances every profile at once
+    for _ in range(num_bins):
+        can_lower = lower > 0
+        can_upper = upper < num_bins - 1
+        lower_vol = np.where(can_lower, profiles[rows, np.maximum(lower - 1, 0)], 0.0)
+        upper_vol = np.where(can_upper, profiles[rows, np.minimum(upper + 1, num_bins - 1)], 0.0)
+
+        active = accumulated < target
+        go_lower = active & can_lower & (lower_vol >= upper_vol)
+        go_upper = active & ~go_lower & can_upper
+        if not (go_lower.any() or go_upper.any()):
+            break
+
+        lower -= go_lower
+        upper += go_upper
+        accumulated = accumulated + np.where(go_lower, lower_vol, 0.0) + np.where(go_upper, upper_vol, 0.0)
+
+    return poc, lower, upper
+
+
+def calculate_volume_profile(data: pd.DataFrame, num_bins: int = 30,
+                             value_area_pct: float = 0.70) -> tuple:
+    """
+    Calculate Volume Profile data
+
+    Returns:
+        price_levels: array of price levels (bin mid-points)
+        volumes: volume at each price level
+        poc: Point of Control (highest volume price)
+        vah: Value Area High
+        val: Value Area Low
+    """
+    edges = bin_edges(data['Low'].min(), data['High'].max(), num_bins)
+    price_levels = (edges[:-1] + edges[1:]) / 2
+
+    volume = np.nan_to_num(data['Volume'].to_numpy(dtype=float))
+    volumes = volume @ profile_weights(data['High'].to_numpy(), data['Low'].to_numpy(), edges)
+
+    poc_idx, lower_idx, upper_idx = value_area(volumes, value_area_pct)
+    poc = price_levels[poc_idx[0]]
+    val = price_levels[lower_idx[0]]
+    vah = price_levels[upper_idx[0]]
+
+    return price_levels, volumes, poc, vah, val
+
+
+def _profiles_to_frame(index, price_levels: np.ndarray, profiles: np.ndarray,
+                       value_area_pct: float) -> pd.DataFrame:
+    """Summarize a stack of profiles into PoC/VAH/VAL columns"""
+    poc_idx, lower_idx, upper_idx = value_area(profiles, value_area_pct)
+    return pd.DataFrame({
+        'poc': price_levels[poc_idx],
+        'vah': price_levels[upper_idx],
+        'val': price_levels[lower_idx],
+        'volume': profiles.sum(axis=1)
+    }, index=index)
+
+
+def rolling_volume_profile(data: pd.DataFrame, window: int = 20, num_bins: int = 50,
+                           value_area_pct: float = 0.70) -> pd.DataFrame:
+    """
+    Rolling Volume Profile over the last `window` candles at every bar
+
+    All windows share one price grid spanning the whole frame, so profiles
+    are comparable across dates and computed with a single cumulative sum.
+
+    Returns:
+        DataFrame indexed by bar date with poc, vah, val, volume columns
+        (first window - 1 rows are dropped)
+    """
+    if len(data) < window:
+        return pd.DataFrame(columns=['poc', 'vah', 'val', 'volume'])
+
+    edges = bin_edges(data['Low'].min(), data['High'].max(), num_bins)
+    price_levels = (edges[:-1] + edges[1:]) / 2
+
+    volume = np.nan_to_num(data['Volume'].to_numpy(dtype=float))
+    per_candle = profile_weights(data['High'].to_numpy(), data['Low'].to_numpy(), edges) * volume[:, None]
+
+    cumulative = np.vstack([np.zeros(num_bins), np.cumsum(per_candle, axis=0)])
+    profiles = cumulative[window:] - cumulative[:-window]
+
+    return _profiles_to_frame(data.index[window - 1:], price_levels, profiles, value_area_pct)
+
+
+def session_volume_profile(data: pd.DataFrame, freq: str = 'W-FRI', num_bins: int = 50,
+                           value_area_pct: float = 0.70) -> pd.DataFrame:
+    """
+    Volume Profile per session (e.g. 'W-FRI' weekly, 'M' monthly, 'D' daily for intraday bars)
+
+    Sessions share one price grid spanning the whole frame.
+
+    Returns:
+        DataFrame indexed by session end with poc, vah, val, volume columns
+    """
+    if data.empty:
+        return pd.DataFrame(columns=['poc', 'vah', 'val', 'volume'])
+
+    edges = bin_edges(data['Low'].min(), data['High'].max(), num_bins)
+    price_levels = (edges[:-1] + edges[1:]) / 2
+
+    volume = np.nan_to_num(data['Volume'].to_numpy(dtype=float))
+    per_candle = profile_weights(data['High'].to_numpy(), data['Low'].to_numpy(), edges) * volume[:, None]
+
+    sessions = data.index.to_period(freq) if isinstance(data.index, pd.DatetimeIndex) else data.index
+    codes, labels = pd.factorize(sessions, sort=True)
+    profiles = np.zeros((len(labels), num_bins))
+    np.add.at(profiles, codes, per_candle)
+
+    index = labels.end_time.normalize() if isinstance(labels, pd.PeriodIndex) else labels
+    return _profiles_to_frame(index, price_levels, profiles, value_area_pct)
@@ -7,6 +7,8 @@ Exit: Falls back to Lagging OR trailing SL based on ATR
 TP: 10 ATR with dynamic trailing
 """
 
+import os
+import sys
 import yfinance as yf
 import pandas as pd
 import numpy as np
@@ -15,6 +17,13 @@ import warnings
 import json
 warnings.filterwarnings('ignore')
 
+# Shared RRG engine (projects/market-analyzer/rrg_quadrants.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'projects', 'market-analyzer'))
+from rrg_quadrants import calculate_rrg_panel, label_quadrants, track_emergence, LAGGING
+from backtest_engine import (
+    PortfolioBacktest, Strategy, stop_loss, take_profit, print_results, save_results
+)
+
 # =============================================================================
 # CONFIGURATION
 # =============================================================================
@@ -78,85 +87,73 @@ COMMISSION = 0.001    # 0.1%
 STAMP_DUTY = 0.001    # 0.1%
 SLIPPAGE = 0.002      # 0.2%
 
-# =============================================================================
-# INDICATOR CALCULATIONS
-# =============================================================================
-
-def calculate_atr(high, low, close, period=14):
-    """Calculate Average True Range"""
-    tr1 = high - low
-    tr2 = (high - close.shift(1)).abs()
-    tr3 = (low - close.shift(1)).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    return tr.rolling(window=period).mean()
-
-def calculate_ma(data, period):
-    """Simple Moving Average"""
-    return data.rolling(window=period).mean()
-
-# =============================================================================
-# RRG CALCULATIONS
-# =============================================================================
-
-def calculate_rrg_values(asset_data, benchmark_data, 
-                         ratio_short=10, ratio_long=26,
-                         momentum_short=1, momentum_long=4):
-    """Calculate RS-Ratio and RS-Momentum for RRG"""
-    # Relative strength ratio
-    sbr = asset_data / benchmark_data
-    rs1 = calculate_ma(sbr, ratio_short)
-    rs2 = calculate_ma(sbr, ratio_long)
-    rs_ratio = 100 * ((rs1 - rs2) / rs2 + 1)
-    
-    # Momentum of the ratio
-    rm1 = calculate_ma(rs_ratio, momentum_short)
-    rm2 = calculate_ma(rs_ratio, momentum_long)
-    rs_momentum = 100 * ((rm1 - rm2) / rm2 + 1)
-    
-    return rs_ratio, rs_momentum
+# Exit Rules
+TAKE_PROFIT_ATR = 10   # TP at 10 ATR
+MIN_DAYS_OUT = 2       # Days out of Lagging before buying (Day 3 open)
 
-def get_rrg_quadrant(rs_ratio, rs_momentum):
-    """Determine RRG quadrant"""
-    if pd.isna(rs_ratio) or pd.isna(rs_momentum):
-        return None
-    if rs_ratio >= 100 and rs_momentum >= 100:
-        return "Leading"
-    elif rs_ratio < 100 and rs_momentum >= 100:
-        return "Improving"
-    elif rs_ratio < 100 and rs_momentum < 100:
-        return "Lagging"
-    else:  # rs_ratio >= 100 and rs_momentum < 100
-        return "Weakening"
+# Trailing SL ladder: (peak ATR gain reached, ATR above entry locked in)
+TRAIL_LADDER = [
+    (9, 4),
+    (8, 3),
+    (7, 2),
+    (6, 1),
+    (5, 0),  # ~breakeven
+    (4, 0),  # breakeven
+]
 
 # =============================================================================
-# TRADE CLASS
+# STRATEGY RULES
 # =============================================================================
 
-class Trade:
-    def __init__(self, symbol, entry_date, entry_price, size, atr):
-        self.symbol = symbol
-        self.entry_date = entry_date
-        self.entry_price = entry_price
-        self.size = size
-        self.atr = atr
-        
-        # TP at 10 ATR
-        self.take_profit = entry_price + (10 * atr)
-        
-        # Trailing SL - starts at None (only quadrant exit initially)
-        self.trailing_sl = None
-        self.highest_atr_gain = 0
-        
-        # Exit tracking
-        self.exit_date = None
-        self.exit_price = None
-        self.pnl = 0
-        self.pnl_pct = 0
-        self.holding_days = 0
-        self.exit_reason = None
+class QuadrantEmergenceStrategy(Strategy):
+    """Buy after 2+ days out of Lagging, exit on TP, trailing SL or back to Lagging"""
+    
+    def __init__(self, benchmark_close):
+        self.benchmark_close = benchmark_close
+        self.stop_hit = stop_loss()
+        self.exit_rules = [
+            take_profit(f"Take Profit ({TAKE_PROFIT_ATR} ATR)"),
+            self.trailing_stop_exit,
+            self.quadrant_exit,
+        ]
+    
+    def prepare(self, bt):
+        rs_ratio, rs_momentum = calculate_rrg_panel(bt.frames['Close'], self.benchmark_close)
+        self.quadrants = label_quadrants(rs_ratio, rs_momentum)
+        self.days_out, self.episode_start = track_emergence(self.quadrants)
+    
+    def update_positions(self, bt, i, cols):
+        # Ratchet the trailing SL up the ladder as the peak ATR gain grows
+        peak = bt.peak_gain[cols]
+        lock_in = np.select([peak >= level for level, _ in TRAIL_LADDER],
+                            [atrs for _, atrs in TRAIL_LADDER], default=np.nan)
+        new_sl = bt.entry_price[cols] + lock_in * bt.atr[cols]
+        bt.stop[cols] = np.fmax(bt.stop[cols], new_sl)
+    
+    def trailing_stop_exit(self, bt, i, cols):
+        hit, price, _ = self.stop_hit(bt, i, cols)
+        reasons = [f"Trailing SL ({peak:.1f} ATR peak)" if h else None
+                   for h, peak in zip(hit, bt.peak_gain[cols])]
+        return hit, price, reasons
+    
+    def quadrant_exit(self, bt, i, cols):
+        # Falls back to Lagging
+        return self.quadrants[i, cols] == LAGGING, bt.close[i, cols], "Quadrant Exit (Lagging)"
+    
+    def entry_candidates(self, bt, i):
+        # An emergence counts only if it started after the symbol was last held
+        # and after the simulation started; oldest emergence first
+        eligible = ((self.days_out[i] >= MIN_DAYS_OUT) & ~bt.active &
+                    (self.episode_start[i] >= np.maximum(bt.last_exit_bar, self.start_bar)))
+        cols = np.flatnonzero(eligible)
+        return cols[np.argsort(self.episode_start[i, cols], kind='stable')]
+    
+    def entry_levels(self, bt, i, cols, entry_price, atr):
+        # No SL at entry: only the quadrant exit until the ladder kicks in
+        return {'target': entry_price + TAKE_PROFIT_ATR * atr}
 
 # =============================================================================
-# BACKTEST ENGINE
+# BACKTEST
 # =============================================================================
 
 def fetch_data(symbols, start_date, end_date):
@@ -211,449 +208,38 @@ def run_backtest(start_date='2020-01-01', end_date='2025-12-31'):
         print("ERROR: No data fetched")
         return None
     
-    # Extract OHLC
-    try:
-        close_data = data['Close']
-        high_data = data['High']
-        low_data = data['Low']
-        open_data = data['Open']
-    except:
+    # Check OHLC
+    if not {'Open', 'High', 'Low', 'Close'} <= set(data.columns.get_level_values(0)):
         print("ERROR: Cannot extract OHLC data")
         return None
     
+    close_data = data['Close']
+    
     if BENCHMARK not in close_data.columns:
         print(f"ERROR: Benchmark {BENCHMARK} not found")
         return None
     
     benchmark_close = close_data[BENCHMARK]
     
-    # Calculate RRG and ATR for all stocks
-    print("\nCalculating RRG values and ATR...")
-    rrg_data = {}
-    atr_data = {}
-    
-    for symbol in HK_STOCKS.keys():
-        if symbol not in close_data.columns:
-            continue
-        
-        asset_close = close_data[symbol]
-        asset_high = high_data[symbol]
-        asset_low = low_data[symbol]
-        
-        # Skip if too many NaN
-        if asset_close.isna().sum() > len(asset_close) * 0.5:
-            continue
-        
-        rs_ratio, rs_momentum = calculate_rrg_values(asset_close, benchmark_close)
-        
-        quadrants = pd.Series(index=close_data.index, dtype=object)
-        for i in range(len(close_data)):
-            quadrants.iloc[i] = get_rrg_quadrant(rs_ratio.iloc[i], rs_momentum.iloc[i])
-        
-        rrg_data[symbol] = {
-            'rs_ratio': rs_ratio,
-            'rs_momentum': rs_momentum,
-            'quadrant': quadrants
-        }
-        
-        atr_data[symbol] = calculate_atr(asset_high, asset_low, asset_close)
-    
-    print(f"Calculated RRG for {len(rrg_data)} stocks")
-    
-    # Track emergence from Lagging
-    # Key: symbol, Value: {'days_out': count, 'first_quadrant': quadrant}
-    emergence_tracker = {}
-    
-    # Run simulation
-    trades = []
-    active_trades = {}
-    capital = INITIAL_CAPITAL
-    equity_curve = []
-    
-    dates = close_data.index.tolist()
-    
-    print("\nRunning simulation...")
-    
-    for i in range(30, len(dates) - 1):
-        current_date = dates[i]
-        next_date = dates[i + 1]
-        
-        # =====================================================================
-        # 1. CHECK EXITS FOR ACTIVE TRADES
-        # =====================================================================
-        symbols_to_remove = []
-        
-        for symbol, trade in active_trades.items():
-            if symbol not in close_data.columns:
-                continue
-            
-            current_high = high_data[symbol].iloc[i]
-            current_low = low_data[symbol].iloc[i]
-            current_close = close_data[symbol].iloc[i]
-            current_quadrant = rrg_data[symbol]['quadrant'].iloc[i]
-            
-            if pd.isna(current_close):
-                continue
-            
-            trade.holding_days += 1
-            exit_price = None
-            exit_reason = None
-            
-            # Calculate current ATR gain
-            current_gain = current_high - trade.entry_price
-            current_atr_gain = current_gain / trade.atr if trade.atr > 0 else 0
-            
-            # Update highest ATR gain
-            if current_atr_gain > trade.highest_atr_gain:
-                trade.highest_atr_gain = current_atr_gain
-            
-            # Update trailing SL based on ATR gain thresholds
-            if trade.highest_atr_gain >= 9:
-                # Trail 5 ATR below entry (lock in 4 ATR profit minimum)
-                new_sl = trade.entry_price + (4 * trade.atr)
-                if trade.trailing_sl is None or new_sl > trade.trailing_sl:
-                    trade.trailing_sl = new_sl
-            elif trade.highest_atr_gain >= 8:
-                # Trail 4 ATR below entry (lock in 3 ATR profit)
-                new_sl = trade.entry_price + (3 * trade.atr)
-                if trade.trailing_sl is None or new_sl > trade.trailing_sl:
-                    trade.trailing_sl = new_sl
-            elif trade.highest_atr_gain >= 7:
-                # Trail 3 ATR below entry (lock in 2 ATR profit)
-                new_sl = trade.entry_price + (2 * trade.atr)
-                if trade.trailing_sl is None or new_sl > trade.trailing_sl:
-                    trade.trailing_sl = new_sl
-            elif trade.highest_atr_gain >= 6:
-                # Trail 2 ATR below entry (lock in 1 ATR profit)
-                new_sl = trade.entry_price + (1 * trade.atr)
-                if trade.trailing_sl is None or new_sl > trade.trailing_sl:
-                    trade.trailing_sl = new_sl
-            elif trade.highest_atr_gain >= 5:
-                # Trail 1 ATR below entry (breakeven + small profit)
-                new_sl = trade.entry_price + (0 * trade.atr)  # ~breakeven
-                if trade.trailing_sl is None or new_sl > trade.trailing_sl:
-                    trade.trailing_sl = new_sl
-            elif trade.highest_atr_gain >= 4:
-                # Move to breakeven
-                new_sl = trade.entry_price
-                if trade.trailing_sl is None or new_sl > trade.trailing_sl:
-                    trade.trailing_sl = new_sl
-            
-            # Check TP at 10 ATR
-            if current_high >= trade.take_profit:
-                exit_price = trade.take_profit
-                exit_reason = "Take Profit (10 ATR)"
-            
-            # Check trailing SL
-            if exit_price is None and trade.trailing_sl is not None:
-                if current_low <= trade.trailing_sl:
-                    exit_price = trade.trailing_sl
-                    exit_reason = f"Trailing SL ({trade.highest_atr_gain:.1f} ATR peak)"
-            
-            # Check quadrant exit - falls back to Lagging
-            if exit_price is None and current_quadrant == "Lagging":
-                exit_price = current_close
-                exit_reason = "Quadrant Exit (Lagging)"
-            
-            # Process exit
-            if exit_price is not None:
-                pnl = trade.size * (exit_price - trade.entry_price)
-                pnl -= trade.size * trade.entry_price * (COMMISSION + STAMP_DUTY + SLIPPAGE)
-                pnl -= trade.size * exit_price * (COMMISSION + STAMP_DUTY + SLIPPAGE)
-                
-                trade.pnl = pnl
-                trade.exit_price = exit_price
-                trade.exit_date = current_date
-                trade.exit_reason = exit_reason
-                trade.pnl_pct = pnl / (trade.size * trade.entry_price) * 100
-                
-                capital += trade.size * exit_price  # Return position value
-                capital += pnl  # Add/subtract P&L
-                capital -= trade.size * exit_price  # Subtract to avoid double counting
-                capital += pnl  # The actual P&L
-                
-                # Simpler: just add pnl and return position
-                capital = capital  # Already handled via pnl
-                
-                trades.append(trade)
-                symbols_to_remove.append(symbol)
-        
-        for symbol in symbols_to_remove:
-            del active_trades[symbol]
-        
-        # =====================================================================
-        # 2. TRACK EMERGENCE FROM LAGGING
-        # =====================================================================
-        for symbol in rrg_data.keys():
-            if symbol in active_trades:
-                continue
-            
-            current_quadrant = rrg_data[symbol]['quadrant'].iloc[i]
-            prev_quadrant = rrg_data[symbol]['quadrant'].iloc[i-1] if i > 0 else None
-            
-            if current_quadrant is None:
-                continue
-            
-            # If currently in Lagging, reset tracker
-            if current_quadrant == "Lagging":
-                if symbol in emergence_tracker:
-                    del emergence_tracker[symbol]
-                continue
-            
-            # If was in Lagging yesterday and now in Improving/Leading
-            if prev_quadrant == "Lagging" and current_quadrant in ["Improving", "Leading"]:
-                emergence_tracker[symbol] = {
-                    'days_out': 1,
-                    'first_quadrant': current_quadrant,
-                    'emergence_date': current_date
-                }
-            # If already tracking and still not Lagging
-            elif symbol in emergence_tracker and current_quadrant in ["Improving", "Leading", "Weakening"]:
-                emergence_tracker[symbol]['days_out'] += 1
-            # If fell back to Lagging while tracking
-            elif symbol in emergence_tracker and current_quadrant == "Lagging":
-                del emergence_tracker[symbol]
-        
-        # =====================================================================
-        # 3. CHECK FOR NEW ENTRIES (Day 3 after emergence)
-        # =====================================================================
-        for symbol, tracker in list(emergence_tracker.items()):
-            if symbol in active_trades:
-                continue
-            if symbol not in close_data.columns:
-                continue
-            
-            # Buy on Day 3 if still not in Lagging
-            if tracker['days_out'] >= 2:  # 2 days means we're at day 3
-                current_quadrant = rrg_data[symbol]['quadrant'].iloc[i]
-                
-                # Skip if back in Lagging
-                if current_quadrant == "Lagging":
-                    del emergence_tracker[symbol]
-                    continue
-                
-                # Get entry price (next day open)
-                entry_price = open_data[symbol].iloc[i + 1] if i + 1 < len(dates) else None
-                
-                if entry_price is None or pd.isna(entry_price) or entry_price <= 0:
-                    continue
-                
-                # Get ATR
-                atr = atr_data[symbol].iloc[i] if symbol in atr_data else None
-                if atr is None or pd.isna(atr) or atr <= 0:
-                    atr = entry_price * 0.03  # Fallback: 3% of price
-                
-                # Calculate position size
-                position_value = capital * POSITION_SIZE
-                size = position_value / entry_price
-                
-                if size <= 0:
-                    continue
-                
-                # Create trade
-                trade = Trade(
-                    symbol=symbol,
-                    entry_date=next_date,
-                    entry_price=entry_price,
-                    size=size,
-                    atr=atr
-                )
-                
-                # Deduct entry costs
-                entry_cost = size * entry_price * (COMMISSION + STAMP_DUTY + SLIPPAGE)
-                capital -= entry_cost
-                
-                active_trades[symbol] = trade
-                
-                # Remove from tracker (trade placed)
-                del emergence_tracker[symbol]
-        
-        # =====================================================================
-        # 4. TRACK EQUITY
-        # =====================================================================
-        unrealized = 0
-        for symbol, trade in active_trades.items():
-            if symbol in close_data.columns:
-                current_price = close_data[symbol].iloc[i]
-                if not pd.isna(current_price):
-                    unrealized += trade.size * (current_price - trade.entry_price)
-        
-        equity_curve.append({
-            'date': current_date,
-            'capital': capital,
-            'unrealized': unrealized,
-            'equity': capital + unrealized,
-            'active_positions': len(active_trades)
-        })
+    # Skip symbols with too many NaN
+    symbols = [s for s in HK_STOCKS.keys()
+               if s in close_data.columns and close_data[s].isna().sum() <= len(close_data) * 0.5]
+    print(f"\nSimulating {len(symbols)} stocks...")
     
-    # =========================================================================
-    # CLOSE REMAINING TRADES AT END
-    # =========================================================================
-    for symbol, trade in active_trades.items():
-        if symbol in close_data.columns:
-            exit_price = close_data[symbol].iloc[-1]
-            if not pd.isna(exit_price):
-                pnl = trade.size * (exit_price - trade.entry_price)
-                pnl -= trade.size * trade.entry_price * (COMMISSION + STAMP_DUTY + SLIPPAGE)
-                pnl -= trade.size * exit_price * (COMMISSION + STAMP_DUTY + SLIPPAGE)
-                
-                trade.pnl = pnl
-                trade.exit_price = exit_price
-                trade.exit_date = dates[-1]
-                trade.exit_reason = "End of Test"
-                trade.pnl_pct = pnl / (trade.size * trade.entry_price) * 100
-                
-                capital += pnl
-                trades.append(trade)
+    backtest = PortfolioBacktest(
+        data, symbols, QuadrantEmergenceStrategy(benchmark_close),
+        initial_capital=INITIAL_CAPITAL, position_size=POSITION_SIZE,
+        cost_rate=COMMISSION + STAMP_DUTY + SLIPPAGE
+    )
+    trades, equity_curve = backtest.run()
     
-    print_results(trades, equity_curve)
-    save_results(trades, equity_curve)
+    print_results(trades, equity_curve, INITIAL_CAPITAL)
+    save_results(trades, equity_curve,
+                 '/root/clawd/rrg_quadrant_results.csv',
+                 '/root/clawd/rrg_quadrant_equity.csv')
     
     return trades, equity_curve
 
-def print_results(trades, equity_curve):
-    """Print backtest results"""
-    if not trades:
-        print("\n❌ NO TRADES EXECUTED")
-        return
-    
-    print("\n" + "=" * 70)
-    print("📊 BACKTEST RESULTS")
-    print("=" * 70)
-    
-    total_trades = len(trades)
-    winning_trades = [t for t in trades if t.pnl > 0]
-    losing_trades = [t for t in trades if t.pnl < 0]
-    
-    win_rate = len(winning_trades) / total_trades * 100 if total_trades > 0 else 0
-    
-    total_pnl = sum(t.pnl for t in trades)
-    gross_profit = sum(t.pnl for t in winning_trades)
-    gross_loss = abs(sum(t.pnl for t in losing_trades))
-    
-    profit_factor = gross_profit / gross_loss if gross_loss > 0 else float('inf')
-    
-    avg_win = np.mean([t.pnl for t in winning_trades]) if winning_trades else 0
-    avg_loss = np.mean([t.pnl for t in losing_trades]) if losing_trades else 0
-    avg_win_pct = np.mean([t.pnl_pct for t in winning_trades]) if winning_trades else 0
-    avg_loss_pct = np.mean([t.pnl_pct for t in losing_trades]) if losing_trades else 0
-    
-    avg_holding = np.mean([t.holding_days for t in trades])
-    
-    print(f"\n📈 TRADE STATISTICS")
-    print("-" * 40)
-    print(f"Total Trades: {total_trades}")
-    print(f"Winning Trades: {len(winning_trades)} ({win_rate:.1f}%)")
-    print(f"Losing Trades: {len(losing_trades)}")
-    print(f"Average Holding Days: {avg_holding:.1f}")
-    
-    print(f"\n💰 P&L ANALYSIS")
-    print("-" * 40)
-    print(f"Total P&L: ${total_pnl:,.0f}")
-    print(f"Gross Profit: ${gross_profit:,.0f}")
-    print(f"Gross Loss: ${gross_loss:,.0f}")
-    print(f"Profit Factor: {profit_factor:.2f}")
-    print(f"Avg Win: ${avg_win:,.0f} ({avg_win_pct:.1f}%)")
-    print(f"Avg Loss: ${avg_loss:,.0f} ({avg_loss_pct:.1f}%)")
-    
-    # Best/Worst trades
-    if trades:
-        best_trade = max(trades, key=lambda t: t.pnl)
-        worst_trade = min(trades, key=lambda t: t.pnl)
-        print(f"\n🏆 Best Trade: {best_trade.symbol} +${best_trade.pnl:,.0f} ({best_trade.pnl_pct:.1f}%)")
-        print(f"💀 Worst Trade: {worst_trade.symbol} ${worst_trade.pnl:,.0f} ({worst_trade.pnl_pct:.1f}%)")
-    
-    if equity_curve:
-        equity_df = pd.DataFrame(equity_curve)
-        equity_df['returns'] = equity_df['equity'].pct_change()
-        
-        final_equity = equity_df['equity'].iloc[-1]
-        total_return = (final_equity / INITIAL_CAPITAL - 1) * 100
-        
-        if len(equity_df) > 1:
-            daily_returns = equity_df['returns'].dropna()
-            
-            equity_df['peak'] = equity_df['equity'].cummax()
-            equity_df['drawdown'] = (equity_df['equity'] - equity_df['peak']) / equity_df['peak']
-            max_dd = abs(equity_df['drawdown'].min()) * 100
-            
-            # Find max DD period
-            dd_end_idx = equity_df['drawdown'].idxmin()
-            dd_start_idx = equity_df.loc[:dd_end_idx, 'equity'].idxmax()
-            
-            mean_return = daily_returns.mean() * 252
-            std_return = daily_returns.std() * np.sqrt(252)
-            sharpe = mean_return / std_return if std_return > 0 else 0
-            
-            downside_returns = daily_returns[daily_returns < 0]
-            downside_std = downside_returns.std() * np.sqrt(252) if len(downside_returns) > 0 else 0
-            sortino = mean_return / downside_std if downside_std > 0 else 0
-            
-            years = len(equity_df) / 252
-            cagr = ((final_equity / INITIAL_CAPITAL) ** (1/years) - 1) * 100 if years > 0 else 0
-            calmar = cagr / max_dd if max_dd > 0 else 0
-            
-            print(f"\n📊 RISK METRICS")
-            print("-" * 40)
-            print(f"Initial Capital: ${INITIAL_CAPITAL:,.0f}")
-            print(f"Final Equity: ${final_equity:,.0f}")
-            print(f"Total Return: {total_return:.2f}%")
-            print(f"CAGR: {cagr:.2f}%")
-            print(f"Max Drawdown: {max_dd:.2f}%")
-            print(f"Sharpe Ratio: {sharpe:.2f}")
-            print(f"Sortino Ratio: {sortino:.2f}")
-            print(f"Calmar Ratio: {calmar:.2f}")
-    
-    print(f"\n🚪 EXIT REASONS")
-    print("-" * 40)
-    exit_reasons = {}
-    for t in trades:
-        reason = t.exit_reason or "Unknown"
-        # Simplify trailing SL reasons
-        if "Trailing SL" in reason:
-            reason = "Trailing SL"
-        exit_reasons[reason] = exit_reasons.get(reason, 0) + 1
-    
-    for reason, count in sorted(exit_reasons.items(), key=lambda x: -x[1]):
-        pct = count / total_trades * 100
-        avg_pnl = np.mean([t.pnl for t in trades if (t.exit_reason or "").startswith(reason.split()[0])])
-        print(f"{reason}: {count} ({pct:.1f}%) avg ${avg_pnl:,.0f}")
-
-def save_results(trades, equity_curve):
-    """Save results to CSV"""
-    if not trades:
-        return
-    
-    # Save trades
-    results = []
-    for t in trades:
-        results.append({
-            'Symbol': t.symbol,
-            'Entry Date': t.entry_date,
-            'Entry Price': round(t.entry_price, 3),
-            'Exit Date': t.exit_date,
-            'Exit Price': round(t.exit_price, 3) if t.exit_price else None,
-            'ATR': round(t.atr, 3),
-            'Size': round(t.size, 0),
-            'P&L': round(t.pnl, 0),
-            'P&L %': round(t.pnl_pct, 2),
-            'Holding Days': t.holding_days,
-            'Peak ATR Gain': round(t.highest_atr_gain, 2),
-            'Exit Reason': t.exit_reason
-        })
-    
-    df = pd.DataFrame(results)
-    trades_path = '/root/clawd/rrg_quadrant_results.csv'
-    df.to_csv(trades_path, index=False)
-    print(f"\n📁 Trade results saved to: {trades_path}")
-    
-    # Save equity curve
-    if equity_curve:
-        eq_df = pd.DataFrame(equity_curve)
-        eq_path = '/root/clawd/rrg_quadrant_equity.csv'
-        eq_df.to_csv(eq_path, index=False)
-        print(f"📁 Equity curve saved to: {eq_path}")
-
 if __name__ == '__main__':
     import sys
     start = sys.argv[1] if len(sys.argv) > 1 else '2020-01-01'
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+RSS Server Parser Benchmark
+===========================
+Replays saved pages through the rss_server feed routes, offline:
+- checks every feed still yields the recorded items (selector regressions)
+- times BeautifulSoup (html.parser) vs lxml link extraction, and
+  ElementTree vs streaming RSS serialization
+
+rss_fixtures/ ships small synthetic pages per feed, built on each site's
+markup and selectors (the manifest marks them recorded_at "synthetic");
+--record replaces them with live pages.
+
+Usage:
+    python rss_benchmark.py --record      # save live pages to rss_fixtures/
+    python rss_benchmark.py               # check + benchmark against the fixtures
+    python rss_benchmark.py --check-only  # just the regression check (exit 1 on failure)
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+import rss_server
+
+FIXTURES_DIR = Path(os.environ.get('RSS_FIXTURES_DIR', Path(__file__).parent / 'rss_fixtures'))
+MANIFEST_FILE = 'manifest.json'
+
+
+class ReplayResponse:
+    """Stands in for requests.Response when replaying a fixture"""
+    status_code = 200
+    encoding = 'utf-8'
+
+    def __init__(self, text):
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def run_feed(path, fetcher):
+    """
+    Run the route behind `path` with rss_server.fetch replaced by `fetcher`
+
+    Returns:
+        [(title, link), ...] of the generated feed
+    """
+    endpoint, kwargs = rss_server.app.url_map.bind('localhost').match(path)
+    view = rss_server.app.view_functions[endpoint].__wrapped__
+
+    original = rss_server.fetch
+    rss_server.fetch = fetcher
+    try:
+        response = view(**kwargs)
+    finally:
+        rss_server.fetch = original
+
+    if response.status_code != 200:
+        raise RuntimeError(response.get_data(as_text=True))
+    return [(item.findtext('title'), item.findtext('link'))
+            for item in ET.fromstring(response.get_data()).iter('item')]
+
+
+def selector_for(path):
+    """LINK_SELECTORS entry used by the route behind `path`"""
+    return 'hkej' if path.startswith('/hkej/') else 'anchors'
+
+
+def load_manifest():
+    try:
+        with open(FIXTURES_DIR / MANIFEST_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except OSError:
+        return {}
+
+
+# =============================================================================
+# Record
+# =============================================================================
+
+def record(paths):
+    """Fetch each feed live, saving the page it scraped and the items it produced"""
+    FIXTURES_DIR.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest()
+    live_fetch = rss_server.fetch
+
+    for path in paths:
+        captured = {}
+
+        def fetcher(url, timeout=30):
+            response = live_fetch(url, timeout=timeout)
+            captured['url'] = url
+            captured['text'] = response.text
+            return response
+
+        try:
+            items = run_feed(path, fetcher)
+        except Exception as e:
+            print(f"❌ {path}: {e}")
+            continue
+
+        try:
+            json.loads(captured['text'])
+            kind = 'json'
+        except ValueError:
+            kind = 'html'
+        filename = f"{path.strip('/').replace('/', '_')}.{kind}"
+        with open(FIXTURES_DIR / filename, 'w', encoding='utf-8') as f:
+            f.write(captured['text'])
+
+        manifest[path] = {
+            'url': captured['url'],
+            'file': filename,
+            'kind': kind,
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+            'items': items,
+        }
+        print(f"✅ {path}: {len(items)} items -> {filename}")
+
+    with open(FIXTURES_DIR / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+
+
+# =============================================================================
+# Regression Check
+# =============================================================================
+
+def check(manifest):
+    """Replay every fixture and compare with the recorded items, returns number of failures"""
+    failures = 0
+    for path, entry in manifest.items():
+        text = (FIXTURES_DIR / entry['file']).read_text(encoding='utf-8')
+        expected = [tuple(item) for item in entry['items']]
+        try:
+            actual = run_feed(path, lambda url, timeout=30: ReplayResponse(text))
+        except Exception as e:
+            print(f"❌ {path}: {e}")
+            failures += 1
+            continue
+
+        if actual == expected:
+            print(f"✅ {path}: {len(actual)} items")
+        else:
+            failures += 1
+            missing = [item for item in expected if item not in actual]
+            extra = [item for item in actual if item not in expected]
+            print(f"❌ {path}: {len(actual)} items, expected {len(expected)} "
+                  f"({len(missing)} missing, {len(extra)} unexpected)")
+            for title, link in missing[:3]:
+                print(f"     - {title} {link}")
+            for title, link in extra[:3]:
+                print(f"     + {title} {link}")
+    return failures
+
+
+# =============================================================================
+# Benchmark
+# =============================================================================
+
+def best_time(func, repeat):
+    """Fastest of `repeat` runs, in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def soup_links(markup, selector):
+    """Link extraction as done before lxml: html.parser + CSS select"""
+    soup = BeautifulSoup(markup, 'html.parser')
+    return [(a.get_text(strip=True), a.get('href', '')) for a in soup.select(rss_server.LINK_SELECTORS[selector][0])]
+
+
+def elementtree_feed(title, link, description, items):
+    """RSS serialization as done before streaming: ElementTree + tostring"""
+    rss = ET.Element('rss', version='2.0')
+    channel = ET.SubElement(rss, 'channel')
+    ET.SubElement(channel, 'title').text = title
+    ET.SubElement(channel, 'link').text = link
+    ET.SubElement(channel, 'description').text = description
+    ET.SubElement(channel, 'lastBuildDate').text = datetime.utcnow().strftime('%a, %d %b %Y %H:%M:%S GMT')
+    ET.SubElement(channel, 'language').text = 'zh-hk'
+    for item in items:
+        item_elem = ET.SubElement(channel, 'item')
+        ET.SubElement(item_elem, 'title').text = item.get('title', '')
+        ET.SubElement(item_elem, 'link').text = item.get('link', '')
+        ET.SubElement(item_elem, 'description').text = item.get('description', '')
+        if item.get('pubDate'):
+            ET.SubElement(item_elem, 'pubDate').text = item['pubDate']
+        ET.SubElement(item_elem, 'guid').text = hashlib.md5(item.get('link', '').encode()).hexdigest()
+    return '<?xml version="1.0" encoding="UTF-8"?>\n' + ET.tostring(rss, encoding='unicode')
+
+
+def benchmark(manifest, repeat):
+    """Print per-fixture parse and serialization timings"""
+    if not rss_server.LXML_AVAILABLE:
+        print("⚠️ lxml not installed - rss_server is using BeautifulSoup, nothing to compare")
+        return
+
+    print(f"\n{'Feed':<22} {'KB':>6} {'bs4 ms':>8} {'lxml ms':>8} {'x':>6}   {'ET ms':>7} {'stream ms':>9} {'x':>6}")
+    print("-" * 84)
+    totals = [0.0, 0.0, 0.0, 0.0]
+    pub_date = datetime.utcnow().strftime('%a, %d %b %Y %H:%M:%S GMT')
+
+    for path, entry in manifest.items():
+        if entry['kind'] != 'html':
+            continue
+        text = (FIXTURES_DIR / entry['file']).read_text(encoding='utf-8')
+        selector = selector_for(path)
+        if soup_links(text, selector) != rss_server.extract_links(text, selector):
+            print(f"⚠️ {path}: bs4 and lxml disagree on this page")
+
+        items = [{'title': title, 'link': link, 'description': title, 'pubDate': pub_date}
+                 for title, link in entry['items']]
+        times = [
+            best_time(lambda: soup_links(text, selector), repeat),
+            best_time(lambda: rss_server.extract_links(text, selector), repeat),
+            best_time(lambda: elementtree_feed(path, path, path, items), repeat * 10),
+            best_time(lambda: rss_server.create_rss_feed(path, path, path, items), repeat * 10),
+        ]
+        totals = [total + t for total, t in zip(totals, times)]
+        print(f"{path:<22} {len(text) / 1024:>6.0f} {times[0]:>8.2f} {times[1]:>8.2f} {times[0] / times[1]:>5.1f}x"
+              f"   {times[2]:>7.3f} {times[3]:>9.3f} {times[2] / times[3]:>5.1f}x")
+
+    if totals[1]:
+        print("-" * 84)
+        print(f"{'Total':<22} {'':>6} {totals[0]:>8.2f} {totals[1]:>8.2f} {totals[0] / totals[1]:>5.1f}x"
+              f"   {totals[2]:>7.3f} {totals[3]:>9.3f} {totals[2] / totals[3]:>5.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Offline parser benchmark for rss_server')
+    parser.add_argument('--record', action='store_true', help='Fetch live pages and (re)write the fixtures')
+    parser.add_argument('--feed', action='append', help='Only this feed path (repeatable, e.g. --feed /hkej/stock)')
+    parser.add_argument('--repeat', type=int, default=20, help='Timing runs per fixture (best is reported)')
+    parser.add_argument('--check-only', action='store_true', help='Skip timings, only check recorded items')
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.feed or list(rss_server.FEEDS.values()))
+        sys.exit(0)
+
+    manifest = load_manifest()
+    if args.feed:
+        manifest = {path: entry for path, entry in manifest.items() if path in args.feed}
+    if not manifest:
+        print(f"❌ No fixtures in {FIXTURES_DIR} - run with --record first")
+        sys.exit(1)
+
+    failures = check(manifest)
+    if not args.check_only:
+        benchmark(manifest, args.repeat)
+    sys.exit(1 if failures else 0)
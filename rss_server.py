@@ -4,16 +4,39 @@ Custom RSS Feed Server
 ======================
 Generates RSS feeds from sites that don't offer them.
 Port: 1201
+
+Feeds are cached in memory and under rss_cache/ and served instantly;
+stale feeds are re-scraped in the background (RSS_CACHE_TTL,
+RSS_CACHE_MAX_STALE, RSS_CACHE_DIR). All feeds are refreshed in parallel
+over pooled connections (RSS_HOST_CONCURRENCY per site); /all merges them.
+Pages are parsed with lxml (BeautifulSoup if lxml is missing); see
+rss_benchmark.py for the offline parser benchmark.
 """
 
 from flask import Flask, Response, request
 import requests
 from bs4 import BeautifulSoup
-from datetime import datetime
+from datetime import datetime, timezone
 import xml.etree.ElementTree as ET
 from xml.dom import minidom
+from xml.sax.saxutils import escape
 import logging
 import hashlib
+import functools
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
 
 app = Flask(__name__)
 
@@ -25,54 +48,298 @@ HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 }
 
+# Max simultaneous requests to one site (parallel refreshes share the limit)
+HOST_CONCURRENCY = int(os.environ.get('RSS_HOST_CONCURRENCY', 4))
+
+# Every feed, used by the index page, /all and the background refresher
+FEEDS = {
+    'HKEJ Stock': '/hkej/stock',
+    'HKEJ Property': '/hkej/property',
+    'HKEJ International': '/hkej/international',
+    'HKEJ China': '/hkej/china',
+    'HKEJ Hong Kong': '/hkej/hongkong',
+    'AAStocks News': '/aastocks/news',
+    'Yahoo Finance HK': '/yahoo/finance-hk',
+    'RTHK Local': '/rthk/local',
+    'RTHK Finance': '/rthk/finance',
+    'Sing Tao Hong Kong': '/singtao/hongkong',
+    'Sing Tao Finance': '/singtao/finance',
+    'HK01 Finance': '/hk01/finance',
+    'HK01 Hong Kong': '/hk01/hongkong',
+    'HK01 Hot': '/hk01/hot',
+    'Now Finance': '/nowfinance',
+}
+
+# =============================================================================
+# HTTP (pooled keep-alive connections, per-host limits)
+# =============================================================================
+
+_session = requests.Session()
+_session.headers.update(HEADERS)
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=HOST_CONCURRENCY)
+_session.mount('http://', _adapter)
+_session.mount('https://', _adapter)
+
+_host_slots = {}
+_host_guard = threading.Lock()
+
+def fetch(url, timeout=30):
+    """GET through the shared session, at most HOST_CONCURRENCY requests per host"""
+    host = urlsplit(url).netloc
+    with _host_guard:
+        slots = _host_slots.setdefault(host, threading.BoundedSemaphore(HOST_CONCURRENCY))
+    with slots:
+        response = _session.get(url, timeout=timeout)
+    response.encoding = 'utf-8'
+    return response
+
+def _rss_element(tag, text):
+    # Same output as ElementTree: escaped text, self-closing when empty
+    return f'<{tag}>{escape(text)}</{tag}>' if text else f'<{tag} />'
+
+def iter_rss_feed(title, link, description, items):
+    """Yield RSS 2.0 XML in chunks, without building an element tree"""
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0"><channel>'
+    yield _rss_element('title', title)
+    yield _rss_element('link', link)
+    yield _rss_element('description', description)
+    yield _rss_element('lastBuildDate', datetime.utcnow().strftime('%a, %d %b %Y %H:%M:%S GMT'))
+    yield _rss_element('language', 'zh-hk')
+    
+    for item in items:
+        item_link = item.get('link', '')
+        # Generate guid from link
+        guid = hashlib.md5(item_link.encode()).hexdigest()
+        yield ''.join((
+            '<item>',
+            _rss_element('title', item.get('title', '')),
+            _rss_element('link', item_link),
+            _rss_element('description', item.get('description', '')),
+            _rss_element('pubDate', item['pubDate']) if item.get('pubDate') else '',
+            _rss_element('guid', guid),
+            '</item>',
+        ))
+    
+    yield '</channel></rss>'
+
 def create_rss_feed(title, link, description, items):
     """Create RSS 2.0 XML feed"""
-    rss = ET.Element('rss', version='2.0')
-    channel = ET.SubElement(rss, 'channel')
+    return ''.join(iter_rss_feed(title, link, description, items))
+
+# =============================================================================
+# HTML Link Extraction
+# =============================================================================
+
+# Links scraped per site: CSS selector (BeautifulSoup fallback) and the same
+# selector as precompiled XPath for lxml
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+LINK_SELECTORS = {
+    'anchors': ('a[href]', '//a[@href]'),
+    'hkej': (
+        'div.content_list_main a, article a, .news-item a, h3 a, .article-title a',
+        f"//div[{_has_class('content_list_main')}]//a | //article//a"
+        f" | //*[{_has_class('news-item')}]//a | //h3//a | //*[{_has_class('article-title')}]//a",
+    ),
+}
+
+if LXML_AVAILABLE:
+    _HTML_PARSER = lxml_html.HTMLParser(encoding='utf-8')
+    _LINK_XPATHS = {name: etree.XPath(xpath) for name, (_, xpath) in LINK_SELECTORS.items()}
+    _TEXT_NODES = etree.XPath('.//text()')
+
+def extract_links(markup, selector='anchors'):
+    """
+    (text, href) for every link matched by LINK_SELECTORS[selector], in
+    document order; text is stripped like BeautifulSoup get_text(strip=True)
+    """
+    if not LXML_AVAILABLE:
+        soup = BeautifulSoup(markup, 'html.parser')
+        return [(a.get_text(strip=True), a.get('href', '')) for a in soup.select(LINK_SELECTORS[selector][0])]
     
-    ET.SubElement(channel, 'title').text = title
-    ET.SubElement(channel, 'link').text = link
-    ET.SubElement(channel, 'description').text = description
-    ET.SubElement(channel, 'lastBuildDate').text = datetime.utcnow().strftime('%a, %d %b %Y %H:%M:%S GMT')
-    ET.SubElement(channel, 'language').text = 'zh-hk'
+    try:
+        root = lxml_html.fromstring(markup.encode('utf-8'), parser=_HTML_PARSER)
+    except etree.ParserError:  # empty document
+        return []
+    return [
+        (''.join(text.strip() for text in _TEXT_NODES(a)), a.get('href', ''))
+        for a in _LINK_XPATHS[selector](root)
+    ]
+
+# =============================================================================
+# Feed Cache (stale-while-revalidate)
+# =============================================================================
+
+# Seconds a feed is served from cache without re-scraping
+CACHE_TTL = int(os.environ.get('RSS_CACHE_TTL', 300))
+# Older than this, a feed is re-scraped before responding instead of in the background
+CACHE_MAX_STALE = int(os.environ.get('RSS_CACHE_MAX_STALE', 24 * 60 * 60))
+CACHE_DIR = os.environ.get('RSS_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rss_cache'))
+
+_feed_cache = {}   # request path -> {'body': bytes, 'etag': str, 'fetched_at': float}
+_feed_locks = {}
+_refreshing = set()
+_cache_guard = threading.Lock()
+
+def _feed_lock(key):
+    """One lock per feed so concurrent misses trigger a single scrape"""
+    with _cache_guard:
+        return _feed_locks.setdefault(key, threading.Lock())
+
+def _cache_path(key):
+    return os.path.join(CACHE_DIR, hashlib.sha1(key.encode()).hexdigest() + '.json')
+
+def _load_cached(key):
+    """Cached feed from memory, falling back to the on-disk copy"""
+    entry = _feed_cache.get(key)
+    if entry is None:
+        try:
+            with open(_cache_path(key), encoding='utf-8') as f:
+                stored = json.load(f)
+            entry = {
+                'body': stored['body'].encode('utf-8'),
+                'etag': stored['etag'],
+                'fetched_at': stored['fetched_at'],
+            }
+            _feed_cache[key] = entry
+        except (OSError, ValueError, KeyError):
+            return None
+    return entry
+
+def _store_cached(key, body):
+    entry = {'body': body, 'etag': hashlib.md5(body).hexdigest(), 'fetched_at': time.time()}
+    _feed_cache[key] = entry
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = _cache_path(key) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'key': key, 'body': body.decode('utf-8'), 'etag': entry['etag'],
+                       'fetched_at': entry['fetched_at']}, f, ensure_ascii=False)
+        os.replace(tmp_path, _cache_path(key))
+    except OSError as e:
+        logger.warning(f"Feed cache write failed for {key}: {e}")
+    return entry
+
+def _scrape(key, view, kwargs):
+    """Run the feed view and cache a successful response (None on failure)"""
+    response = view(**kwargs)
+    if response.status_code != 200:
+        return None
+    return _store_cached(key, response.get_data())
+
+def _refresh_in_background(key, view, kwargs):
+    with _cache_guard:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
     
-    for item in items:
-        item_elem = ET.SubElement(channel, 'item')
-        ET.SubElement(item_elem, 'title').text = item.get('title', '')
-        ET.SubElement(item_elem, 'link').text = item.get('link', '')
-        ET.SubElement(item_elem, 'description').text = item.get('description', '')
-        if item.get('pubDate'):
-            ET.SubElement(item_elem, 'pubDate').text = item['pubDate']
-        # Generate guid from link
-        guid = hashlib.md5(item.get('link', '').encode()).hexdigest()
-        ET.SubElement(item_elem, 'guid').text = guid
+    def refresh():
+        try:
+            with _feed_lock(key):
+                _scrape(key, view, kwargs)
+        except Exception as e:
+            logger.error(f"Background refresh of {key} failed: {e}")
+        finally:
+            with _cache_guard:
+                _refreshing.discard(key)
+    
+    threading.Thread(target=refresh, daemon=True).start()
+
+def _feed_response(entry, cache_status):
+    """RSS response with ETag / Last-Modified, 304 if the client copy is current"""
+    response = Response(entry['body'], mimetype='application/rss+xml')
+    response.set_etag(entry['etag'])
+    response.last_modified = datetime.fromtimestamp(int(entry['fetched_at']), timezone.utc)
+    response.cache_control.public = True
+    response.cache_control.max_age = max(0, int(CACHE_TTL - (time.time() - entry['fetched_at'])))
+    response.headers['X-Cache'] = cache_status
+    return response.make_conditional(request)
+
+def cached_feed(view):
+    """
+    Serve a feed route from cache:
+    fresh (< CACHE_TTL) -> cached XML
+    stale (< CACHE_MAX_STALE) -> cached XML now, re-scrape in the background
+    missing / too old -> scrape now (one scrape per feed, others wait for it)
+    Error responses are never cached; a failed scrape falls back to the stale copy.
+    """
+    @functools.wraps(view)
+    def wrapper(**kwargs):
+        key = request.path
+        entry = _load_cached(key)
+        if entry is not None:
+            age = time.time() - entry['fetched_at']
+            if age < CACHE_TTL:
+                return _feed_response(entry, 'HIT')
+            if age < CACHE_MAX_STALE:
+                _refresh_in_background(key, view, kwargs)
+                return _feed_response(entry, 'STALE')
+        
+        with _feed_lock(key):
+            latest = _load_cached(key)
+            if latest is not None and latest is not entry and time.time() - latest['fetched_at'] < CACHE_TTL:
+                return _feed_response(latest, 'HIT')
+            response = view(**kwargs)
+            if response.status_code != 200:
+                return _feed_response(entry, 'STALE') if entry is not None else response
+            return _feed_response(_store_cached(key, response.get_data()), 'MISS')
+    
+    return wrapper
+
+def refresh_feeds(paths, stale_only=False):
+    """
+    Re-scrape feeds in parallel; total time is that of the slowest source
+    (requests to the same site still queue behind HOST_CONCURRENCY)
+    
+    Returns:
+        {path: True if the feed is cached and current}
+    """
+    adapter = app.url_map.bind('localhost')
+    
+    def refresh(path):
+        endpoint, kwargs = adapter.match(path)
+        view = app.view_functions[endpoint].__wrapped__
+        with _feed_lock(path):
+            entry = _load_cached(path)
+            if stale_only and entry is not None and time.time() - entry['fetched_at'] < CACHE_TTL:
+                return True
+            try:
+                return _scrape(path, view, kwargs) is not None
+            except Exception as e:
+                logger.error(f"Refresh of {path} failed: {e}")
+                return False
     
-    # Pretty print
-    xml_str = ET.tostring(rss, encoding='unicode')
-    return '<?xml version="1.0" encoding="UTF-8"?>\n' + xml_str
+    if not paths:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(paths)) as executor:
+        return dict(zip(paths, executor.map(refresh, paths)))
+
+def run_refresher(interval=CACHE_TTL):
+    """Keep every feed warm (run in a daemon thread)"""
+    while True:
+        started = time.time()
+        results = refresh_feeds(list(FEEDS.values()))
+        logger.info(f"Refreshed {sum(results.values())}/{len(results)} feeds in {time.time() - started:.1f}s")
+        time.sleep(interval)
 
 # =============================================================================
 # HKEJ (信報) Stock News
 # =============================================================================
 
 @app.route('/hkej/stock')
+@cached_feed
 def hkej_stock():
     """HKEJ Stock News RSS Feed"""
     try:
         url = 'https://www.hkej.com/instantnews/stock'
-        response = requests.get(url, headers=HEADERS, timeout=30)
-        response.encoding = 'utf-8'
+        response = fetch(url)
         
-        soup = BeautifulSoup(response.text, 'html.parser')
         items = []
         
         # Find news articles
-        articles = soup.select('div.content_list_main a, article a, .news-item a, h3 a, .article-title a')
-        
         seen_links = set()
-        for article in articles:
-            title = article.get_text(strip=True)
-            href = article.get('href', '')
+        for title, href in extract_links(response.text, 'hkej'):
             
             if not title or len(title) < 5:
                 continue
@@ -125,22 +392,17 @@ def hkej_stock():
 # =============================================================================
 
 @app.route('/hkej/property')
+@cached_feed
 def hkej_property():
     """HKEJ Property News RSS Feed"""
     try:
         url = 'https://www.hkej.com/instantnews/property'
-        response = requests.get(url, headers=HEADERS, timeout=30)
-        response.encoding = 'utf-8'
+        response = fetch(url)
         
-        soup = BeautifulSoup(response.text, 'html.parser')
         items = []
         
-        articles = soup.select('div.content_list_main a, article a, .news-item a, h3 a, .article-title a')
-        
         seen_links = set()
-        for article in articles:
-            title = article.get_text(strip=True)
-            href = article.get('href', '')
+        for title, href in extract_links(response.text, 'hkej'):
             
             if not title or len(title) < 5:
                 continue
@@ -190,22 +452,17 @@ def hkej_property():
 # =============================================================================
 
 @app.route('/hkej/international')
+@cached_feed
 def hkej_international():
     """HKEJ International News RSS Feed"""
     try:
         url = 'https://www.hkej.com/instantnews/international'
-        response = requests.get(url, headers=HEADERS, timeout=30)
-        response.encoding = 'utf-8'
+        response = fetch(url)
         
-        soup = BeautifulSoup(response.text, 'html.parser')
         items = []
         
-        articles = soup.select('div.content_list_main a, article a, .news-item a, h3 a, .article-title a')
-        
         seen_links = set()
-        for article in articles:
-            title = article.get_text(strip=True)
-            href = article.get('href', '')
+        for title, href in extract_links(response.text, 'hkej'):
             
             if not title or len(title) < 5:
                 continue
@@ -255,6 +512,7 @@ def hkej_international():
 # =============================================================================
 
 @app.route('/hkej/<section>')
+@cached_feed
 def hkej_section(section):
     """Generic HKEJ section RSS Feed"""
     valid_sections = ['stock', 'property', 'international', 'china', 'hongkong', 'current']
@@ -264,18 +522,12 @@ def hkej_section(section):
     
     try:
         url = f'https://www.hkej.com/instantnews/{section}'
-        response = requests.get(url, headers=HEADERS, timeout=30)
-        response.encoding = 'utf-8'
+        response = fetch(url)
         
-        soup = BeautifulSoup(response.text, 'html.parser')
         items = []
         
-        articles = soup.select('div.content_list_main a, article a, .news-item a, h3 a, .article-title a')
-        
         seen_links = set()
-        for article in articles:
-            title = article.get_text(strip=True)
-            href = article.get('href', '')
+        for title, href in extract_links(response.text, 'hkej'):
             
             if not title or len(title) < 5:
                 continue
@@ -334,23 +586,17 @@ def hkej_section(section):
 # =============================================================================
 
 @app.route('/aastocks/news')
+@cached_feed
 def aastocks_news():
     """AAStocks News RSS Feed"""
     try:
         url = 'http://www.aastocks.com/tc/stocks/news/aafn-con/NOW.0/all/1'
-        response = requests.get(url, headers=HEADERS, timeout=30)
-        response.encoding = 'utf-8'
+        response = fetch(url)
         
-        soup = BeautifulSoup(response.text, 'html.parser')
         items = []
         
-        # Find news items - AAStocks uses specific classes
-        news_items = soup.select('div[class*="newshead"], div[class*="newscontent"], a[class*="news"]')
-        
-        # Alternative: find all links with news URLs
-        for link in soup.find_all('a', href=True):
-            href = link.get('href', '')
-            title = link.get_text(strip=True)
+        # Find all links with news URLs
+        for title, href in extract_links(response.text):
             
             if not title or len(title) < 10:
                 continue
@@ -408,20 +654,17 @@ def aastocks_news():
 # =============================================================================
 
 @app.route('/yahoo/finance-hk')
+@cached_feed
 def yahoo_finance_hk():
     """Yahoo Finance HK News RSS Feed"""
     try:
         url = 'https://hk.finance.yahoo.com/news/'
-        response = requests.get(url, headers=HEADERS, timeout=30)
-        response.encoding = 'utf-8'
+        response = fetch(url)
         
-        soup = BeautifulSoup(response.text, 'html.parser')
         items = []
         
         # Find news articles - Yahoo uses various link patterns
-        for link in soup.find_all('a', href=True):
-            href = link.get('href', '')
-            title = link.get_text(strip=True)
+        for title, href in extract_links(response.text):
             
             if not title or len(title) < 10:
                 continue
@@ -477,6 +720,7 @@ def yahoo_finance_hk():
 # =============================================================================
 
 @app.route('/rthk/<section>')
+@cached_feed
 def rthk_news(section):
     """RTHK News RSS Feed"""
     section_map = {
@@ -496,8 +740,7 @@ def rthk_news(section):
         # Try the API endpoint instead
         api_url = f'https://news.rthk.hk/rthk/webpageCache/services/loadModuleBy498.php?lang=zh-TW&newsType={url_section}'
         
-        response = requests.get(api_url, headers=HEADERS, timeout=30)
-        response.encoding = 'utf-8'
+        response = fetch(api_url)
         
         items = []
         
@@ -512,10 +755,7 @@ def rthk_news(section):
                 })
         except:
             # Fallback to HTML scraping
-            soup = BeautifulSoup(response.text, 'html.parser')
-            for link in soup.find_all('a', href=True):
-                title = link.get_text(strip=True)
-                href = link.get('href', '')
+            for title, href in extract_links(response.text):
                 
                 if not title or len(title) < 5:
                     continue
@@ -556,6 +796,7 @@ def rthk_news(section):
 # =============================================================================
 
 @app.route('/singtao/<section>')
+@cached_feed
 def singtao_news(section):
     """Sing Tao News RSS Feed"""
     section_map = {
@@ -572,16 +813,12 @@ def singtao_news(section):
         section_name, url_section = section_map[section]
         url = f'https://std.stheadline.com/realtime/{url_section}'
         
-        response = requests.get(url, headers=HEADERS, timeout=30)
-        response.encoding = 'utf-8'
+        response = fetch(url)
         
-        soup = BeautifulSoup(response.text, 'html.parser')
         items = []
         
         # Find news articles
-        for link in soup.find_all('a', href=True):
-            title = link.get_text(strip=True)
-            href = link.get('href', '')
+        for title, href in extract_links(response.text):
             
             if not title or len(title) < 8:
                 continue
@@ -634,6 +871,7 @@ def singtao_news(section):
 # =============================================================================
 
 @app.route('/hk01/<section>')
+@cached_feed
 def hk01_news(section):
     """HK01 News RSS Feed via API"""
     section_map = {
@@ -660,7 +898,7 @@ def hk01_news(section):
         else:
             api_url = f'https://web-data.api.hk01.com/v2/feed/zone/{zone_id}?offset=0&limit=30'
         
-        response = requests.get(api_url, headers=HEADERS, timeout=30)
+        response = fetch(api_url)
         data = response.json()
         
         for article in data.get('items', []):
@@ -697,19 +935,16 @@ def hk01_news(section):
 # =============================================================================
 
 @app.route('/nowfinance')
+@cached_feed
 def now_finance():
     """Now Finance News RSS Feed"""
     try:
         url = 'https://finance.now.com/news'
-        response = requests.get(url, headers=HEADERS, timeout=30)
-        response.encoding = 'utf-8'
+        response = fetch(url)
         
-        soup = BeautifulSoup(response.text, 'html.parser')
         items = []
         
-        for link in soup.find_all('a', href=True):
-            title = link.get_text(strip=True)
-            href = link.get('href', '')
+        for title, href in extract_links(response.text):
             
             if not title or len(title) < 8:
                 continue
@@ -755,6 +990,42 @@ def now_finance():
         logger.error(f"Now Finance error: {e}")
         return Response(f"Error: {e}", status=500)
 
+# =============================================================================
+# All Feeds (merged)
+# =============================================================================
+
+@app.route('/all')
+@cached_feed
+def all_feeds():
+    """Every feed in FEEDS merged into one, deduplicated by link and title"""
+    paths = list(FEEDS.values())
+    refresh_feeds(paths, stale_only=True)
+    
+    items = []
+    seen_links = set()
+    seen_titles = set()
+    for path in paths:
+        entry = _load_cached(path)
+        if entry is None:
+            continue
+        for item in ET.fromstring(entry['body']).iter('item'):
+            fields = {child.tag: child.text or '' for child in item if child.tag != 'guid'}
+            if fields.get('link') in seen_links or fields.get('title') in seen_titles:
+                continue
+            seen_links.add(fields.get('link'))
+            seen_titles.add(fields.get('title'))
+            items.append(fields)
+    
+    rss = create_rss_feed(
+        title='香港財經新聞 - 全部',
+        link='http://localhost:1201/all',
+        description='All feeds merged',
+        items=items
+    )
+    
+    logger.info(f"All feeds: Generated {len(items)} items")
+    return Response(rss, mimetype='application/rss+xml')
+
 # =============================================================================
 # Status & Index
 # =============================================================================
@@ -762,23 +1033,7 @@ def now_finance():
 @app.route('/')
 def index():
     """List available feeds"""
-    feeds = {
-        'HKEJ Stock': '/hkej/stock',
-        'HKEJ Property': '/hkej/property',
-        'HKEJ International': '/hkej/international',
-        'HKEJ China': '/hkej/china',
-        'HKEJ Hong Kong': '/hkej/hongkong',
-        'AAStocks News': '/aastocks/news',
-        'Yahoo Finance HK': '/yahoo/finance-hk',
-        'RTHK Local': '/rthk/local',
-        'RTHK Finance': '/rthk/finance',
-        'Sing Tao Hong Kong': '/singtao/hongkong',
-        'Sing Tao Finance': '/singtao/finance',
-        'HK01 Finance': '/hk01/finance',
-        'HK01 Hong Kong': '/hk01/hongkong',
-        'HK01 Hot': '/hk01/hot',
-        'Now Finance': '/nowfinance',
-    }
+    feeds = dict(FEEDS, **{'All (merged)': '/all'})
     
     html = '<h1>Custom RSS Server</h1><ul>'
     for name, path in feeds.items():
@@ -789,11 +1044,14 @@ def index():
 
 @app.route('/health')
 def health():
-    return {'status': 'ok', 'timestamp': datetime.utcnow().isoformat()}
+    return {'status': 'ok', 'timestamp': datetime.utcnow().isoformat(), 'cached_feeds': len(_feed_cache)}
 
 # =============================================================================
 # Main
 # =============================================================================
 
 if __name__ == '__main__':
+    # Re-scrape every feed in parallel each CACHE_TTL so requests hit a warm cache
+    threading.Thread(target=run_refresher, daemon=True).start()
+    
     app.run(host='0.0.0.0', port=1201, debug=False)
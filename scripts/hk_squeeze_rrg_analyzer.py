@@ -8,6 +8,7 @@ Usage:
     
     timeframe: 1h, 4h, 1d (default: 1h)
     output: json, telegram, text (default: text)
+    --full: recompute from a full download instead of resuming data/squeeze_state/
     
 Example:
     python3 hk_squeeze_rrg_analyzer.py 1h telegram
@@ -26,7 +27,14 @@ import numpy as np
 
 # Add market-analyzer to path for RRG functions
 sys.path.insert(0, '/root/clawd/projects/market-analyzer')
-from rrg_rs_analyzer import calculate_rrg_values, get_rrg_quadrant
+from rrg_quadrants import calculate_rrg_panel, label_quadrants, quadrant_name, NO_QUADRANT
+
+# Shared squeeze indicators live in the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from squeeze_indicators import (bollinger_bands, keltner_channels, in_squeeze,
+                                relative_strength_index, momentum)
+
+from squeeze_state import scan_latest
 
 # ============================================================================
 # Configuration
@@ -67,47 +75,45 @@ JC_ALGOS_CHANNEL = '-1003796838384'  # JC Algos NEW channel
 
 def calculate_bb_squeeze(df: pd.DataFrame, bb_period: int = 20, bb_std: float = 2.0,
                          kc_period: int = 20, kc_mult: float = 1.5) -> pd.DataFrame:
-    """Calculate Bollinger Band Squeeze indicators"""
+    """Calculate Bollinger Band Squeeze indicators (see squeeze_indicators.py)"""
     
     # Bollinger Bands
-    df['BB_MID'] = df['Close'].rolling(window=bb_period).mean()
-    df['BB_STD'] = df['Close'].rolling(window=bb_period).std()
-    df['BB_UPPER'] = df['BB_MID'] + (bb_std * df['BB_STD'])
-    df['BB_LOWER'] = df['BB_MID'] - (bb_std * df['BB_STD'])
-    df['BB_WIDTH'] = (df['BB_UPPER'] - df['BB_LOWER']) / df['BB_MID']
+    bb = bollinger_bands(df['Close'], bb_period, bb_std)
+    df['BB_MID'] = bb['mid']
+    df['BB_STD'] = bb['std']
+    df['BB_UPPER'] = bb['upper']
+    df['BB_LOWER'] = bb['lower']
+    df['BB_WIDTH'] = bb['width']
     
     # Keltner Channels
-    df['TR'] = np.maximum(
-        df['High'] - df['Low'],
-        np.maximum(
-            abs(df['High'] - df['Close'].shift(1)),
-            abs(df['Low'] - df['Close'].shift(1))
-        )
-    )
-    df['ATR'] = df['TR'].rolling(window=kc_period).mean()
-    df['KC_MID'] = df['Close'].rolling(window=kc_period).mean()
-    df['KC_UPPER'] = df['KC_MID'] + (kc_mult * df['ATR'])
-    df['KC_LOWER'] = df['KC_MID'] - (kc_mult * df['ATR'])
+    kc = keltner_channels(df['High'], df['Low'], df['Close'], kc_period, kc_mult)
+    df['TR'] = kc['tr']
+    df['ATR'] = kc['atr']
+    df['KC_MID'] = kc['mid']
+    df['KC_UPPER'] = kc['upper']
+    df['KC_LOWER'] = kc['lower']
     
     # Squeeze detection (BB inside KC)
-    df['SQUEEZE'] = (df['BB_LOWER'] > df['KC_LOWER']) & (df['BB_UPPER'] < df['KC_UPPER'])
+    df['SQUEEZE'] = in_squeeze(bb, kc)
     
     # RSI for direction
-    delta = df['Close'].diff()
-    gain = delta.where(delta > 0, 0).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    df['RSI'] = 100 - (100 / (1 + rs))
+    df['RSI'] = relative_strength_index(df['Close'], 14)
     
     # Momentum (for squeeze direction)
-    df['MOM'] = df['Close'] - df['Close'].rolling(window=12).mean()
+    df['MOM'] = momentum(df['Close'], 12)
     
     return df
 
 
-def detect_squeezes(symbols: List[str], timeframe: str = '1h', 
-                    lookback_days: int = 60) -> Dict[str, List[dict]]:
-    """Detect BB squeezes for a list of symbols"""
+def latest_bars(symbols: List[str], timeframe: str = '1h',
+                lookback_days: int = 60) -> Dict[str, dict]:
+    """
+    Squeeze indicators at the latest bar of each symbol, recomputed from a
+    full download (the slow path - detect_squeezes uses the state file)
+    
+    Returns:
+        {symbol: dict with the same fields as squeeze_state.scan_latest}
+    """
     
     # Map timeframe to yfinance interval
     interval_map = {
@@ -120,9 +126,7 @@ def detect_squeezes(symbols: List[str], timeframe: str = '1h',
     end = datetime.now()
     start = end - timedelta(days=lookback_days)
     
-    results = {'bullish': [], 'bearish': [], 'neutral': []}
-    
-    print(f"Scanning {len(symbols)} HK symbols for {timeframe} squeeze...", file=sys.stderr)
+    latest = {}
     
     # Download all data at once for efficiency
     try:
@@ -130,7 +134,7 @@ def detect_squeezes(symbols: List[str], timeframe: str = '1h',
                           progress=False, auto_adjust=True, group_by='ticker')
     except Exception as e:
         print(f"Error downloading data: {e}", file=sys.stderr)
-        return results
+        return latest
     
     for symbol in symbols:
         try:
@@ -154,19 +158,61 @@ def detect_squeezes(symbols: List[str], timeframe: str = '1h',
             
             # Calculate squeeze
             df = calculate_bb_squeeze(df)
+            last = df.iloc[-1]
             
+            latest[symbol] = {
+                'timestamp': df.index[-1],
+                'bars': len(df),
+                'close': last['Close'],
+                'prev_close': df['Close'].iloc[-2] if len(df) > 1 else last['Close'],
+                'bb_upper': last['BB_UPPER'],
+                'bb_lower': last['BB_LOWER'],
+                'bb_width': last['BB_WIDTH'],
+                'squeeze': bool(last['SQUEEZE']),
+                'rsi': last['RSI'],
+                'mom': last['MOM'],
+            }
+        except Exception as e:
+            continue
+    
+    return latest
+
+
+def detect_squeezes(symbols: List[str], timeframe: str = '1h', 
+                    lookback_days: int = 60, incremental: bool = True) -> Dict[str, List[dict]]:
+    """
+    Detect BB squeezes for a list of symbols (bullish / bearish / neutral
+    lists, plus 'bar_time' of the newest bar scanned)
+    
+    With `incremental` (default) the rolling indicator state is resumed from
+    data/squeeze_state/ and only bars since the last run are downloaded;
+    otherwise the full lookback window is downloaded and recomputed.
+    """
+    
+    results = {'bullish': [], 'bearish': [], 'neutral': []}
+    
+    print(f"Scanning {len(symbols)} HK symbols for {timeframe} squeeze...", file=sys.stderr)
+    
+    if incremental:
+        latest = scan_latest(symbols, timeframe, lookback_days, name='hk')
+    else:
+        latest = latest_bars(symbols, timeframe, lookback_days)
+    
+    for symbol in symbols:
+        bar = latest.get(symbol)
+        try:
             # Check if in squeeze
-            if not df['SQUEEZE'].iloc[-1]:
+            if bar is None or not bar['squeeze']:
                 continue
             
             # Get current values
-            price = df['Close'].iloc[-1]
-            bbw = df['BB_WIDTH'].iloc[-1]
-            rsi = df['RSI'].iloc[-1]
-            mom = df['MOM'].iloc[-1]
-            bb_upper = df['BB_UPPER'].iloc[-1]
-            bb_lower = df['BB_LOWER'].iloc[-1]
-            prev_close = df['Close'].iloc[-2] if len(df) > 1 else price
+            price = bar['close']
+            bbw = bar['bb_width']
+            rsi = bar['rsi']
+            mom = bar['mom']
+            bb_upper = bar['bb_upper']
+            bb_lower = bar['bb_lower']
+            prev_close = bar['prev_close']
             change_pct = (price - prev_close) / prev_close * 100
             
             # Format symbol for display (remove .HK suffix)
@@ -199,6 +245,10 @@ def detect_squeezes(symbols: List[str], timeframe: str = '1h',
     for category in results:
         results[category].sort(key=lambda x: x['bbw'])
     
+    # Newest bar in the scan (cache key for squeeze_service)
+    bar_times = [bar['timestamp'] for bar in latest.values()]
+    results['bar_time'] = max(bar_times).isoformat() if bar_times else None
+    
     return results
 
 
@@ -235,32 +285,35 @@ def analyze_rrg_quadrants(symbols: List[str], benchmark: str = '^HSI') -> Dict[s
         'lagging': []
     }
     
+    # One RRG pass over every symbol
+    closes = data[[s for s in dict.fromkeys(full_symbols) if s in data.columns]]
+    rs_ratio, rs_momentum = calculate_rrg_panel(closes, benchmark_data)
+    codes = label_quadrants(rs_ratio, rs_momentum)
+    ratio_values = rs_ratio.to_numpy()
+    momentum_values = rs_momentum.to_numpy()
+    column_pos = {symbol: i for i, symbol in enumerate(closes.columns)}
+    
     for i, symbol in enumerate(full_symbols):
-        try:
-            if symbol not in data.columns:
-                continue
-                
-            asset_data = data[symbol].dropna()
-            bench = benchmark_data.loc[asset_data.index]
-            
-            rs_ratio, rs_momentum = calculate_rrg_values(asset_data, bench)
-            latest_ratio = rs_ratio.iloc[-1]
-            latest_momentum = rs_momentum.iloc[-1]
-            quadrant = get_rrg_quadrant(latest_ratio, latest_momentum)
-            
-            # Use display symbol (without .HK)
-            display_symbol = symbols[i] if i < len(symbols) else symbol.replace('.HK', '')
-            
-            info = {
-                'symbol': display_symbol,
-                'rs_ratio': round(latest_ratio, 1),
-                'rs_momentum': round(latest_momentum, 1)
-            }
-            
-            quadrants[quadrant.lower()].append(info)
-            
-        except Exception as e:
+        if symbol not in column_pos:
+            continue
+        col = column_pos[symbol]
+        
+        # Latest bar with a quadrant (a symbol's last bar may be missing)
+        rows = np.flatnonzero(codes[:, col] != NO_QUADRANT)
+        if not len(rows):
             continue
+        row = rows[-1]
+        
+        # Use display symbol (without .HK)
+        display_symbol = symbols[i] if i < len(symbols) else symbol.replace('.HK', '')
+        
+        info = {
+            'symbol': display_symbol,
+            'rs_ratio': round(float(ratio_values[row, col]), 1),
+            'rs_momentum': round(float(momentum_values[row, col]), 1)
+        }
+        
+        quadrants[quadrant_name(codes[row, col]).lower()].append(info)
     
     return quadrants
 
@@ -269,13 +322,13 @@ def analyze_rrg_quadrants(symbols: List[str], benchmark: str = '^HSI') -> Dict[s
 # Combined Analysis
 # ============================================================================
 
-def analyze_squeeze_rrg(timeframe: str = '1h') -> Dict:
+def analyze_squeeze_rrg(timeframe: str = '1h', incremental: bool = True) -> Dict:
     """Run combined BB Squeeze + RRG analysis"""
     
     timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M UTC')
     
     # Step 1: Detect squeezes
-    squeezes = detect_squeezes(HK_SYMBOLS, timeframe)
+    squeezes = detect_squeezes(HK_SYMBOLS, timeframe, incremental=incremental)
     
     # Step 2: Analyze RRG for bullish squeezes
     bullish_symbols = [s['symbol'] for s in squeezes['bullish']]
@@ -291,6 +344,7 @@ def analyze_squeeze_rrg(timeframe: str = '1h') -> Dict:
     result = {
         'timestamp': timestamp,
         'timeframe': timeframe,
+        'bar_time': squeezes['bar_time'],
         'total_squeezes': len(squeezes['bullish']) + len(squeezes['bearish']) + len(squeezes['neutral']),
         'bullish_count': len(squeezes['bullish']),
         'bearish_count': len(squeezes['bearish']),
@@ -420,10 +474,12 @@ def send_telegram(message: str, chat_id: str = None):
 # ============================================================================
 
 def main():
-    timeframe = sys.argv[1] if len(sys.argv) > 1 else '1h'
-    output_mode = sys.argv[2] if len(sys.argv) > 2 else 'text'
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    timeframe = args[0] if len(args) > 0 else '1h'
+    output_mode = args[1] if len(args) > 1 else 'text'
     
-    result = analyze_squeeze_rrg(timeframe)
+    # --full: ignore the squeeze state and recompute from a full download
+    result = analyze_squeeze_rrg(timeframe, incremental='--full' not in sys.argv)
     
     if output_mode == 'json':
         print(json.dumps(result, indent=2))
@@ -6,9 +6,10 @@ Endpoint: POST /webhook/squeeze-rrg?timeframe=1h
 """
 
 from flask import Flask, request, jsonify
-import subprocess
 import json
-import os
+
+import squeeze_rrg_analyzer as analyzer
+from squeeze_service import get_analysis
 
 app = Flask(__name__)
 
@@ -19,22 +20,25 @@ def squeeze_rrg():
     output = request.args.get('output', 'telegram')  # telegram sends to channels
     
     try:
-        result = subprocess.run(
-            ['python3', '/root/clawd/scripts/squeeze_rrg_analyzer.py', timeframe, output],
-            capture_output=True,
-            text=True,
-            timeout=300,
-            env={**os.environ}
-        )
+        result, _ = get_analysis('US', timeframe)
+        
+        # Same output as running squeeze_rrg_analyzer.py <timeframe> <output>
+        if output == 'json':
+            text = json.dumps(result, indent=2)
+        else:
+            text = analyzer.format_telegram(result)
+            if output == 'telegram':
+                analyzer.send_telegram(text, analyzer.TELEGRAM_CHAT_ID)
+                analyzer.send_telegram(text, analyzer.JC_ALGOS_CHANNEL)
         
         return jsonify({
             'success': True,
             'timeframe': timeframe,
-            'output': result.stdout,
-            'errors': result.stderr if result.stderr else None
+            'output': text + '\n',
+            'errors': None
         })
-    except subprocess.TimeoutExpired:
-        return jsonify({'success': False, 'error': 'Timeout'}), 504
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -45,4 +49,4 @@ def health():
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5010)
+    app.run(host='0.0.0.0', port=5010, threaded=True)
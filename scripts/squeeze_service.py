@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Squeeze + RRG Service
+Runs the US / HK squeeze-RRG analyzers in-process for squeeze_api.py and
+squeeze_rrg_webhook.py, instead of spawning an analyzer script per request.
+
+- pandas / yfinance and the analyzers are imported once per process, and the
+  squeeze scan resumes its rolling state (see squeeze_state.py)
+- results are cached per (market, timeframe) and bar: an entry is dropped
+  when the next bar is due or after CACHE_TTL, whichever comes first
+- concurrent requests for the same market / timeframe wait for the one
+  computation in flight and share its result
+
+Config (env vars):
+    SQUEEZE_CACHE_TTL   max age of a cached result in seconds (default 600)
+"""
+
+import os
+import sys
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+
+import squeeze_rrg_analyzer
+import hk_squeeze_rrg_analyzer
+
+MARKETS = {
+    'US': squeeze_rrg_analyzer,
+    'HK': hk_squeeze_rrg_analyzer,
+}
+
+BAR_PERIODS = {
+    '1h': timedelta(hours=1),
+    '4h': timedelta(hours=4),
+    '1d': timedelta(days=1),
+}
+
+# The newest bar may still be forming, so results also age out
+CACHE_TTL = int(os.environ.get('SQUEEZE_CACHE_TTL', 600))
+
+_results = {}          # (market, timeframe) -> {'result', 'bar_time', 'computed_at'}
+_locks = {}            # (market, timeframe) -> Lock held while computing
+_guard = threading.Lock()
+
+
+def _lock(key) -> threading.Lock:
+    with _guard:
+        return _locks.setdefault(key, threading.Lock())
+
+
+def _is_fresh(entry: dict, timeframe: str) -> bool:
+    """Younger than CACHE_TTL and no new bar has become due since it was computed"""
+    if time.time() - entry['computed_at'] >= CACHE_TTL:
+        return False
+    if entry['bar_time'] is None:
+        return True
+
+    bar_time = datetime.fromisoformat(entry['bar_time'])
+    if bar_time.tzinfo is None:
+        now, computed = datetime.now(), datetime.fromtimestamp(entry['computed_at'])
+    else:
+        now, computed = datetime.now(timezone.utc), datetime.fromtimestamp(entry['computed_at'], timezone.utc)
+    next_bar = bar_time + BAR_PERIODS[timeframe]
+    # Outside market hours the next bar is overdue already - then only the TTL applies
+    return not (computed < next_bar <= now)
+
+
+def get_analysis(market: str = 'US', timeframe: str = '1h', refresh: bool = False):
+    """
+    Squeeze + RRG result for a market / timeframe, cached and coalesced
+
+    Args:
+        market: 'US' or 'HK'
+        timeframe: '1h', '4h' or '1d'
+        refresh: recompute even if a fresh result is cached
+
+    Returns:
+        (analyze_squeeze_rrg() result, cache status 'HIT' / 'MISS'),
+        the result dict is shared - don't modify it
+    """
+    market = market.upper()
+    if market not in MARKETS:
+        raise ValueError(f"Unknown market: {market}")
+    if timeframe not in BAR_PERIODS:
+        raise ValueError(f"Invalid timeframe: {timeframe}")
+
+    key = (market, timeframe)
+    entry = _results.get(key)
+    if entry and not refresh and _is_fresh(entry, timeframe):
+        return entry['result'], 'HIT'
+
+    requested_at = time.time()
+    with _lock(key):
+        # Computed by another request while this one waited
+        entry = _results.get(key)
+        if entry and (entry['computed_at'] >= requested_at or (not refresh and _is_fresh(entry, timeframe))):
+            return entry['result'], 'HIT'
+
+        started = time.time()
+        result = MARKETS[market].analyze_squeeze_rrg(timeframe)
+        _results[key] = {
+            'result': result,
+            'bar_time': result.get('bar_time'),
+            'computed_at': started,
+        }
+        print(f"Squeeze-RRG {market} {timeframe} computed in {time.time() - started:.1f}s", file=sys.stderr)
+        return result, 'MISS'
+
+
+def run_warmer(pairs, interval: int = CACHE_TTL):
+    """Keep (market, timeframe) results computed forever (run in a daemon thread)"""
+    while True:
+        for market, timeframe in pairs:
+            try:
+                get_analysis(market, timeframe)
+            except Exception as e:
+                print(f"Warning: Squeeze-RRG warm-up {market} {timeframe} failed: {e}", file=sys.stderr)
+        time.sleep(interval)
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Incremental BB Squeeze State
+Keeps the rolling windows behind calculate_bb_squeeze() per symbol (running
+sum / sum of squares of the last N closes, true ranges, RSI gains/losses) in
+a resumable state file, so an hourly scan only downloads the bars added since
+the last run and folds each one in with an O(1) update, instead of
+re-downloading 60 days and recomputing every indicator for every symbol.
+
+The indicators match calculate_bb_squeeze() exactly: simple rolling means
+for ATR and RSI (not Wilder smoothing), sample std for the bands.
+
+The newest bar of a download may still be forming, so only the bars before
+it are committed to the state; the newest one is evaluated on a copy and
+picked up again (complete) by the next run.
+
+Prices are split/dividend adjusted, so a new adjustment changes the basis of
+every stored close. Each warm download re-fetches the last committed bar; if
+its close no longer matches the stored one the symbol is rebuilt from history.
+
+Usage:
+    python3 squeeze_state.py --show us 1h     # summarize a state file
+    python3 squeeze_state.py --reset us 1h    # drop it (next scan rebuilds from history)
+"""
+
+import os
+import sys
+import copy
+import json
+import math
+from collections import deque
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+import yfinance as yf
+
+# State files live here (override with SQUEEZE_STATE_DIR env var)
+STATE_DIR = Path(os.environ.get('SQUEEZE_STATE_DIR', Path(__file__).parent / "data" / "squeeze_state"))
+
+# Bump when the state layout or indicator math changes - old files are rebuilt
+STATE_VERSION = 1
+
+# Same defaults as calculate_bb_squeeze()
+BB_PERIOD = 20
+BB_STD = 2.0
+KC_PERIOD = 20
+KC_MULT = 1.5
+RSI_PERIOD = 14
+MOM_PERIOD = 12
+
+# Same minimum history as the full scan
+MIN_BARS = 30
+
+# Relative close change of the last committed bar treated as a re-adjustment
+ADJUST_TOLERANCE = 1e-4
+
+
+# ============================================================================
+# Rolling State
+# ============================================================================
+
+class RollingWindow:
+    """Last `size` values with a running sum and sum of squares"""
+
+    def __init__(self, size: int, values=()):
+        self.size = size
+        self.values = deque(values, maxlen=size)
+        self._resync()
+
+    def _resync(self):
+        # Exact sums from the window, so float drift can't build up across runs
+        self.total = math.fsum(self.values)
+        self.total_sq = math.fsum(v * v for v in self.values)
+        self.pushes = 0
+
+    def push(self, value: float):
+        if len(self.values) == self.size:
+            old = self.values[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+        self.pushes += 1
+        if self.pushes >= self.size:
+            self._resync()
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.size
+
+    def mean(self) -> float:
+        return self.total / self.size if self.full else math.nan
+
+    def std(self) -> float:
+        """Sample std (ddof=1), like pandas rolling().std()"""
+        if not self.full or self.size < 2:
+            return math.nan
+        var = (self.total_sq - self.total * self.total / self.size) / (self.size - 1)
+        return math.sqrt(max(var, 0.0))
+
+
+class SymbolState:
+    """Rolling-window state of one symbol, updated one bar at a time"""
+
+    def __init__(self):
+        # One close window per distinct period (BB, KC mid and MOM share when equal)
+        self.closes = {period: RollingWindow(period) for period in {BB_PERIOD, KC_PERIOD, MOM_PERIOD}}
+        self.tr = RollingWindow(KC_PERIOD)
+        self.gain = RollingWindow(RSI_PERIOD)
+        self.loss = RollingWindow(RSI_PERIOD)
+        self.last_ts = None
+        self.last_close = None
+        self.prev_close = None
+        self.bars = 0
+
+    def update(self, ts, high: float, low: float, close: float):
+        """Fold one completed bar into the state"""
+        prev = self.last_close
+        if prev is not None:
+            self.tr.push(max(high - low, abs(high - prev), abs(low - prev)))
+            delta = close - prev
+        else:
+            delta = 0.0  # calculate_bb_squeeze counts the first (NaN) delta as no gain / no loss
+        self.gain.push(delta if delta > 0 else 0.0)
+        self.loss.push(-delta if delta < 0 else 0.0)
+        for window in self.closes.values():
+            window.push(close)
+
+        self.last_ts = pd.Timestamp(ts)
+        self.prev_close = prev
+        self.last_close = close
+        self.bars += 1
+
+    def snapshot(self) -> dict:
+        """Indicator values at the last bar (same fields as the full scan's last row)"""
+        bb_mid = self.closes[BB_PERIOD].mean()
+        bb_std = self.closes[BB_PERIOD].std()
+        bb_upper = bb_mid + BB_STD * bb_std
+        bb_lower = bb_mid - BB_STD * bb_std
+        atr = self.tr.mean()
+        kc_mid = self.closes[KC_PERIOD].mean()
+        kc_upper = kc_mid + KC_MULT * atr
+        kc_lower = kc_mid - KC_MULT * atr
+
+        gain, loss = self.gain.mean(), self.loss.mean()
+        if loss == 0:
+            rsi = 100.0 if gain > 0 else math.nan
+        else:
+            rsi = 100 - (100 / (1 + gain / loss))
+
+        close = self.last_close
+        return {
+            'timestamp': self.last_ts,
+            'bars': self.bars,
+            'close': close,
+            'prev_close': self.prev_close if self.prev_close is not None else close,
+            'bb_upper': bb_upper,
+            'bb_lower': bb_lower,
+            'bb_width': (bb_upper - bb_lower) / bb_mid,
+            'squeeze': bool(bb_lower > kc_lower and bb_upper < kc_upper),
+            'rsi': rsi,
+            'mom': close - self.closes[MOM_PERIOD].mean(),
+        }
+
+    def peek(self, ts, high: float, low: float, close: float) -> dict:
+        """snapshot() as if a (possibly still forming) bar were added, without committing it"""
+        state = copy.deepcopy(self)
+        state.update(ts, high, low, close)
+        return state.snapshot()
+
+    def to_dict(self) -> dict:
+        return {
+            'last_ts': self.last_ts.isoformat() if self.last_ts is not None else None,
+            'last_close': self.last_close,
+            'prev_close': self.prev_close,
+            'bars': self.bars,
+            'closes': {str(period): list(window.values) for period, window in self.closes.items()},
+            'tr': list(self.tr.values),
+            'gain': list(self.gain.values),
+            'loss': list(self.loss.values),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'SymbolState':
+        state = cls()
+        state.closes = {period: RollingWindow(period, data['closes'][str(period)]) for period in state.closes}
+        state.tr = RollingWindow(KC_PERIOD, data['tr'])
+        state.gain = RollingWindow(RSI_PERIOD, data['gain'])
+        state.loss = RollingWindow(RSI_PERIOD, data['loss'])
+        state.last_ts = pd.Timestamp(data['last_ts']) if data['last_ts'] else None
+        state.last_close = data['last_close']
+        state.prev_close = data['prev_close']
+        state.bars = data['bars']
+        return state
+
+
+# ============================================================================
+# State File
+# ============================================================================
+
+def _params() -> dict:
+    return {'bb': [BB_PERIOD, BB_STD], 'kc': [KC_PERIOD, KC_MULT], 'rsi': RSI_PERIOD, 'mom': MOM_PERIOD}
+
+
+def state_path(name: str, timeframe: str) -> Path:
+    return STATE_DIR / f"{name}_{timeframe}.json"
+
+
+def load_state(name: str, timeframe: str) -> dict:
+    """{symbol: SymbolState} from the state file, empty if missing or outdated"""
+    try:
+        with open(state_path(name, timeframe)) as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if stored.get('version') != STATE_VERSION or stored.get('params') != _params():
+        return {}
+    try:
+        return {symbol: SymbolState.from_dict(data) for symbol, data in stored['symbols'].items()}
+    except (KeyError, TypeError, ValueError) as e:
+        print(f"Warning: Ignoring unreadable squeeze state: {e}", file=sys.stderr)
+        return {}
+
+
+def save_state(name: str, timeframe: str, states: dict):
+    path = state_path(name, timeframe)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    stored = {
+        'version': STATE_VERSION,
+        'params': _params(),
+        'saved_at': datetime.now().isoformat(timespec='seconds'),
+        'symbols': {symbol: state.to_dict() for symbol, state in states.items()},
+    }
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(stored, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+# ============================================================================
+# Incremental Scan
+# ============================================================================
+
+def download_bars(symbols: list, timeframe: str, start) -> dict:
+    """
+    OHLC bars per symbol since `start`, resampled to 4h when asked
+
+    Returns:
+        {symbol: DataFrame} of complete (non-NaN) bars, oldest first
+    """
+    interval = '1d' if timeframe == '1d' else '1h'  # yfinance has no 4h, resample 1h
+    data = yf.download(symbols, start=start, end=datetime.now(), interval=interval,
+                       progress=False, auto_adjust=True, group_by='ticker')
+    if data is None or data.empty:
+        return {}
+
+    frames = {}
+    multi = isinstance(data.columns, pd.MultiIndex)
+    for symbol in symbols:
+        if multi:
+            if symbol not in data.columns.get_level_values(0):
+                continue
+            df = data[symbol]
+        elif len(symbols) == 1:
+            df = data
+        else:
+            continue
+
+        if timeframe == '4h':
+            df = df.resample('4h').agg({
+                'Open': 'first', 'High': 'max', 'Low': 'min',
+                'Close': 'last', 'Volume': 'sum'
+            })
+        df = df[['High', 'Low', 'Close']].dropna()
+        if not df.empty:
+            frames[symbol] = df
+    return frames
+
+
+def _basis_changed(state: SymbolState, df: pd.DataFrame) -> bool:
+    """True if the re-downloaded last committed bar closes away from the stored close"""
+    if state.last_ts is None or state.last_ts not in df.index:
+        return False
+    close = float(df.at[state.last_ts, 'Close'])
+    return abs(close - state.last_close) > ADJUST_TOLERANCE * abs(state.last_close)
+
+
+def _apply(state: SymbolState, df: pd.DataFrame) -> dict:
+    """Commit every bar of `df` newer than the state except the newest, peek at the newest"""
+    if state.last_ts is not None:
+        df = df[df.index > state.last_ts]
+    if df.empty:
+        return state.snapshot() if state.last_ts is not None else None
+
+    highs, lows, closes = df['High'].tolist(), df['Low'].tolist(), df['Close'].tolist()
+    index = df.index
+    for i in range(len(df) - 1):
+        state.update(index[i], highs[i], lows[i], closes[i])
+    return state.peek(index[-1], highs[-1], lows[-1], closes[-1])
+
+
+def scan_latest(symbols: list, timeframe: str = '1h', lookback_days: int = 60,
+                name: str = 'us') -> dict:
+    """
+    Squeeze indicators at the latest bar of each symbol, using the state file
+
+    Symbols with warm state only download bars from the day of their last
+    committed bar; symbols without state (or state older than
+    `lookback_days`), and warm symbols whose prices were re-adjusted since,
+    are rebuilt from a full `lookback_days` download.
+
+    Returns:
+        {symbol: snapshot dict (see SymbolState.snapshot)}
+    """
+    states = load_state(name, timeframe)
+    cutoff = (datetime.now() - timedelta(days=lookback_days)).date()
+
+    warm = [s for s in symbols if s in states and states[s].last_ts.date() >= cutoff]
+    cold = [s for s in symbols if s not in warm]
+    for symbol in cold:
+        states[symbol] = SymbolState()
+
+    groups = []
+    if warm:
+        groups.append((warm, min(states[s].last_ts for s in warm).date()))
+    if cold:
+        groups.append((cold, datetime.now() - timedelta(days=lookback_days)))
+
+    latest = {}
+    adjusted = []
+    while groups:
+        group, start = groups.pop(0)
+        try:
+            frames = download_bars(group, timeframe, start)
+        except Exception as e:
+            print(f"Error downloading data: {e}", file=sys.stderr)
+            continue
+        for symbol in group:
+            try:
+                df = frames.get(symbol)
+                if df is not None and _basis_changed(states[symbol], df):
+                    # Split / dividend re-adjustment: stored windows are on the old basis
+                    states[symbol] = SymbolState()
+                    adjusted.append(symbol)
+                    continue
+                snapshot = _apply(states[symbol], df) if df is not None else None
+            except Exception as e:
+                print(f"Warning: {symbol} squeeze state update failed: {e}", file=sys.stderr)
+                states[symbol] = SymbolState()  # rebuilt from history next run
+                continue
+            if snapshot is None:
+                continue
+            if timeframe != '4h' and snapshot['bars'] < MIN_BARS:
+                continue
+            latest[symbol] = snapshot
+
+        if group is warm and adjusted:
+            # Rebuild them from a full download, together with the cold symbols
+            if groups:
+                groups[0] = (groups[0][0] + adjusted, groups[0][1])
+            else:
+                groups.append((adjusted, datetime.now() - timedelta(days=lookback_days)))
+
+    print(f"Squeeze state: {len(warm) - len(adjusted)} warm, {len(cold) + len(adjusted)} rebuilt "
+          f"({len(adjusted)} re-adjusted)", file=sys.stderr)
+    # Don't persist symbols that never got a bar
+    save_state(name, timeframe, {s: st for s, st in states.items() if st.last_ts is not None})
+    return latest
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Incremental BB squeeze state files')
+    parser.add_argument('name', help='State name (us, hk)')
+    parser.add_argument('timeframe', nargs='?', default='1h', help='1h, 4h or 1d')
+    parser.add_argument('--show', action='store_true', help='Print the last bar and squeeze of each symbol')
+    parser.add_argument('--reset', action='store_true', help='Delete the state file')
+    args = parser.parse_args()
+
+    path = state_path(args.name, args.timeframe)
+    if args.reset:
+        path.unlink(missing_ok=True)
+        print(f"✅ Removed {path}")
+    else:
+        states = load_state(args.name, args.timeframe)
+        print(f"{path}: {len(states)} symbols")
+        if args.show:
+            for symbol, state in sorted(states.items()):
+                snap = state.snapshot()
+                print(f"{symbol:<10} {snap['timestamp']}  bars={snap['bars']:<5} "
+                      f"close={snap['close']:.2f} squeeze={snap['squeeze']}")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+FinBERT Sentiment Cache
+Results keyed by hash(model version + scored text) in one SQLite file, so
+re-runs only infer on texts not seen before. Shared by forex_sentiment_api.py
+and projects/market-analyzer/sentiment/market_sentiment.py.
+
+A different model revision gets fresh cache entries. Cache errors are
+reported and treated as misses, never as failures.
+"""
+
+import os
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+
+# Cache location (override with SENTIMENT_CACHE_PATH env var)
+SENTIMENT_CACHE_PATH = os.environ.get(
+    'SENTIMENT_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'sentiment_cache.db')
+)
+
+# Keys per SELECT ... IN (...) (SQLite caps bound parameters)
+LOOKUP_CHUNK = 500
+
+
+class SentimentCache:
+    """
+    (confidence, label) results for one model version
+
+    Each thread keeps its own connection, opened on first use, so repeated
+    calls don't reconnect. `stats` counts this process's hits and misses;
+    the stats table in the file keeps the running totals.
+    """
+
+    def __init__(self, model_version, path=SENTIMENT_CACHE_PATH):
+        self.model_version = model_version
+        self.path = path
+        self.stats = {'hits': 0, 'misses': 0}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def key(self, text):
+        return hashlib.sha256(f"{self.model_version}\n{text}".encode('utf-8')).hexdigest()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("""CREATE TABLE IF NOT EXISTS sentiment (
+                key TEXT PRIMARY KEY, confidence REAL NOT NULL, label TEXT NOT NULL,
+                model TEXT NOT NULL, created_at TEXT NOT NULL)""")
+            conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._local.conn = conn
+        return conn
+
+    def lookup(self, keys):
+        """{key: (confidence, label)} for the keys already scored"""
+        found = {}
+        try:
+            conn = self._connection()
+            for start in range(0, len(keys), LOOKUP_CHUNK):
+                chunk = keys[start:start + LOOKUP_CHUNK]
+                rows = conn.execute(
+                    f"SELECT key, confidence, label FROM sentiment WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update((key, (conf, label)) for key, conf, label in rows)
+        except sqlite3.Error as e:
+            print(f"[!] WARNING: Sentiment cache read failed: {e}")
+        return found
+
+    def store(self, scored, hits, misses):
+        """Save new results {key: (confidence, label)} and add to the hit/miss totals"""
+        now = datetime.now().isoformat(timespec='seconds')
+        try:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO sentiment VALUES (?, ?, ?, ?, ?)",
+                    [(key, conf, label, self.model_version, now) for key, (conf, label) in scored.items()]
+                )
+                conn.executemany(
+                    "INSERT INTO stats VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    [('hits', hits), ('misses', misses)]
+                )
+        except sqlite3.Error as e:
+            print(f"[!] WARNING: Sentiment cache write failed: {e}")
+
+    def score(self, texts, infer, verbose=True):
+        """
+        (confidence, label) for every text, in input order
+
+        Identical texts are looked up once and infer(texts) -> [(confidence,
+        label), ...] only runs on texts not in the cache, shortest first so
+        padded batches hold similar-sized inputs. Blank texts are not scored
+        and come back as (0.0, 'Neutral').
+        """
+        unique = list(dict.fromkeys(t for t in texts if t.strip()))
+        keys = {text: self.key(text) for text in unique}
+        cached = self.lookup(list(keys.values())) if unique else {}
+        scores = {text: cached[keys[text]] for text in unique if keys[text] in cached}
+        todo = sorted((t for t in unique if t not in scores), key=len)
+        if todo:
+            scores.update(zip(todo, infer(todo)))
+
+        if unique:
+            hits, misses = len(unique) - len(todo), len(todo)
+            self.store({keys[t]: scores[t] for t in todo}, hits, misses)
+            with self._lock:
+                self.stats['hits'] += hits
+                self.stats['misses'] += misses
+            if verbose:
+                print(f"[CACHE] FinBERT: {hits} cached, {misses} scored")
+
+        return [scores.get(text, (0.0, 'Neutral')) for text in texts]
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Squeeze Indicators
+==================
+One implementation of the Bollinger Band / Keltner Channel squeeze math used
+by the BB squeeze scanners (us_bb_squeeze_scanner.py, scripts/*squeeze_rrg_analyzer.py)
+and bb_squeeze_backtest.py.
+
+Every function takes one symbol (1-D array or Series) or a whole panel
+(2-D array or DataFrame, bars x symbols), works down the bars, and returns
+the same shape and type - Series / DataFrames keep their index and columns.
+A window containing NaN gives NaN, like pandas rolling() with its default
+min_periods, so NaN-padded panels behave like each symbol on its own.
+
+Rolling mean and std come out of a single cumulative-sum pass, taken in
+blocks of BLOCK_ROWS bars so rounding can't accumulate over long histories.
+Squares are summed as deviations from each block's mean, which keeps the
+std of tight (squeezed) windows closer to exact than pandas' running sums.
+
+Pass dtype=np.float32 to halve the memory of outputs for large panels; the
+arithmetic is always float64.
+"""
+
+import numpy as np
+import pandas as pd
+
+# =============================================================================
+# DEFAULTS
+# =============================================================================
+
+BB_PERIOD = 20
+BB_STD = 2.0
+KC_PERIOD = 20
+KC_MULT = 1.5
+ATR_PERIOD = 14
+RSI_PERIOD = 14
+MOM_PERIOD = 12
+
+# Rows per cumulative-sum block in rolling_mean_std (bounds rounding error)
+BLOCK_ROWS = 256
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+def _as_2d(values):
+    """float64 (bars x columns) array plus a function that restores the input's type and shape"""
+    if isinstance(values, pd.DataFrame):
+        index, columns = values.index, values.columns
+        return values.to_numpy(dtype=np.float64), lambda out: pd.DataFrame(out, index=index, columns=columns)
+    if isinstance(values, pd.Series):
+        index, name = values.index, values.name
+        return values.to_numpy(dtype=np.float64)[:, None], lambda out: pd.Series(out[:, 0], index=index, name=name)
+
+    array = np.asarray(values, dtype=np.float64)
+    if array.ndim == 1:
+        return array[:, None], lambda out: out[:, 0]
+    return array, lambda out: out
+
+
+def _cast(out, dtype):
+    return out if dtype is None else out.astype(dtype, copy=False)
+
+
+def _rolling(x, window, squares, ddof=1):
+    """Rolling mean (and std) of a float64 2-D array down axis 0"""
+    rows, cols = x.shape
+    mean = np.full((rows, cols), np.nan)
+    std = np.full((rows, cols), np.nan) if squares else None
+    if window < 1 or rows < window:
+        return mean, std
+
+    finite = np.isfinite(x)
+    filled = np.where(finite, x, 0.0)
+    zero = np.zeros((1, cols))
+
+    # Each block of output rows needs the window - 1 rows before it
+    for start in range(window - 1, rows, BLOCK_ROWS):
+        stop = min(start + BLOCK_ROWS, rows)
+        seg, seg_finite = filled[start - window + 1:stop], finite[start - window + 1:stop]
+
+        nobs = np.concatenate([zero, np.cumsum(seg_finite, axis=0)])
+        complete = (nobs[window:] - nobs[:-window]) == window
+
+        # Plain sums for the mean: a window of zeros (RSI gains / losses) stays exactly 0
+        sums = np.concatenate([zero, np.cumsum(seg, axis=0)])
+        mean[start:stop] = np.where(complete, (sums[window:] - sums[:-window]) / window, np.nan)
+
+        if squares:
+            # Squares of deviations from the block mean, so they don't swamp the variance
+            shift = seg.sum(axis=0) / np.maximum(seg_finite.sum(axis=0), 1)
+            dev = np.where(seg_finite, seg - shift, 0.0)
+            dev_sums = np.concatenate([zero, np.cumsum(dev, axis=0)])
+            sq_sums = np.concatenate([zero, np.cumsum(dev * dev, axis=0)])
+            win_sum = dev_sums[window:] - dev_sums[:-window]
+            win_sq = sq_sums[window:] - sq_sums[:-window]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                var = np.maximum((win_sq - win_sum * win_sum / window) / (window - ddof), 0.0)
+            std[start:stop] = np.where(complete, np.sqrt(var), np.nan)
+
+    return mean, std
+
+# =============================================================================
+# ROLLING STATISTICS
+# =============================================================================
+
+def rolling_mean(values, window, dtype=None):
+    """Rolling mean over `window` bars (NaN until the window is full)"""
+    x, wrap = _as_2d(values)
+    mean, _ = _rolling(x, int(window), squares=False)
+    return wrap(_cast(mean, dtype))
+
+
+def rolling_mean_std(values, window, ddof=1, dtype=None):
+    """
+    Rolling mean and standard deviation in one pass
+
+    Returns:
+        (mean, std), std with `ddof` like pandas rolling().std() (sample std)
+    """
+    x, wrap = _as_2d(values)
+    mean, std = _rolling(x, int(window), squares=True, ddof=ddof)
+    return wrap(_cast(mean, dtype)), wrap(_cast(std, dtype))
+
+# =============================================================================
+# INDICATORS
+# =============================================================================
+
+def bollinger_bands(close, period=BB_PERIOD, num_std=BB_STD, dtype=None):
+    """
+    Bollinger Bands
+
+    Returns:
+        dict of 'mid' (SMA), 'std', 'upper', 'lower', 'width' ((upper - lower) / mid)
+        and 'position' (where close sits between the bands, 0 = lower, 1 = upper)
+    """
+    x, wrap = _as_2d(close)
+    mid, std = _rolling(x, int(period), squares=True)
+    upper = mid + num_std * std
+    lower = mid - num_std * std
+    with np.errstate(invalid='ignore', divide='ignore'):
+        width = (upper - lower) / mid
+        position = (x - lower) / (upper - lower)
+    return {
+        'mid': wrap(_cast(mid, dtype)),
+        'std': wrap(_cast(std, dtype)),
+        'upper': wrap(_cast(upper, dtype)),
+        'lower': wrap(_cast(lower, dtype)),
+        'width': wrap(_cast(width, dtype)),
+        'position': wrap(_cast(position, dtype)),
+    }
+
+
+def _true_range(high, low, close):
+    prev_close = np.vstack([np.full((1, close.shape[1]), np.nan), close[:-1]])
+    # np.maximum (not fmax): the first bar has no previous close, so its TR is NaN
+    return np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def true_range(high, low, close, dtype=None):
+    """True range: max(high - low, |high - prev close|, |low - prev close|)"""
+    h, _ = _as_2d(high)
+    l, _ = _as_2d(low)
+    c, wrap = _as_2d(close)
+    return wrap(_cast(_true_range(h, l, c), dtype))
+
+
+def average_true_range(high, low, close, period=ATR_PERIOD, dtype=None):
+    """ATR as a simple rolling mean of the true range (not Wilder smoothing)"""
+    h, _ = _as_2d(high)
+    l, _ = _as_2d(low)
+    c, wrap = _as_2d(close)
+    atr, _ = _rolling(_true_range(h, l, c), int(period), squares=False)
+    return wrap(_cast(atr, dtype))
+
+
+def keltner_channels(high, low, close, period=KC_PERIOD, mult=KC_MULT, dtype=None):
+    """
+    Keltner Channels around the close SMA, `mult` x ATR wide
+
+    Returns:
+        dict of 'tr', 'atr', 'mid', 'upper', 'lower'
+    """
+    h, _ = _as_2d(high)
+    l, _ = _as_2d(low)
+    c, wrap = _as_2d(close)
+    tr = _true_range(h, l, c)
+    atr, _ = _rolling(tr, int(period), squares=False)
+    mid, _ = _rolling(c, int(period), squares=False)
+    return {
+        'tr': wrap(_cast(tr, dtype)),
+        'atr': wrap(_cast(atr, dtype)),
+        'mid': wrap(_cast(mid, dtype)),
+        'upper': wrap(_cast(mid + mult * atr, dtype)),
+        'lower': wrap(_cast(mid - mult * atr, dtype)),
+    }
+
+
+def in_squeeze(bb, kc):
+    """True where the Bollinger Bands sit inside the Keltner Channels (False where either is NaN)"""
+    return (bb['lower'] > kc['lower']) & (bb['upper'] < kc['upper'])
+
+
+def relative_strength_index(close, period=RSI_PERIOD, dtype=None):
+    """RSI from simple rolling means of gains and losses (not Wilder smoothing)"""
+    x, wrap = _as_2d(close)
+    delta = np.vstack([np.full((1, x.shape[1]), np.nan), np.diff(x, axis=0)])
+    # Comparisons with NaN are False, so missing deltas count as no gain / no loss
+    gain, _ = _rolling(np.where(delta > 0, delta, 0.0), int(period), squares=False)
+    loss, _ = _rolling(np.where(delta < 0, -delta, 0.0), int(period), squares=False)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rsi = 100 - (100 / (1 + gain / loss))
+    return wrap(_cast(rsi, dtype))
+
+
+def momentum(close, period=MOM_PERIOD, dtype=None):
+    """Close minus its `period`-bar SMA"""
+    x, wrap = _as_2d(close)
+    mean, _ = _rolling(x, int(period), squares=False)
+    return wrap(_cast(x - mean, dtype))
@@ -2,6 +2,10 @@
 """
 US Stock Bollinger Band Squeeze Scanner
 Scans US stocks for BB squeeze opportunities
+
+Usage: us_bb_squeeze_scanner.py [1d|1h|1wk|1mo] [full|telegram] [--per-symbol]
+The universe is downloaded in bulk (DOWNLOAD_CHUNK_SIZE tickers per request);
+--per-symbol fetches each stock separately.
 """
 
 import yfinance as yf
@@ -11,6 +15,8 @@ from datetime import datetime
 import json
 import sys
 
+from squeeze_indicators import bollinger_bands, relative_strength_index
+
 # US Stock List
 US_STOCKS = [
     "AAPL", "ABBV", "ABNB", "ABT", "ACN", "ADBE", "ADI", "ADP", "ADSK", "AEP",
@@ -43,32 +49,67 @@ US_STOCKS = [
     "XLRE", "XLU", "XLV", "XLY", "XOM", "YUM", "ZS", "ZTS"
 ]
 
+# Tickers per multi-ticker yf.download call in bulk scans
+DOWNLOAD_CHUNK_SIZE = 100
+
+def history_period(interval):
+    """Lookback to download for an interval"""
+    if interval == '1wk':
+        return '2y'
+    elif interval == '1mo':
+        return '5y'
+    return '3mo'
+
 def calculate_bollinger_bands(df, period=20, std_dev=2):
-    """Calculate Bollinger Bands"""
-    df['SMA'] = df['Close'].rolling(window=period).mean()
-    df['STD'] = df['Close'].rolling(window=period).std()
-    df['BB_Upper'] = df['SMA'] + (std_dev * df['STD'])
-    df['BB_Lower'] = df['SMA'] - (std_dev * df['STD'])
-    df['BB_Width'] = (df['BB_Upper'] - df['BB_Lower']) / df['SMA']
-    df['BB_Position'] = (df['Close'] - df['BB_Lower']) / (df['BB_Upper'] - df['BB_Lower'])
+    """Calculate Bollinger Bands (see squeeze_indicators.py)"""
+    bb = bollinger_bands(df['Close'], period, std_dev)
+    df['SMA'] = bb['mid']
+    df['STD'] = bb['std']
+    df['BB_Upper'] = bb['upper']
+    df['BB_Lower'] = bb['lower']
+    df['BB_Width'] = bb['width']
+    df['BB_Position'] = bb['position']
     return df
 
 def calculate_rsi(df, period=14):
     """Calculate RSI"""
-    delta = df['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    df['RSI'] = 100 - (100 / (1 + rs))
+    df['RSI'] = relative_strength_index(df['Close'], period)
     return df
 
+def build_result(symbol, latest, prev_close):
+    """Result dict from the latest bar's indicator values"""
+    bb_width = latest['BB_Width']
+    is_squeeze = bb_width < 0.04
+    
+    price = latest['Close']
+    sma = latest['SMA']
+    rsi = latest['RSI']
+    volume = latest['Volume']
+    change_pct = ((price - prev_close) / prev_close * 100) if prev_close > 0 else 0
+    
+    opportunity = analyze_opportunity(latest, bb_width, is_squeeze)
+    
+    return {
+        'symbol': symbol,
+        'price': float(price),
+        'change_pct': float(change_pct),
+        'bb_width': float(bb_width),
+        'bb_position': float(latest['BB_Position']) if not pd.isna(latest['BB_Position']) else 0.5,
+        'bb_upper': float(latest['BB_Upper']),
+        'bb_lower': float(latest['BB_Lower']),
+        'sma': float(sma),
+        'rsi': float(rsi),
+        'volume': int(volume),
+        'is_squeeze': is_squeeze,
+        'opportunity': opportunity,
+        'signal_strength': get_signal_strength(bb_width, latest['BB_Position'], rsi)
+    }
+
 def analyze_stock(symbol, period='3mo', interval='1d'):
     """Analyze a single stock for BB squeeze"""
     try:
-        if interval == '1wk':
-            period = '2y'
-        elif interval == '1mo':
-            period = '5y'
+        if interval in ('1wk', '1mo'):
+            period = history_period(interval)
         
         stock = yf.Ticker(symbol)
         df = stock.history(period=period, interval=interval)
@@ -82,36 +123,109 @@ def analyze_stock(symbol, period='3mo', interval='1d'):
         latest = df.iloc[-1]
         prev = df.iloc[-2] if len(df) > 1 else latest
         
-        bb_width = latest['BB_Width']
-        is_squeeze = bb_width < 0.04
-        
-        price = latest['Close']
-        sma = latest['SMA']
-        rsi = latest['RSI']
-        volume = latest['Volume']
-        change_pct = ((price - prev['Close']) / prev['Close'] * 100) if prev['Close'] > 0 else 0
-        
-        opportunity = analyze_opportunity(latest, bb_width, is_squeeze)
-        
-        return {
-            'symbol': symbol,
-            'price': float(price),
-            'change_pct': float(change_pct),
-            'bb_width': float(bb_width),
-            'bb_position': float(latest['BB_Position']) if not pd.isna(latest['BB_Position']) else 0.5,
-            'bb_upper': float(latest['BB_Upper']),
-            'bb_lower': float(latest['BB_Lower']),
-            'sma': float(sma),
-            'rsi': float(rsi),
-            'volume': int(volume),
-            'is_squeeze': is_squeeze,
-            'opportunity': opportunity,
-            'signal_strength': get_signal_strength(bb_width, latest['BB_Position'], rsi)
-        }
+        return build_result(symbol, latest, prev['Close'])
         
     except Exception as e:
         return None
 
+# =============================================================================
+# BULK SCAN (multi-ticker download + wide-panel indicators)
+# =============================================================================
+
+def download_universe(symbols, interval='1d', chunk_size=DOWNLOAD_CHUNK_SIZE):
+    """
+    Close and Volume for all symbols via chunked multi-ticker yf.download
+    
+    Returns:
+        (close, volume) DataFrames, one column per symbol that returned data
+    """
+    closes, volumes = [], []
+    for start in range(0, len(symbols), chunk_size):
+        chunk = symbols[start:start + chunk_size]
+        try:
+            data = yf.download(chunk, period=history_period(interval), interval=interval,
+                               auto_adjust=True, progress=False, threads=True)
+        except Exception as e:
+            print(f"⚠️  Download failed for {chunk[0]}..{chunk[-1]}: {e}", file=sys.stderr)
+            continue
+        if data.empty:
+            continue
+        if isinstance(data.columns, pd.MultiIndex):
+            closes.append(data['Close'])
+            volumes.append(data['Volume'])
+        else:
+            closes.append(data[['Close']].set_axis(chunk, axis=1))
+            volumes.append(data[['Volume']].set_axis(chunk, axis=1))
+    
+    if not closes:
+        return pd.DataFrame(), pd.DataFrame()
+    # Chunks can cover different dates; keep rows in time order for align_bars
+    close = pd.concat(closes, axis=1, sort=True)
+    volume = pd.concat(volumes, axis=1).reindex(index=close.index, columns=close.columns)
+    return close, volume
+
+def align_bars(close, volume):
+    """
+    Bottom-align each symbol's own bars (rows where it has a Close) so a
+    rolling window over rows is a rolling window over that symbol's bars,
+    exactly as in its single-ticker history
+    
+    Returns:
+        (close, volume) numpy arrays [bars, symbols] padded with NaN on top,
+        and the number of bars per symbol
+    """
+    values = close.to_numpy(dtype=float)
+    vols = volume.to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=0)
+    depth = int(counts.max()) if len(counts) else 0
+    
+    aligned_close = np.full((depth, values.shape[1]), np.nan)
+    aligned_volume = np.full((depth, values.shape[1]), np.nan)
+    for j in range(values.shape[1]):
+        if counts[j]:
+            aligned_close[depth - counts[j]:, j] = values[valid[:, j], j]
+            aligned_volume[depth - counts[j]:, j] = vols[valid[:, j], j]
+    return aligned_close, aligned_volume, counts
+
+def scan_bulk(symbols, interval='1d'):
+    """
+    analyze_stock() for every symbol from one bulk download and one
+    vectorized indicator pass
+    
+    Returns:
+        {symbol: result dict or None}, same values as analyze_stock
+    """
+    close, volume = download_universe(symbols, interval)
+    results = {symbol: None for symbol in symbols}
+    if close.empty:
+        return results
+    
+    aligned_close, aligned_volume, counts = align_bars(close, volume)
+    panel = pd.DataFrame({'Close': aligned_close[-1]}, index=close.columns)
+    
+    # Same indicators as calculate_bollinger_bands / calculate_rsi, all columns at once
+    bb = bollinger_bands(aligned_close, 20, 2)
+    rsi = relative_strength_index(aligned_close, 14)
+    
+    panel['SMA'] = bb['mid'][-1]
+    panel['BB_Upper'] = bb['upper'][-1]
+    panel['BB_Lower'] = bb['lower'][-1]
+    panel['BB_Width'] = bb['width'][-1]
+    panel['BB_Position'] = bb['position'][-1]
+    panel['RSI'] = rsi[-1]
+    panel['Volume'] = aligned_volume[-1]
+    prev_close = aligned_close[-2] if len(aligned_close) > 1 else aligned_close[-1]
+    
+    for j, symbol in enumerate(close.columns):
+        if symbol not in results or counts[j] < 30:
+            continue
+        try:
+            results[symbol] = build_result(symbol, panel.loc[symbol], prev_close[j])
+        except Exception:
+            pass
+    return results
+
 def analyze_opportunity(latest, bb_width, is_squeeze):
     """Determine trading opportunity type"""
     if not is_squeeze:
@@ -149,8 +263,8 @@ def get_signal_strength(bb_width, bb_position, rsi):
     else:
         return "WEAK"
 
-def scan_us_stocks(interval='1d', quiet=False):
-    """Scan all US stocks"""
+def scan_us_stocks(interval='1d', quiet=False, bulk=True):
+    """Scan all US stocks (bulk download by default, bulk=False for one request per symbol)"""
     
     if not quiet:
         print("=" * 120)
@@ -164,12 +278,13 @@ def scan_us_stocks(interval='1d', quiet=False):
     
     results = []
     squeeze_found = 0
+    bulk_results = scan_bulk(US_STOCKS, interval) if bulk else None
     
     for i, symbol in enumerate(US_STOCKS, 1):
         if not quiet:
             print(f"[{i}/{len(US_STOCKS)}] {symbol:12}", end=" ")
         
-        analysis = analyze_stock(symbol, interval=interval)
+        analysis = bulk_results[symbol] if bulk else analyze_stock(symbol, interval=interval)
         
         if analysis:
             if analysis['is_squeeze']:
@@ -238,8 +353,11 @@ def format_telegram_message(results):
 
 def main():
     """Main execution"""
-    interval = sys.argv[1] if len(sys.argv) > 1 else '1d'
-    output_format = sys.argv[2] if len(sys.argv) > 2 else 'full'
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    interval = args[0] if len(args) > 0 else '1d'
+    output_format = args[1] if len(args) > 1 else 'full'
+    # --per-symbol: one yf.Ticker().history request per stock (old behaviour)
+    bulk = '--per-symbol' not in sys.argv
     
     if interval not in ['1d', '1h', '1wk', '1mo']:
         print(f"❌ Invalid interval: {interval}")
@@ -247,7 +365,7 @@ def main():
         sys.exit(1)
     
     quiet = output_format == 'telegram'
-    results = scan_us_stocks(interval, quiet=quiet)
+    results = scan_us_stocks(interval, quiet=quiet, bulk=bulk)
     
     if output_format == 'telegram':
         print(format_telegram_message(results))